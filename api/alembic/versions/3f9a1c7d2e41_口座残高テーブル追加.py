@@ -0,0 +1,70 @@
+"""口座残高テーブル追加
+
+Revision ID: 3f9a1c7d2e41
+Revises: b55d03c14c5c
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2e41'
+down_revision = 'b55d03c14c5c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('account_balances',
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('household_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['household_id'], ['households.id'], ),
+    sa.PrimaryKeyConstraint('account_id')
+    )
+    op.create_index(op.f('ix_account_balances_household_id'), 'account_balances', ['household_id'], unique=False)
+    op.create_table('account_balance_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('household_id', sa.Integer(), nullable=False),
+    sa.Column('account_id', sa.Integer(), nullable=False),
+    sa.Column('as_of_date', sa.Date(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.ForeignKeyConstraint(['household_id'], ['households.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'as_of_date', name='uq_balance_checkpoint_account_date')
+    )
+    op.create_index(op.f('ix_account_balance_checkpoints_id'), 'account_balance_checkpoints', ['id'], unique=False)
+    op.create_index('idx_balance_checkpoint_household_date', 'account_balance_checkpoints', ['household_id', 'as_of_date'], unique=False)
+    op.create_index('idx_transactions_account_date', 'transactions', ['account_id', 'date'], unique=False)
+    op.create_index('idx_transactions_counter_account_date', 'transactions', ['counter_account_id', 'date'], unique=False)
+
+    # 既存の取引から現在残高をバックフィル（チェックポイントは balance_checkpoints スクリプトで作成）
+    op.execute("""
+        INSERT INTO account_balances (account_id, household_id, balance, updated_at)
+        SELECT a.id, a.household_id,
+            COALESCE((
+                SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount_total ELSE -t.amount_total END)
+                FROM transactions t WHERE t.account_id = a.id
+            ), 0)
+            + COALESCE((
+                SELECT SUM(t.amount_total)
+                FROM transactions t WHERE t.counter_account_id = a.id AND t.type = 'transfer'
+            ), 0),
+            CURRENT_TIMESTAMP
+        FROM accounts a
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_transactions_counter_account_date', table_name='transactions')
+    op.drop_index('idx_transactions_account_date', table_name='transactions')
+    op.drop_index('idx_balance_checkpoint_household_date', table_name='account_balance_checkpoints')
+    op.drop_index(op.f('ix_account_balance_checkpoints_id'), table_name='account_balance_checkpoints')
+    op.drop_table('account_balance_checkpoints')
+    op.drop_index(op.f('ix_account_balances_household_id'), table_name='account_balances')
+    op.drop_table('account_balances')
@@ -0,0 +1,45 @@
+"""カテゴリ階層クロージャテーブル追加
+
+Revision ID: 7c2e8b4f1a90
+Revises: 3f9a1c7d2e41
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e8b4f1a90'
+down_revision = '3f9a1c7d2e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    closure = op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    op.create_index('idx_category_closure_descendant', 'category_closure', ['descendant_id', 'ancestor_id'], unique=False)
+
+    # 既存の parent_id からクロージャを構築（循環があれば打ち切る）
+    parents = dict(op.get_bind().execute(sa.text("SELECT id, parent_id FROM categories")).all())
+    rows = []
+    for category_id in parents:
+        ancestor_id, depth, seen = category_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            rows.append({"ancestor_id": ancestor_id, "descendant_id": category_id, "depth": depth})
+            seen.add(ancestor_id)
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    if rows:
+        op.bulk_insert(closure, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_category_closure_descendant', table_name='category_closure')
+    op.drop_table('category_closure')
@@ -0,0 +1,64 @@
+"""金額の整数化
+
+Revision ID: 9d4a6c2e8f13
+Revises: 5b8e3d1f7a62
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4a6c2e8f13'
+down_revision = '5b8e3d1f7a62'
+branch_labels = None
+depends_on = None
+
+# 金額は円単位の整数で持つ（app.money: 円には補助単位がないので 1 円 = 1）
+# (テーブル, 列, 元の型)
+MONEY_COLUMNS = (
+    ('transactions', 'amount_total', sa.Numeric(12, 2)),
+    ('transaction_items', 'unit_price', sa.Numeric(12, 2)),
+    ('transaction_items', 'amount', sa.Numeric(12, 2)),
+    ('account_balances', 'balance', sa.Numeric(14, 2)),
+    ('account_balance_checkpoints', 'balance', sa.Numeric(14, 2)),
+    ('budgets', 'amount_limit', sa.Numeric(12, 2)),
+)
+
+
+# 口座への入出金の合計（app.balances の計上規則: 収入 +、支出・振替元 -、振替先 +）
+POSTINGS_THROUGH = """
+    COALESCE((SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount_total ELSE -t.amount_total END)
+              FROM transactions t WHERE t.account_id = {target}.account_id{through}), 0)
+    + COALESCE((SELECT SUM(t.amount_total) FROM transactions t
+                WHERE t.type = 'transfer' AND t.counter_account_id = {target}.account_id{through}), 0)
+"""
+
+
+def upgrade() -> None:
+    rounded_transactions = op.get_bind().execute(sa.text(
+        'SELECT COUNT(*) FROM transactions WHERE amount_total <> ROUND(amount_total)'
+    )).scalar()
+
+    for table, column, numeric_type in MONEY_COLUMNS:
+        # 1 円未満の端数は四捨五入してから整数型へ（端数のない行は書き換えない）
+        op.execute(f'UPDATE {table} SET {column} = ROUND({column}) WHERE {column} <> ROUND({column})')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=numeric_type, type_=sa.BigInteger(),
+                                  existing_nullable=False)
+
+    if rounded_transactions:
+        # 取引ごとの四捨五入と残高の四捨五入は一致しないので、残高とチェックポイントを丸めた取引から計算し直す
+        op.execute('UPDATE account_balances SET balance = '
+                   + POSTINGS_THROUGH.format(target='account_balances', through=''))
+        op.execute('UPDATE account_balance_checkpoints SET balance = ' + POSTINGS_THROUGH.format(
+            target='account_balance_checkpoints', through=' AND t.date <= account_balance_checkpoints.as_of_date'
+        ))
+
+
+def downgrade() -> None:
+    for table, column, numeric_type in reversed(MONEY_COLUMNS):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.BigInteger(), type_=numeric_type,
+                                  existing_nullable=False)
@@ -0,0 +1,23 @@
+"""取引タグ逆引きインデックス追加
+
+Revision ID: a41d5e9c3b27
+Revises: 7c2e8b4f1a90
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d5e9c3b27'
+down_revision = '7c2e8b4f1a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_transaction_tags_tag_transaction', 'transaction_tags', ['tag_id', 'transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_transaction_tags_tag_transaction', table_name='transaction_tags')
@@ -0,0 +1,30 @@
+"""世帯シャードディレクトリ追加
+
+Revision ID: c8e2f0a6d913
+Revises: a41d5e9c3b27
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2f0a6d913'
+down_revision = 'a41d5e9c3b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 既定シャード以外に配置された世帯の一覧（既定シャード上にのみ存在）
+    op.create_table('household_shards',
+    sa.Column('household_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('household_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('household_shards')
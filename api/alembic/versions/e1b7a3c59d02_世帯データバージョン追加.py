@@ -0,0 +1,26 @@
+"""世帯データバージョン追加
+
+Revision ID: e1b7a3c59d02
+Revises: c8e2f0a6d913
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b7a3c59d02'
+down_revision = 'c8e2f0a6d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 世帯のデータが変わるたびに加算（ダッシュボード等のキャッシュキー）
+    op.add_column('households', sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('households') as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,60 @@
+"""差分同期バージョンと削除記録追加
+
+Revision ID: f4c9d2a7b816
+Revises: e1b7a3c59d02
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c9d2a7b816'
+down_revision = 'e1b7a3c59d02'
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ('accounts', 'categories', 'transactions', 'budgets')
+
+
+def upgrade() -> None:
+    op.add_column('households', sa.Column('sync_epoch', sa.Integer(), server_default='0', nullable=False))
+
+    # 既存の行は 0（初回の全件同期で取得される）
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('sync_version', sa.Integer(), server_default='0', nullable=False))
+        op.create_index(f'idx_{table}_household_sync', table, ['household_id', 'sync_version'], unique=False)
+
+    # 変更された取引の明細を引く（SQLite は外部キーに索引を作らない）
+    op.create_index('idx_transaction_items_transaction', 'transaction_items', ['transaction_id', 'id'], unique=False)
+
+    op.create_table('sync_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('household_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=32), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('sync_version', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['household_id'], ['households.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+    op.create_index('idx_sync_tombstones_household_sync', 'sync_tombstones', ['household_id', 'sync_version'],
+                    unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sync_tombstones_household_sync', table_name='sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_id'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+
+    op.drop_index('idx_transaction_items_transaction', table_name='transaction_items')
+
+    for table in reversed(SYNCED_TABLES):
+        op.drop_index(f'idx_{table}_household_sync', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('sync_version')
+
+    with op.batch_alter_table('households') as batch_op:
+        batch_op.drop_column('sync_epoch')
@@ -0,0 +1,104 @@
+"""
+DB プール飽和時の受付制御（ロードシェディング）
+
+When MySQL slows down, requests queue in the threadpool waiting for a pooled
+connection and every route times out together behind the proxy. Instead, each
+request is classified and admitted against the pool's current pressure
+(``metrics.POOL_PRESSURE``):
+
+- ``critical`` (login/logout, creating a transaction) is always admitted.
+- ``low`` (reports, CSV/Parquet exports and imports) is rejected once the pool
+  is saturated, or when too many low-priority requests are already running.
+- ``normal`` (everything else) is rejected only when the pool is overloaded
+  (``ADMISSION_OVERLOAD_FACTOR`` times the saturation thresholds) or when its
+  in-flight limit is reached.
+
+Saturation is the larger of the recent average checkout wait over
+``ADMISSION_POOL_WAIT_MS`` and the checkouts waiting right now over
+``ADMISSION_POOL_WAITERS``. Rejected requests get 503 with ``Retry-After``
+before they touch the database, so the connections left go to critical work.
+"""
+
+from typing import Dict, Optional
+
+from app import metrics
+from app.settings import settings
+
+EXEMPT = "exempt"
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# 受付制御の対象外（ヘルスチェック・メトリクス、DB を待たない長時間接続の SSE）
+EXEMPT_PREFIXES = ("/healthz", "/readyz", "/metrics", "/api/events/")
+CRITICAL_PREFIXES = ("/api/auth/",)
+CRITICAL_ROUTES = frozenset({("POST", "/api/transactions"), ("POST", "/api/transactions/")})
+LOW_PREFIXES = ("/api/reports/", "/api/files/exports", "/api/files/imports")
+
+ADMISSION_IN_FLIGHT = metrics.REGISTRY.gauge(
+    "admission_in_flight", "Admitted requests currently in progress by route class.", ("route_class",)
+)
+ADMISSION_REJECTED = metrics.REGISTRY.counter(
+    "admission_rejected_total", "Requests rejected with 503 by admission control.", ("route_class", "reason")
+)
+
+
+def classify(method: str, path: str) -> str:
+    """Route class of a request: ``exempt``, ``critical``, ``normal`` or ``low``."""
+    if path.startswith(EXEMPT_PREFIXES):
+        return EXEMPT
+    if path.startswith(CRITICAL_PREFIXES) or (method, path) in CRITICAL_ROUTES:
+        return CRITICAL
+    if path.startswith(LOW_PREFIXES):
+        return LOW
+    return NORMAL
+
+
+def pool_saturation() -> float:
+    """Current pool pressure relative to the thresholds (1.0 = saturated)."""
+    wait_ms = metrics.POOL_PRESSURE.average_wait() * 1000
+    return max(wait_ms / settings.ADMISSION_POOL_WAIT_MS,
+               metrics.POOL_PRESSURE.waiting / settings.ADMISSION_POOL_WAITERS)
+
+
+class AdmissionController:
+    """
+    In-flight requests per route class and the decision to admit one more.
+    Used only from the event loop (the middleware), so counters need no lock.
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[str, int] = {CRITICAL: 0, NORMAL: 0, LOW: 0}
+        for route_class in self.in_flight:
+            ADMISSION_IN_FLIGHT.labels(route_class).set_function(
+                lambda route_class=route_class: self.in_flight[route_class]
+            )
+
+    def limits(self) -> Dict[str, tuple]:
+        # (このクラスを断る飽和度, 同時実行数の上限)
+        return {
+            LOW: (1.0, settings.ADMISSION_LOW_MAX_IN_FLIGHT),
+            NORMAL: (settings.ADMISSION_OVERLOAD_FACTOR, settings.ADMISSION_NORMAL_MAX_IN_FLIGHT),
+        }
+
+    def try_enter(self, route_class: str) -> Optional[str]:
+        """Admit a request (returns None) or give the reason for rejecting it."""
+        limit = self.limits().get(route_class)
+        if limit is not None:
+            saturation_limit, max_in_flight = limit
+            reason = None
+            if self.in_flight[route_class] >= max_in_flight:
+                reason = "in_flight"
+            elif pool_saturation() >= saturation_limit:
+                reason = "db_pool"
+            if reason:
+                ADMISSION_REJECTED.labels(route_class, reason).inc()
+                return reason
+        self.in_flight[route_class] += 1
+        return None
+
+    def leave(self, route_class: str) -> None:
+        self.in_flight[route_class] -= 1
+
+
+ADMISSION = AdmissionController()
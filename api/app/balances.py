@@ -0,0 +1,283 @@
+"""
+口座残高のマテリアライズと差分更新
+
+Every transaction write applies its postings to ``account_balances`` inside the
+same database transaction, so the current balance of an account is a single row
+lookup. Month-end ``account_balance_checkpoints`` make balance-as-of-date queries
+cost one checkpoint lookup plus the transactions after that checkpoint, instead
+of a scan over the whole history.
+
+Posting rules:
+- income:   account += amount
+- expense:  account -= amount
+- transfer: account -= amount, counter_account += amount
+
+Amounts and balances are integers in minor units (``app.money``).
+"""
+
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Account, AccountBalance, AccountBalanceCheckpoint, Transaction, TransactionType
+)
+
+Posting = Tuple[int, date, int]
+
+
+def month_end(day: date) -> date:
+    """Return the last day of the month containing ``day``."""
+    return day.replace(day=monthrange(day.year, day.month)[1])
+
+
+def transaction_postings(transaction: Transaction) -> List[Posting]:
+    """Return the (account_id, date, delta) postings of a transaction."""
+    amount = int(transaction.amount_total)
+    postings: List[Posting] = []
+
+    if transaction.type == TransactionType.income:
+        postings.append((transaction.account_id, transaction.date, amount))
+    elif transaction.type == TransactionType.expense:
+        postings.append((transaction.account_id, transaction.date, -amount))
+    elif transaction.type == TransactionType.transfer:
+        postings.append((transaction.account_id, transaction.date, -amount))
+        if transaction.counter_account_id:
+            postings.append((transaction.counter_account_id, transaction.date, amount))
+
+    return postings
+
+
+def apply_postings(db: Session, household_id: int, postings: List[Posting], sign: int = 1) -> None:
+    """
+    Apply postings to the materialized balances within the caller's transaction.
+
+    Checkpoints at or after the posting date are shifted as well, so back-dated
+    writes keep historical balances correct without a rebuild.
+    """
+    now = datetime.now()
+    for account_id, posting_date, delta in postings:
+        delta = delta * sign
+        if not delta:
+            continue
+
+        result = db.execute(
+            update(AccountBalance)
+            .where(AccountBalance.account_id == account_id)
+            .values(balance=AccountBalance.balance + delta, updated_at=now)
+        )
+        if result.rowcount == 0:
+            db.execute(
+                insert(AccountBalance).values(
+                    account_id=account_id,
+                    household_id=household_id,
+                    balance=delta,
+                    updated_at=now
+                )
+            )
+
+        db.execute(
+            update(AccountBalanceCheckpoint)
+            .where(
+                AccountBalanceCheckpoint.account_id == account_id,
+                AccountBalanceCheckpoint.as_of_date >= posting_date
+            )
+            .values(balance=AccountBalanceCheckpoint.balance + delta)
+        )
+
+
+def record_transaction(db: Session, transaction: Transaction) -> None:
+    """Add a newly written transaction to the balances."""
+    apply_postings(db, transaction.household_id, transaction_postings(transaction))
+
+
+def reverse_transaction(db: Session, transaction: Transaction) -> None:
+    """Remove a transaction (or its previous state) from the balances."""
+    apply_postings(db, transaction.household_id, transaction_postings(transaction), sign=-1)
+
+
+def _signed_amount():
+    """SQL expression of the delta a transaction applies to ``account_id``."""
+    return case(
+        (Transaction.type == TransactionType.income, Transaction.amount_total),
+        else_=-Transaction.amount_total
+    )
+
+
+def _sum_postings(db: Session, household_id: int, *criteria, group_by_month: bool = False,
+                  checkpoints=None) -> Dict:
+    """
+    Sum postings per account (and optionally per year/month) in two grouped queries:
+    one over ``account_id`` and one over the credit side of transfers.
+    """
+    sides = [
+        (Transaction.account_id, _signed_amount(), ()),
+        (Transaction.counter_account_id, Transaction.amount_total,
+         (Transaction.type == TransactionType.transfer, Transaction.counter_account_id.isnot(None))),
+    ]
+    totals: Dict = {}
+
+    for account_col, amount, side_criteria in sides:
+        keys = [account_col]
+        if group_by_month:
+            keys += [func.extract("year", Transaction.date), func.extract("month", Transaction.date)]
+
+        query = (
+            select(*keys, func.sum(amount))
+            .select_from(Transaction)
+            .where(Transaction.household_id == household_id, *side_criteria, *criteria)
+            .group_by(*keys)
+        )
+        if checkpoints is not None:
+            # 口座ごとに直近チェックポイント以降の取引だけを合計する
+            query = query.outerjoin(checkpoints, checkpoints.c.account_id == account_col).where(
+                or_(checkpoints.c.as_of_date.is_(None), Transaction.date > checkpoints.c.as_of_date)
+            )
+
+        for row in db.execute(query):
+            key = tuple(int(k) for k in row[:-1]) if group_by_month else row[0]
+            # MySQL の SUM は DECIMAL を返すので整数に戻す
+            totals[key] = totals.get(key, 0) + int(row[-1] or 0)
+
+    return totals
+
+
+def get_current_balances(db: Session, household_id: int) -> Dict[int, int]:
+    """Return the materialized balance of every account of a household."""
+    result = db.execute(
+        select(AccountBalance.account_id, AccountBalance.balance)
+        .where(AccountBalance.household_id == household_id)
+    )
+    return {account_id: balance for account_id, balance in result}
+
+
+def get_balances_as_of(db: Session, household_id: int, as_of: date) -> Dict[int, int]:
+    """
+    Return balances at the end of ``as_of``.
+
+    Uses the latest checkpoint on or before ``as_of`` per account and only sums
+    the transactions after it, so the cost is bounded by the checkpoint interval.
+    """
+    latest = (
+        select(
+            AccountBalanceCheckpoint.account_id,
+            func.max(AccountBalanceCheckpoint.as_of_date).label("as_of_date")
+        )
+        .where(
+            AccountBalanceCheckpoint.household_id == household_id,
+            AccountBalanceCheckpoint.as_of_date <= as_of
+        )
+        .group_by(AccountBalanceCheckpoint.account_id)
+        .subquery()
+    )
+
+    balances: Dict[int, int] = {}
+    checkpoint_rows = db.execute(
+        select(AccountBalanceCheckpoint.account_id, AccountBalanceCheckpoint.balance)
+        .join(latest, and_(
+            AccountBalanceCheckpoint.account_id == latest.c.account_id,
+            AccountBalanceCheckpoint.as_of_date == latest.c.as_of_date
+        ))
+    )
+    for account_id, balance in checkpoint_rows:
+        balances[account_id] = balance
+
+    tail = _sum_postings(db, household_id, Transaction.date <= as_of, checkpoints=latest)
+    for account_id, delta in tail.items():
+        balances[account_id] = balances.get(account_id, 0) + delta
+
+    return balances
+
+
+def create_checkpoints(db: Session, household_id: int, through: Optional[date] = None) -> int:
+    """
+    Write missing month-end checkpoints up to ``through`` (default: end of last month).
+
+    Each account continues from its latest checkpoint, so periodic runs only
+    aggregate the months added since the previous run. Returns the number of
+    checkpoints written; the caller commits.
+    """
+    if through is None:
+        through = date.today().replace(day=1) - timedelta(days=1)
+    if through != month_end(through):
+        # チェックポイントは締まった月末のみ
+        through = through.replace(day=1) - timedelta(days=1)
+
+    accounts = db.execute(
+        select(Account.id).where(Account.household_id == household_id)
+    ).scalars().all()
+
+    latest_rows = db.execute(
+        select(AccountBalanceCheckpoint.account_id, AccountBalanceCheckpoint.as_of_date,
+               AccountBalanceCheckpoint.balance)
+        .where(AccountBalanceCheckpoint.household_id == household_id)
+        .order_by(AccountBalanceCheckpoint.account_id, AccountBalanceCheckpoint.as_of_date)
+    ).all()
+    latest = {account_id: (as_of_date, balance)
+              for account_id, as_of_date, balance in latest_rows}
+
+    start = min((as_of_date for as_of_date, _ in latest.values()), default=None)
+    criteria = [Transaction.date <= through]
+    if start is not None and len(latest) == len(accounts):
+        criteria.append(Transaction.date > start)
+    monthly = _sum_postings(db, household_id, *criteria, group_by_month=True)
+
+    first_month = db.execute(
+        select(func.min(Transaction.date)).where(Transaction.household_id == household_id, *criteria)
+    ).scalar()
+
+    rows = []
+    for account_id in accounts:
+        last_date, balance = latest.get(account_id, (None, 0))
+        if last_date is not None:
+            cursor = last_date + timedelta(days=1)
+        else:
+            cursor = first_month or through
+        cursor = cursor.replace(day=1)
+
+        while month_end(cursor) <= through:
+            balance += monthly.get((account_id, cursor.year, cursor.month), 0)
+            rows.append({
+                "household_id": household_id,
+                "account_id": account_id,
+                "as_of_date": month_end(cursor),
+                "balance": balance
+            })
+            cursor = month_end(cursor) + timedelta(days=1)
+
+    if rows:
+        db.execute(insert(AccountBalanceCheckpoint), rows)
+    return len(rows)
+
+
+def rebuild_balances(db: Session, household_id: int) -> None:
+    """
+    Recompute balances and checkpoints from the full history.
+
+    Only needed after bulk loads that bypass the API; the caller commits.
+    """
+    totals = _sum_postings(db, household_id)
+    accounts = db.execute(
+        select(Account.id).where(Account.household_id == household_id)
+    ).scalars().all()
+
+    db.execute(AccountBalance.__table__.delete().where(AccountBalance.household_id == household_id))
+    db.execute(
+        AccountBalanceCheckpoint.__table__.delete()
+        .where(AccountBalanceCheckpoint.household_id == household_id)
+    )
+    now = datetime.now()
+    if accounts:
+        db.execute(insert(AccountBalance), [
+            {
+                "account_id": account_id,
+                "household_id": household_id,
+                "balance": totals.get(account_id, 0),
+                "updated_at": now
+            }
+            for account_id in accounts
+        ])
+    create_checkpoints(db, household_id)
@@ -0,0 +1,115 @@
+"""
+カテゴリ階層のクロージャテーブル
+
+``category_closure`` stores one row per (ancestor, descendant) pair including the
+self pair at depth 0, so "食費 and all of its children" is a single join:
+
+    JOIN category_closure cc ON cc.descendant_id = transactions.category_id
+    WHERE cc.ancestor_id = :category_id
+
+The category routes keep the table in sync on create, re-parent and delete.
+"""
+
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import CategoryClosure, Transaction
+
+
+def insert_node(db: Session, category_id: int, parent_id: Optional[int]) -> None:
+    """Add a new leaf category below ``parent_id`` (or as a root)."""
+    rows = [{"ancestor_id": category_id, "descendant_id": category_id, "depth": 0}]
+    if parent_id is not None:
+        rows += [
+            {"ancestor_id": ancestor_id, "descendant_id": category_id, "depth": depth + 1}
+            for ancestor_id, depth in db.execute(
+                select(CategoryClosure.ancestor_id, CategoryClosure.depth)
+                .where(CategoryClosure.descendant_id == parent_id)
+            )
+        ]
+    db.execute(insert(CategoryClosure), rows)
+
+
+def get_subtree(db: Session, category_id: int) -> Dict[int, int]:
+    """Return {descendant_id: depth} for a category, itself included."""
+    result = db.execute(
+        select(CategoryClosure.descendant_id, CategoryClosure.depth)
+        .where(CategoryClosure.ancestor_id == category_id)
+    )
+    return dict(result.all())
+
+
+def move_subtree(db: Session, category_id: int, new_parent_id: Optional[int]) -> None:
+    """
+    Re-parent a category together with all of its descendants.
+
+    Raises ValueError when ``new_parent_id`` is the category itself or one of
+    its descendants, which would create a cycle.
+    """
+    subtree = get_subtree(db, category_id)
+    if new_parent_id is not None and new_parent_id in subtree:
+        raise ValueError("Category cannot be moved below itself or its descendants")
+
+    # サブツリー外の祖先とのリンクを切る
+    old_ancestors = db.execute(
+        select(CategoryClosure.ancestor_id)
+        .where(CategoryClosure.descendant_id == category_id, CategoryClosure.depth > 0)
+    ).scalars().all()
+    if old_ancestors:
+        db.execute(
+            delete(CategoryClosure).where(
+                CategoryClosure.descendant_id.in_(list(subtree)),
+                CategoryClosure.ancestor_id.in_(old_ancestors)
+            )
+        )
+
+    if new_parent_id is None:
+        return
+
+    # 新しい祖先 × サブツリーの全ノードを張り直す
+    new_ancestors = db.execute(
+        select(CategoryClosure.ancestor_id, CategoryClosure.depth)
+        .where(CategoryClosure.descendant_id == new_parent_id)
+    ).all()
+    rows = [
+        {
+            "ancestor_id": ancestor_id,
+            "descendant_id": descendant_id,
+            "depth": ancestor_depth + descendant_depth + 1
+        }
+        for ancestor_id, ancestor_depth in new_ancestors
+        for descendant_id, descendant_depth in subtree.items()
+    ]
+    if rows:
+        db.execute(insert(CategoryClosure), rows)
+
+
+def get_children(db: Session, category_id: int) -> List[int]:
+    """Return the direct children of a category."""
+    return db.execute(
+        select(CategoryClosure.descendant_id)
+        .where(CategoryClosure.ancestor_id == category_id, CategoryClosure.depth == 1)
+    ).scalars().all()
+
+
+def rollup_totals(db: Session, ancestor_ids: List[int], *criteria,
+                  amount=Transaction.amount_total) -> Dict[int, int]:
+    """
+    Sum ``amount`` (minor units) over each category's whole subtree in a single grouped join.
+
+    ``criteria`` are extra filters on ``Transaction`` (household, type, date range).
+    """
+    if not ancestor_ids:
+        return {}
+
+    result = db.execute(
+        select(CategoryClosure.ancestor_id, func.sum(amount))
+        .select_from(Transaction)
+        .join(CategoryClosure, CategoryClosure.descendant_id == Transaction.category_id)
+        .where(CategoryClosure.ancestor_id.in_(ancestor_ids), *criteria)
+        .group_by(CategoryClosure.ancestor_id)
+    )
+    # MySQL の SUM は DECIMAL を返すので整数に戻す
+    return {ancestor_id: int(total or 0) for ancestor_id, total in result}
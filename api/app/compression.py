@@ -0,0 +1,231 @@
+"""
+レスポンス圧縮（Accept-Encoding のネゴシエーション）
+
+Pure ASGI middleware compressing JSON, CSV and other text responses with the
+best encoding both sides support: brotli and zstd when their packages
+(``brotli``, ``zstandard``) are installed, gzip always. The client's q-values
+decide first, ``COMPRESSION_ENCODINGS`` breaks ties.
+
+- Responses smaller than ``COMPRESSION_MIN_SIZE`` are sent as is;
+  compressing a few hundred bytes costs more CPU than it saves on the wire.
+  Up to the threshold plus one chunk is buffered before deciding, so a
+  response that completes by then is sent whole with its ``Content-Length``.
+- Longer streaming responses are compressed chunk by chunk and each chunk is
+  flushed, so the client keeps receiving rows as they are produced.
+- Responses that already carry a ``Content-Encoding``, binary types (receipt
+  images, PDFs), server-sent events and 204/304 are passed through.
+
+Levels are tuned for dynamic content (brotli 4, zstd 3, gzip 6): most of the
+size reduction for a fraction of the CPU of the maximum levels. See
+``benchmarks.compression``.
+"""
+
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.lazy import OptionalDependencyError, optional_import
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "text/", "application/javascript", "application/xml", "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self, level: int):
+        brotli = optional_import("brotli", "brotli compression")
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self._zstd = optional_import("zstandard", "zstd compression")
+        self._compressor = self._zstd.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS = {"br": BrotliEncoder, "zstd": ZstdEncoder, "gzip": GzipEncoder}
+
+
+def available_encodings(preference: List[str]) -> List[str]:
+    """The encodings of ``preference`` whose packages are installed, in order."""
+    available = []
+    for name in preference:
+        if name not in ENCODERS:
+            continue
+        try:
+            ENCODERS[name](1)
+        except OptionalDependencyError:
+            continue
+        available.append(name)
+    return available
+
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """
+    Pick the encoding for an ``Accept-Encoding`` header.
+
+    The highest client q-value wins; ties go to the earlier entry of
+    ``available``. ``*`` covers encodings not listed; ``q=0`` excludes.
+    """
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    # イベントストリームは小さなイベントを即時に届けたいので対象外
+    return (
+        "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_TYPES)
+        and not content_type.startswith("text/event-stream")
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, encodings: Optional[List[str]] = None,
+                 levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings or list(ENCODERS))
+        self.levels = {"br": 4, "zstd": 3, "gzip": 6, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, ENCODERS[encoding], self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoder_class, level: int, minimum_size: int):
+        self._send = send
+        self._encoder_class = encoder_class
+        self._level = level
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._buffer = bytearray()
+        self._holding = False
+        self._encoder = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 本文を見るまで開始メッセージを保留（圧縮するかで headers が変わる）
+            message["headers"] = list(message.get("headers", []))
+            self._start = message
+            headers = Headers(raw=message["headers"])
+            self._passthrough = message["status"] in (204, 304) or not is_compressible(headers)
+            if not self._passthrough:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            if self._start is not None:
+                await self._send(self._start)
+                self._start = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            # しきい値に達するまで、達したらさらに1チャンク分だけ溜める。
+            # その間に終われば完結したレスポンスとして Content-Length 付きで返せる
+            # （@app.middleware を通ると完結したレスポンスも本文と空の終端に分かれて届く）
+            self._buffer += body
+            if more_body and (len(self._buffer) < self._minimum_size or not self._holding):
+                self._holding = len(self._buffer) >= self._minimum_size
+                return
+            body = bytes(self._buffer)
+            self._buffer = bytearray()
+
+            headers = MutableHeaders(raw=self._start["headers"])
+            if not more_body and len(body) < self._minimum_size:
+                # 小さい完結したレスポンスはそのまま
+                self._passthrough = True
+            else:
+                self._encoder = self._encoder_class(self._level)
+                headers["Content-Encoding"] = self._encoder.name
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = self._encoder.compress(body) + self._encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+            await self._send(self._start)
+            self._start = None
+            if self._passthrough or not more_body:
+                await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+        # ストリーミング: チャンクごとに圧縮してフラッシュし、最後に終端を送る
+        if more_body:
+            data = self._encoder.compress(body) + self._encoder.flush() if body else b""
+            if data:
+                await self._send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            data = self._encoder.compress(body) + self._encoder.finish()
+            await self._send({"type": "http.response.body", "body": data, "more_body": False})
@@ -0,0 +1,243 @@
+"""
+取引 CSV の取り込みと書き出し（バックグラウンドジョブ）
+
+Format (one row per transaction, items as ``name:amount`` pairs)::
+
+    date,type,amount_total,account,counter_account,category,payer,split_ratio,memo,items
+    2024-01-01,expense,1000,現金,,食費,妻,0.50,"スーパー","りんご:300,パン:200"
+    2024-01-02,transfer,30000,銀行,現金,,夫,0.50,"引き出し",
+
+Accounts, categories and payers are referenced by name within the household;
+an empty account or payer means the household's first active one, like the
+create endpoint. ``counter_account`` is the destination of a transfer: required
+for ``transfer`` rows and rejected on the others. Import validates every row first and writes nothing if any
+row is invalid (or when ``dry_run``); otherwise all rows are created in one
+database transaction with their balance postings.
+"""
+
+import csv
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app import balances
+from app.money import format_amount, to_minor
+from app.jobs import JobContext, job_type
+from app.models import Account, Category, Transaction, TransactionItem, TransactionType, User
+from app.settings import settings
+
+COLUMNS = [
+    "date", "type", "amount_total", "account", "counter_account", "category", "payer", "split_ratio", "memo", "items"
+]
+EXPORT_BATCH = 1000
+MAX_REPORTED_ERRORS = 100
+
+
+def export_path(household_id: int, job_id: int) -> Path:
+    return Path(settings.EXPORT_DIR) / f"household={household_id}" / f"transactions_{job_id}.csv"
+
+
+def _date_filters(household_id: int, from_date: Optional[str], to_date: Optional[str]) -> list:
+    filters = [Transaction.household_id == household_id]
+    if from_date:
+        filters.append(Transaction.date >= datetime.strptime(from_date, "%Y-%m-%d").date())
+    if to_date:
+        filters.append(Transaction.date <= datetime.strptime(to_date, "%Y-%m-%d").date())
+    return filters
+
+
+@job_type("csv_export", concurrency=2)
+def export_transactions(context: JobContext, from_date: Optional[str] = None, to_date: Optional[str] = None) -> dict:
+    """Write the household's transactions in date order to ``EXPORT_DIR``."""
+    path = export_path(context.household_id, context.job_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".csv.tmp")
+    payer = aliased(User)
+    counter_account = aliased(Account)
+    filters = _date_filters(context.household_id, from_date, to_date)
+
+    with context.session() as db:
+        total = db.execute(select(func.count()).select_from(Transaction).where(*filters)).scalar()
+        context.progress(0, total, "exporting", force=True)
+        statement = (
+            select(Transaction.id, Transaction.date, Transaction.type, Transaction.amount_total, Account.name,
+                   counter_account.name, Category.name, payer.name, Transaction.split_ratio_payer, Transaction.memo)
+            .outerjoin(Account, Account.id == Transaction.account_id)
+            .outerjoin(counter_account, counter_account.id == Transaction.counter_account_id)
+            .outerjoin(Category, Category.id == Transaction.category_id)
+            .outerjoin(payer, payer.id == Transaction.payer_user_id)
+            .order_by(Transaction.date, Transaction.id)
+            .limit(EXPORT_BATCH)
+        )
+
+        written = 0
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            after: Optional[Tuple] = None
+            while True:
+                # (日付, ID) のキーセットでページング（カーソルを開いたまま明細を引かない）
+                page = statement.where(*filters)
+                if after is not None:
+                    page = page.where(or_(Transaction.date > after[0],
+                                          and_(Transaction.date == after[0], Transaction.id > after[1])))
+                rows = db.execute(page).all()
+                if not rows:
+                    break
+                items: Dict[int, List[str]] = {}
+                for transaction_id, name, amount in db.execute(
+                    select(TransactionItem.transaction_id, TransactionItem.name, TransactionItem.amount)
+                    .where(TransactionItem.transaction_id.in_([row[0] for row in rows]))
+                    .order_by(TransactionItem.transaction_id, TransactionItem.id)
+                ):
+                    items.setdefault(transaction_id, []).append(f"{name}:{format_amount(amount)}")
+                for (transaction_id, date_, type_, amount, account, counter_account_name, category, payer_name,
+                     split_ratio, memo) in rows:
+                    writer.writerow([
+                        date_.isoformat(), TransactionType(type_).value, format_amount(amount), account or "",
+                        counter_account_name or "", category or "", payer_name or "", f"{split_ratio:.2f}", memo or "",
+                        ",".join(items.get(transaction_id, [])),
+                    ])
+                written += len(rows)
+                after = (rows[-1][1], rows[-1][0])
+                context.progress(written, total)
+        os.replace(tmp, path)
+
+    context.progress(written, total, "done", force=True)
+    return {"file": path.name, "rows": written, "bytes": path.stat().st_size}
+
+
+class _Lookups:
+    def __init__(self, db: Session, household_id: int):
+        def by_name(model, *criteria) -> Dict[str, int]:
+            names: Dict[str, int] = {}
+            for id_, name in db.execute(
+                select(model.id, model.name).where(model.household_id == household_id, *criteria)
+                .order_by(model.id)
+            ):
+                names.setdefault(name, id_)
+            return names
+
+        self.accounts = by_name(Account, Account.is_active.is_(True))
+        self.categories = by_name(Category, Category.is_active.is_(True))
+        self.users = by_name(User, User.is_active.is_(True))
+        self.default_account = next(iter(self.accounts.values()), None)
+        self.default_user = next(iter(self.users.values()), None)
+
+
+def _decimal(value: str, label: str) -> Decimal:
+    try:
+        return Decimal(value.replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"{label} is not a number: {value!r}")
+
+
+def _amount(value: str, label: str) -> int:
+    try:
+        return to_minor(value)
+    except ValueError as e:
+        raise ValueError(f"{label}: {e}")
+
+
+def _parse_row(row: Dict[str, str], lookups: _Lookups) -> dict:
+    value = {key: (row.get(key) or "").strip() for key in COLUMNS}
+    try:
+        date_ = datetime.strptime(value["date"], "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid date {value['date']!r} (use YYYY-MM-DD)")
+    try:
+        type_ = TransactionType(value["type"])
+    except ValueError:
+        raise ValueError(f"Invalid type {value['type']!r} (expense, income or transfer)")
+    amount = _amount(value["amount_total"], "amount_total")
+    if amount <= 0:
+        raise ValueError("amount_total must be greater than 0")
+
+    account_id = lookups.accounts.get(value["account"]) if value["account"] else lookups.default_account
+    if account_id is None:
+        raise ValueError(f"Unknown account {value['account']!r}")
+    # 振替先は振替の行だけに指定する（名前は世帯内の有効な口座からだけ引く）
+    counter_account_id = None
+    if type_ == TransactionType.transfer:
+        if not value["counter_account"]:
+            raise ValueError("counter_account is required for transfers")
+        counter_account_id = lookups.accounts.get(value["counter_account"])
+        if counter_account_id is None:
+            raise ValueError(f"Unknown counter_account {value['counter_account']!r}")
+    elif value["counter_account"]:
+        raise ValueError(f"counter_account is only allowed for transfers, not {type_.value}")
+    category_id = None
+    if value["category"]:
+        category_id = lookups.categories.get(value["category"])
+        if category_id is None:
+            raise ValueError(f"Unknown category {value['category']!r}")
+    payer_id = lookups.users.get(value["payer"]) if value["payer"] else lookups.default_user
+    if payer_id is None:
+        raise ValueError(f"Unknown payer {value['payer']!r}")
+    split_ratio = _decimal(value["split_ratio"], "split_ratio") if value["split_ratio"] else Decimal("0.50")
+    if not Decimal(0) <= split_ratio <= Decimal(1):
+        raise ValueError("split_ratio must be between 0 and 1")
+
+    items = []
+    for entry in filter(None, (part.strip() for part in value["items"].split(","))):
+        name, separator, item_amount = entry.rpartition(":")
+        if not separator or not name:
+            raise ValueError(f"Invalid item {entry!r} (use name:amount)")
+        items.append((name, _amount(item_amount, f"amount of item {name!r}")))
+
+    return {
+        "date": date_, "type": type_, "amount_total": amount, "account_id": account_id,
+        "counter_account_id": counter_account_id, "category_id": category_id, "payer_user_id": payer_id, "split_ratio_payer": split_ratio,
+        "memo": value["memo"], "items": items,
+    }
+
+
+@job_type("csv_import")
+def import_transactions(context: JobContext, path: str, dry_run: bool = True) -> dict:
+    """Validate (and unless ``dry_run``, import) an uploaded CSV; the upload is deleted afterwards."""
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+        missing = [column for column in ("date", "type", "amount_total") if rows and column not in rows[0]]
+        if missing:
+            return {"rows": len(rows), "imported": 0, "dry_run": dry_run, "error_count": 1,
+                    "errors": [{"row": 1, "error": f"Missing columns: {', '.join(missing)}"}]}
+
+        with context.session() as db:
+            lookups = _Lookups(db, context.household_id)
+            parsed, errors = [], []
+            for line, row in enumerate(rows, start=2):  # 1行目はヘッダー
+                try:
+                    parsed.append(_parse_row(row, lookups))
+                except ValueError as e:
+                    errors.append({"row": line, "error": str(e)})
+            context.progress(0, len(rows), "validated", force=True)
+
+            summary = {"rows": len(rows), "valid": len(parsed), "dry_run": dry_run,
+                       "error_count": len(errors), "errors": errors[:MAX_REPORTED_ERRORS]}
+            if dry_run or errors:
+                return {**summary, "imported": 0}
+
+            now = datetime.now()
+            for index, data in enumerate(parsed, start=1):
+                items = data.pop("items")
+                transaction = Transaction(household_id=context.household_id, has_receipt=False,
+                                          created_by=data["payer_user_id"], created_at=now, updated_at=now, **data)
+                db.add(transaction)
+                db.flush()
+                balances.record_transaction(db, transaction)
+                for name, amount in items:
+                    db.add(TransactionItem(transaction_id=transaction.id, name=name, amount=amount,
+                                           quantity=1, unit_price=amount))
+                context.progress(index, len(parsed), "importing")
+            db.commit()
+
+        context.progress(len(parsed), len(parsed), "done", force=True)
+        return {**summary, "imported": len(parsed)}
+    finally:
+        Path(path).unlink(missing_ok=True)
@@ -0,0 +1,98 @@
+"""
+世帯データバージョン
+
+``households.data_version`` is incremented in the same transaction as every
+write a request session makes to a household's data, so any worker can tell
+whether cached derived data (dashboard payloads, ETags) is still current with
+one primary-key lookup.
+
+Changed households are collected from flushed objects (their
+``household_id``, or the request's household for child rows such as
+transaction items) and from ORM DML statements, and bumped just before the
+commit. ``allocate`` bumps a household earlier, at its first change, when the
+new version is needed to stamp rows (the sync feed); the bump locks the
+household row until the commit, so versions are taken in commit order.
+Scripts that write through their own ``Session(engine)`` do not bump; call
+``bump`` from them if the API is running against the same database.
+"""
+
+import itertools
+from typing import Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.database import RoutingSession, current_household
+from app.models import Household
+
+_CHANGED = "changed_households"
+_ALLOCATED = "allocated_data_versions"
+_SKIP = "skip_data_version"
+
+
+def current_version(db: Session, household_id: int) -> Optional[int]:
+    """Return the data version of a household (None if it does not exist)."""
+    return db.execute(select(Household.data_version).where(Household.id == household_id)).scalar()
+
+
+def bump(db: Session, *household_ids: int) -> None:
+    """Increment the data version of the given households in the session's transaction."""
+    for household_id in sorted(set(household_ids)):
+        db.execute(
+            update(Household)
+            .where(Household.id == household_id)
+            .values(data_version=Household.data_version + 1),
+            execution_options={_SKIP: True},
+        )
+
+
+def allocate(db: Session, household_id: int) -> int:
+    """
+    Bump the household's data version once per transaction and return the new
+    version; later calls in the same transaction return the same number.
+    """
+    allocated = db.info.setdefault(_ALLOCATED, {})
+    if household_id not in allocated:
+        with db.no_autoflush:
+            bump(db, household_id)
+            allocated[household_id] = current_version(db, household_id)
+    return allocated[household_id]
+
+
+def _mark(session: Session, household_id: Optional[int]) -> None:
+    if household_id is not None:
+        session.info.setdefault(_CHANGED, set()).add(household_id)
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _collect_flushed(session, flush_context, instances):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        _mark(session, getattr(obj, "household_id", None) or current_household.get())
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _collect_executed(execute_state: ORMExecuteState):
+    if execute_state.execution_options.get(_SKIP):
+        return
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        _mark(execute_state.session, current_household.get())
+
+
+@event.listens_for(RoutingSession, "before_commit")
+def _bump_before_commit(session):
+    # before_commit は最後の flush より前に呼ばれるため、先に flush して変更を集め切る
+    session.flush()
+    changed = session.info.pop(_CHANGED, set()) - set(session.info.get(_ALLOCATED, ()))
+    if changed:
+        bump(session, *changed)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _forget_on_commit(session):
+    session.info.pop(_ALLOCATED, None)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_on_rollback(session):
+    session.info.pop(_CHANGED, None)
+    session.info.pop(_ALLOCATED, None)
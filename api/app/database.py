@@ -1,27 +1,64 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import os
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Optional
+import itertools
 
-# 環境変数からデータベースURLを取得
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "mysql+aiomysql://app:app_password_change_me@db:3306/family_budget"
-)
+from app.engines import DATABASE_URL, create_db_engine, is_memory_sqlite, sync_url  # noqa: F401 （スクリプト用に再公開）
+from app.metrics import instrument_pool
+from app.settings import settings
+from app.sharding import DEFAULT_SHARD, load_shard_map
+from app import slow_queries
+
+# SQLAlchemyエンジンを作成
+engine = create_db_engine(DATABASE_URL)
+instrument_pool(engine.pool)
+slow_queries.install()
 
 # 同期版のデータベースURL（APIで使用）
-SYNC_DATABASE_URL = DATABASE_URL.replace("aiomysql", "pymysql")
+SYNC_DATABASE_URL = engine.url.render_as_string(hide_password=False)
+
+# 読み取り専用レプリカ（任意）
+replica_engines = [create_db_engine(url) for url in settings.replica_urls_list]
+_next_replica = itertools.cycle(replica_engines)
+
+# 世帯ごとのシャード（"default" は DATABASE_URL）
+shard_engines = {DEFAULT_SHARD: engine}
+shard_engines.update({name: create_db_engine(url) for name, url in settings.shard_urls.items()})
+SHARD_MAP = load_shard_map(shard_engines, settings.SHARD_MAP_CLASS, settings.SHARD_DIRECTORY_TTL_SECONDS)
+
+# True の間、読み取りクエリをレプリカへ送る（ミドルウェアが安全なリクエストで設定）
+read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+
+# リクエストが操作する世帯（app.tenancy.current_household_id が設定）
+current_household: ContextVar[Optional[int]] = ContextVar("current_household", default=None)
+
+
+class RoutingSession(Session):
+    """
+    Session that routes statements to the shard of the current household and
+    sends reads to a replica while ``read_from_replica`` is set.
+
+    Flushes and DML statements always go to the primary, so a handler that
+    writes during a GET still writes to the right place. Replicas replicate
+    the default shard only and are handed out round-robin, one per session.
+    """
+
+    _replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        household_id = current_household.get()
+        primary = engine if household_id is None else SHARD_MAP.engine_for(household_id)
+        if (replica_engines and primary is engine and read_from_replica.get() and not self._flushing
+                and not getattr(clause, "is_dml", False)):
+            if self._replica is None:
+                self._replica = next(_next_replica)
+            return self._replica
+        return primary
 
-# SQLAlchemyエンジンを作成
-engine = create_engine(
-    SYNC_DATABASE_URL,
-    echo=True if os.getenv("DEBUG") else False,
-    pool_pre_ping=True,
-    pool_recycle=300
-)
 
 # セッションファクトリーを作成
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
 
 # Base クラス
 Base = declarative_base()
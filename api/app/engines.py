@@ -0,0 +1,82 @@
+"""
+データベースエンジンの生成
+
+URL handling and ``create_db_engine`` without any module-level engine, so the
+production launcher (``app.server``) can probe the database and size the pool
+before ``app.database`` builds the application's engines from ``settings``.
+"""
+
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+from app.metrics import InstrumentedQueuePool
+from app.settings import settings
+
+# 環境変数からデータベースURLを取得
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    "mysql+aiomysql://app:app_password_change_me@db:3306/family_budget"
+)
+
+
+def sync_url(url: str) -> str:
+    """Map async driver URLs to the sync drivers the API uses."""
+    return url.replace("+aiomysql", "+pymysql").replace("+aiosqlite", "+pysqlite")
+
+
+def is_memory_sqlite(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def _sqlite_pragmas(journal_mode: str):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")  # MySQL(InnoDB)と同じく外部キーを検証
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+    return on_connect
+
+
+def create_db_engine(url: str, **kwargs) -> Engine:
+    """
+    Create an engine configured for the dialect of ``url``.
+
+    MySQL gets the instrumented queue pool with pre-ping and recycling. File
+    SQLite runs in WAL mode with a busy timeout so readers and the single
+    writer do not block each other. In-memory SQLite lives in one connection,
+    handed out to one session at a time, and gets its schema created here since
+    nothing else can migrate it. Keyword arguments override the defaults.
+    """
+    url = sync_url(url)
+    options = {"echo": settings.SQL_ECHO, "poolclass": InstrumentedQueuePool,
+               "pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+    if make_url(url).get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(pool_pre_ping=True, pool_recycle=300)
+
+    options.update(kwargs)
+    if is_memory_sqlite(url):
+        # 接続を閉じるとDBが消えるため1本だけ保持し、セッション間で順番に使う
+        options.update(poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_recycle=-1)
+    if not issubclass(options["poolclass"], QueuePool):
+        options.pop("pool_size", None)
+        options.pop("max_overflow", None)
+    engine = create_engine(url, **options)
+
+    if engine.dialect.name == "sqlite":
+        journal_mode = "MEMORY" if is_memory_sqlite(url) else "WAL"
+        event.listen(engine, "connect", _sqlite_pragmas(journal_mode))
+        if is_memory_sqlite(url):
+            from app.models import Base as ModelBase
+            ModelBase.metadata.create_all(engine)
+    return engine
@@ -0,0 +1,147 @@
+"""
+世帯の変更イベント（プロセス内 pub/sub）
+
+Request sessions collect compact change events while they flush
+(``transaction.created`` / ``updated`` / ``deleted``, ``budget.changed``) and
+publish them to ``BROKER`` after the commit, tagged with the household data
+version the commit produced. Subscribers are the server-sent event streams of
+``/api/events/stream``; each has a bounded asyncio queue filled from whichever
+thread committed.
+
+The broker only sees writes made by this process. Streams fill the gaps
+(writes on other workers, a full queue, reconnects with ``Last-Event-ID``)
+from the sync tables, see ``app.routers.events``.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import data_version
+from app.database import RoutingSession, current_household
+from app.models import Budget, Transaction, TransactionItem
+from app.settings import settings
+
+_PENDING = "pending_change_events"
+
+# (版, 変更の一覧)
+Message = Tuple[int, List[dict]]
+
+
+@dataclass(eq=False)
+class Subscription:
+    household_id: int
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    overflowed: bool = field(default=False)
+
+    def offer(self, message: Message) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 取りこぼしたイベントはストリーム側が DB から補完する
+            self.overflowed = True
+
+
+class EventBroker:
+    """Fan-out of committed change events to the subscribers of a household."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, household_id: int) -> Subscription:
+        """Register a subscriber; call from the event loop that will consume it."""
+        subscription = Subscription(
+            household_id, asyncio.Queue(maxsize=self.queue_size), asyncio.get_running_loop()
+        )
+        with self._lock:
+            self._subscribers.setdefault(household_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.household_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.household_id]
+
+    def subscriber_count(self, household_id: Optional[int] = None) -> int:
+        with self._lock:
+            if household_id is not None:
+                return len(self._subscribers.get(household_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, household_id: int, version: int, changes: List[dict]) -> None:
+        """Deliver one commit's changes; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(household_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, (version, changes))
+            except RuntimeError:
+                # ループが既に閉じている（シャットダウン中）
+                self.unsubscribe(subscription)
+
+
+BROKER = EventBroker(settings.SSE_QUEUE_SIZE)
+
+
+def _record(session: Session, household_id: Optional[int], key: tuple, change: dict) -> None:
+    if household_id is None:
+        return
+    pending = session.info.setdefault(_PENDING, {})
+    if household_id not in pending:
+        pending[household_id] = (data_version.allocate(session, household_id), {})
+    changes = pending[household_id][1]
+    previous = changes.get(key)
+    if previous is not None and previous["type"] in ("transaction.created", "transaction.deleted"):
+        # 同じトランザクション内の作成→更新は作成のまま、作成→削除は無かったことにする
+        if previous["type"] == "transaction.created" and change["type"] == "transaction.deleted":
+            del changes[key]
+        return
+    changes[key] = change
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _collect_changes(session: Session, flush_context):
+    # after_flush の時点では new / dirty / deleted は flush 前の内容のまま（ID は採番済み）
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            _record(session, obj.household_id, ("transaction", obj.id),
+                    {"type": "transaction.created", "id": obj.id})
+    for obj in session.dirty:
+        if isinstance(obj, Transaction) and session.is_modified(obj, include_collections=False):
+            _record(session, obj.household_id, ("transaction", obj.id),
+                    {"type": "transaction.updated", "id": obj.id})
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            _record(session, obj.household_id, ("transaction", obj.id),
+                    {"type": "transaction.deleted", "id": obj.id})
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TransactionItem) and obj.transaction_id is not None and (
+                obj not in session.dirty or session.is_modified(obj)):
+            _record(session, current_household.get(), ("transaction", obj.transaction_id),
+                    {"type": "transaction.updated", "id": obj.transaction_id})
+        elif isinstance(obj, Budget):
+            _record(session, obj.household_id, ("budget", obj.id),
+                    {"type": "budget.changed", "id": obj.id, "month": obj.month, "category_id": obj.category_id})
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _publish_after_commit(session: Session):
+    for household_id, (version, changes) in session.info.pop(_PENDING, {}).items():
+        if changes:
+            BROKER.publish(household_id, version, list(changes.values()))
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,298 @@
+"""
+バックグラウンドジョブ
+
+Work that takes longer than a request should (CSV import/export, snapshots,
+receipt processing) runs as a job: the endpoint stores a ``jobs`` row, answers
+202 with its id, and ``GET /api/jobs/{id}`` reports status, progress and
+result.
+
+- Job types are registered with ``@job_type(name, executor=..., concurrency=...)``.
+  ``thread`` jobs (database and file I/O) run in a thread pool of
+  ``JOBS_THREAD_WORKERS``; ``process`` jobs (CPU-bound work) in a spawned
+  process pool of ``JOBS_PROCESS_WORKERS``, which imports the handler's module
+  by name.
+- ``JOB_RUNNER`` keeps one bounded asyncio queue per type on the server's event
+  loop, drained by as many worker coroutines as the type's concurrency limit
+  (``JOB_CONCURRENCY`` overrides the registered one), so a flood of one type
+  cannot take every pool worker.
+- Handlers get a ``JobContext``: ``session()`` opens a session for the job's
+  household like a request's, ``progress()`` records progress (at most every
+  ``JOBS_PROGRESS_INTERVAL_SECONDS``). The return value (a JSON-able dict) is
+  stored as the result.
+- Job rows are written through a plain session on the household's shard, so
+  the bookkeeping does not bump the household data version.
+
+Jobs belong to the process that accepted them. On shutdown the runner waits up
+to ``SHUTDOWN_GRACE_SECONDS`` for them and marks whatever is left as failed.
+"""
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.database import SHARD_MAP, SessionLocal, current_household, read_from_replica
+from app.models import Job, JobStatus
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+JOBS_QUEUED = metrics.REGISTRY.gauge("jobs_queued", "Jobs waiting to run, by type.", ("type",))
+JOBS_RUNNING = metrics.REGISTRY.gauge("jobs_running", "Jobs currently running, by type.", ("type",))
+JOBS_FINISHED = metrics.REGISTRY.counter(
+    "jobs_finished_total", "Jobs finished, by type and status.", ("type", "status")
+)
+JOB_DURATION = metrics.REGISTRY.histogram(
+    "job_duration_seconds", "Job run time, by type.", ("type",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+
+
+class JobQueueFull(Exception):
+    """Raised when a job type's queue is full or the runner is shutting down."""
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    module: str
+    function: str
+    executor: str
+    concurrency: int
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+
+def job_type(name: str, executor: str = "thread", concurrency: int = 1) -> Callable:
+    """Register ``fn(context, **params) -> dict`` as the handler of a job type."""
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor '{executor}'")
+
+    def register(fn: Callable) -> Callable:
+        limit = settings.job_concurrency.get(name, concurrency)
+        JOB_TYPES[name] = JobType(name, fn.__module__, fn.__name__, executor, max(1, limit))
+        return fn
+    return register
+
+
+@contextmanager
+def _job_session(household_id: int) -> Iterator[Session]:
+    # RoutingSession ではなく素の Session: ジョブ行の更新で世帯のデータバージョンを上げない
+    db = Session(bind=SHARD_MAP.engine_for(household_id))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create(household_id: int, type_name: str, params: dict) -> int:
+    with _job_session(household_id) as db:
+        job = Job(household_id=household_id, type=type_name, status=JobStatus.queued, params=params,
+                  progress=0, created_at=datetime.now(), updated_at=datetime.now())
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _update(job_id: int, household_id: int, **values) -> None:
+    with _job_session(household_id) as db:
+        db.execute(update(Job).where(Job.id == job_id).values(updated_at=datetime.now(), **values))
+        db.commit()
+
+
+def serialize(job: Job) -> dict:
+    total = job.progress_total
+    return {
+        "id": job.id,
+        "type": job.type,
+        "status": JobStatus(job.status).value,
+        "progress": {
+            "current": job.progress,
+            "total": total,
+            "percent": round(job.progress / total * 100, 1) if total else None,
+            "message": job.message,
+        },
+        "params": job.params,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+class JobContext:
+    """What a handler gets: the job's ids, a household session and progress reporting."""
+
+    def __init__(self, job_id: int, household_id: int):
+        self.job_id = job_id
+        self.household_id = household_id
+        self._last_progress = 0.0
+
+    @contextmanager
+    def session(self) -> Iterator[Session]:
+        """A session scoped to the job's household (writes bump its data version like a request's)."""
+        current_household.set(self.household_id)
+        read_from_replica.set(False)
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def progress(self, current: int, total: Optional[int] = None, message: Optional[str] = None,
+                 force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_progress < settings.JOBS_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_progress = now
+        values = {"progress": current}
+        if total is not None:
+            values["progress_total"] = total
+        if message is not None:
+            values["message"] = message[:255]
+        _update(self.job_id, self.household_id, **values)
+
+
+def _execute(module: str, function: str, job_id: int, household_id: int, params: dict) -> dict:
+    """Run one job inside a pool worker (a thread, or a spawned process)."""
+    current_household.set(household_id)
+    read_from_replica.set(False)
+    handler = getattr(importlib.import_module(module), function)
+    return handler(JobContext(job_id, household_id), **params) or {}
+
+
+class JobRunner:
+    """Per-type asyncio queues feeding the thread and process pools."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[int, Tuple[int, str]] = {}  # job id -> (世帯, 種類)
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._accepting = True
+
+    def _executor(self, kind: str) -> Executor:
+        if kind == "process":
+            if self._processes is None:
+                # fork だと親のスレッドや DB 接続を引き継いでしまうので spawn
+                self._processes = ProcessPoolExecutor(
+                    max_workers=settings.JOBS_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._processes
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=settings.JOBS_THREAD_WORKERS, thread_name_prefix="job")
+        return self._threads
+
+    def _queue_for(self, job_type: JobType) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # 初回（またはテストなどでイベントループが替わった）: ワーカーを作り直す
+            self._loop, self._queues, self._workers, self._accepting = loop, {}, [], True
+        queue = self._queues.get(job_type.name)
+        if queue is None:
+            queue = self._queues[job_type.name] = asyncio.Queue(maxsize=settings.JOBS_MAX_QUEUED)
+            self._workers += [asyncio.create_task(self._work(job_type, queue)) for _ in range(job_type.concurrency)]
+        return queue
+
+    def queued(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    async def submit(self, household_id: int, type_name: str, params: Optional[dict] = None) -> int:
+        """Store a queued job row and enqueue it; returns the job id. Call from the event loop."""
+        job_type_ = JOB_TYPES[type_name]
+        queue = self._queue_for(job_type_)
+        if not self._accepting or queue.full():
+            raise JobQueueFull(f"Too many queued '{type_name}' jobs")
+        params = params or {}
+        job_id = await run_in_threadpool(_create, household_id, type_name, params)
+        queue.put_nowait((job_id, household_id, params))
+        JOBS_QUEUED.labels(type_name).inc()
+        return job_id
+
+    async def _work(self, job_type: JobType, queue: asyncio.Queue) -> None:
+        while True:
+            job_id, household_id, params = await queue.get()
+            JOBS_QUEUED.labels(job_type.name).dec()
+            try:
+                await self._run(job_type, job_id, household_id, params)
+            except Exception as e:  # ジョブ行の更新に失敗しても次のジョブは続ける
+                logger.error("Job %s (%s) bookkeeping failed: %s", job_id, job_type.name, str(e))
+            finally:
+                queue.task_done()
+
+    async def _run(self, job_type: JobType, job_id: int, household_id: int, params: dict) -> None:
+        self._running[job_id] = (household_id, job_type.name)
+        running = JOBS_RUNNING.labels(job_type.name)
+        running.inc()
+        start = time.perf_counter()
+        try:
+            await run_in_threadpool(_update, job_id, household_id, status=JobStatus.running,
+                                    started_at=datetime.now())
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor(job_type.executor), _execute,
+                    job_type.module, job_type.function, job_id, household_id, params
+                )
+            except Exception as e:
+                logger.error("Job %s (%s) failed: %s", job_id, job_type.name, str(e))
+                JOBS_FINISHED.labels(job_type.name, JobStatus.failed.value).inc()
+                await run_in_threadpool(_update, job_id, household_id, status=JobStatus.failed,
+                                        error=str(e) or type(e).__name__, finished_at=datetime.now())
+                return
+            JOBS_FINISHED.labels(job_type.name, JobStatus.succeeded.value).inc()
+            await run_in_threadpool(_update, job_id, household_id, status=JobStatus.succeeded,
+                                    result=result, finished_at=datetime.now())
+        finally:
+            JOB_DURATION.labels(job_type.name).observe(time.perf_counter() - start)
+            running.dec()
+            self._running.pop(job_id, None)
+
+    async def stop(self, grace: float) -> None:
+        """Stop accepting jobs, wait up to ``grace`` seconds, then fail what is left."""
+        self._accepting = False
+        if self._queues:
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(*(queue.join() for queue in self._queues.values())), timeout=grace
+                )
+            except asyncio.TimeoutError:
+                pass
+        leftover = [(job_id, household_id) for job_id, (household_id, _) in self._running.items()]
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        for queue in self._queues.values():
+            while not queue.empty():
+                job_id, household_id, _ = queue.get_nowait()
+                leftover.append((job_id, household_id))
+        for job_id, household_id in leftover:
+            try:
+                await run_in_threadpool(_update, job_id, household_id, status=JobStatus.failed,
+                                        error="Interrupted by server shutdown", finished_at=datetime.now())
+            except Exception as e:
+                logger.error("Could not mark job %s as interrupted: %s", job_id, str(e))
+
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._queues, self._workers, self._running = {}, [], {}
+        self._threads = self._processes = self._loop = None
+
+
+JOB_RUNNER = JobRunner()
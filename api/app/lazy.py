@@ -0,0 +1,29 @@
+"""
+重いモジュールの遅延インポート
+
+pandas, Pillow, NumPy, pyarrow and similar packages cost hundreds of
+milliseconds to import and are only needed by a few export/report paths.
+Import them through ``optional_import`` inside the function that uses them so
+``import app.main`` stays fast; ``HEAVY_MODULES`` is what the startup budget
+script checks is *not* loaded at import time.
+"""
+
+import importlib
+from functools import lru_cache
+from types import ModuleType
+
+HEAVY_MODULES = ("pandas", "PIL", "numpy", "pyarrow", "faker")
+
+
+class OptionalDependencyError(ImportError):
+    """Raised when a feature needs a package that is not installed."""
+
+
+@lru_cache(maxsize=None)
+def optional_import(name: str, feature: str = "") -> ModuleType:
+    """Import ``name`` on first use and cache it, with a clear error if it is missing."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        needed_for = f" (required for {feature})" if feature else ""
+        raise OptionalDependencyError(f"Package '{name}' is not installed{needed_for}") from e
@@ -1,12 +1,19 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 import logging
 import time
 
 from .settings import settings
-from .routers import auth, transactions, transactions_debug, categories, accounts, users, budgets, reports, files
+from .compression import CompressionMiddleware
+from . import admission, metrics, query_stats, read_routing, tenancy, warmup
+from .database import read_from_replica, replica_engines, shard_engines
+from .jobs import JOB_RUNNER
+from .routers import (
+    auth, transactions, debug, categories, accounts, users, budgets, reports, files, dashboard, sync, events, jobs,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -15,11 +22,27 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 接続プールとホットパスを温めてから ready にする
+    app.state.ready = False
+    if settings.STARTUP_WARMUP:
+        await warmup.run(app, [*shard_engines.values(), *replica_engines], settings.WARMUP_PATHS)
+    app.state.ready = True
+    yield
+    # SIGTERM 後、処理中のリクエストが捌けてから呼ばれる
+    app.state.ready = False
+    await JOB_RUNNER.stop(settings.SHUTDOWN_GRACE_SECONDS)
+    for db_engine in (*shard_engines.values(), *replica_engines):
+        db_engine.dispose()
+
 # Create FastAPI app
 app = FastAPI(
     title="monimoni Family Budget API",
     description="API for managing family budget and expenses",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add security middleware
@@ -28,13 +51,35 @@ app.add_middleware(
     allowed_hosts=["localhost", "127.0.0.1", "*"] if settings.DEBUG else ["localhost"]
 )
 
-# Add CORS middleware
+# DB プールが詰まったら低優先度のリクエストを DB に触れる前に 503 で断る
+# （ログ・メトリクスのミドルウェアの内側なので、断った分も記録される）
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    route_class = admission.classify(request.method, request.url.path)
+    if not settings.ADMISSION_CONTROL_ENABLED or route_class == admission.EXEMPT:
+        return await call_next(request)
+
+    if admission.ADMISSION.try_enter(route_class):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is busy, please retry later"},
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.ADMISSION.leave(route_class)
+
+# Add CORS middleware（受付制御より後に追加＝外側。503 にも CORS ヘッダーを付けてブラウザが読めるようにする）
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 # Add request logging middleware
@@ -52,6 +97,71 @@ async def log_requests(request: Request, call_next):
     )
     return response
 
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    method = request.method
+    in_flight = metrics.HTTP_IN_FLIGHT.labels(method)
+    in_flight.inc()
+    start_time = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # ルートのテンプレートパスで集計（/api/transactions/{transaction_id} など）
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "<unmatched>")
+        metrics.HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+        metrics.HTTP_LATENCY.labels(method, route_path).observe(time.perf_counter() - start_time)
+        in_flight.dec()
+
+
+@app.middleware("http")
+async def record_query_stats(request: Request, call_next):
+    stats, token = query_stats.start_request(request.scope, track_shapes=settings.DEBUG)
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        query_stats.end_request(token)
+
+    response.headers["Server-Timing"] = query_stats.server_timing(stats, time.perf_counter() - start_time)
+
+    # N+1 の検出（DEBUG時のみ）
+    if settings.DEBUG:
+        for statement, count in stats.repeated_statements(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            logger.warning(
+                "Possible N+1 query: %s %s ran the same statement %d times: %s",
+                request.method, stats.route, count, statement
+            )
+    return response
+
+
+
+@app.middleware("http")
+async def route_reads(request: Request, call_next):
+    # レプリカ未設定なら何もしない
+    if not replica_engines:
+        return await call_next(request)
+
+    token = read_from_replica.set(read_routing.reads_from_replica(request))
+    try:
+        response = await call_next(request)
+    finally:
+        read_from_replica.reset(token)
+    read_routing.record_write(request, response)
+    return response
+
+# レスポンス圧縮（最後に追加＝最も外側。上のミドルウェアは非圧縮の本文を扱う）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        encodings=settings.compression_encodings_list,
+    )
+
 # Exception handlers
 
 
@@ -71,16 +181,21 @@ async def internal_error_handler(_request: Request, exc):
         content={"detail": "Internal server error"}
     )
 
-# Include routers
+# Include routers（auth 以外は認証必須）
+protected = [Depends(tenancy.current_household_id)]
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-app.include_router(transactions.router, prefix="/api/transactions", tags=["Transactions"])
-app.include_router(transactions_debug.router, prefix="/api/debug", tags=["Debug"])
-app.include_router(categories.router, prefix="/api/categories", tags=["Categories"])
-app.include_router(accounts.router, prefix="/api/accounts", tags=["Accounts"])
-app.include_router(users.router, prefix="/api/users", tags=["Users"])
-app.include_router(budgets.router, prefix="/api/budgets", tags=["Budgets"])
-app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
-app.include_router(files.router, prefix="/api/files", tags=["Files"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["Dashboard"], dependencies=protected)
+app.include_router(transactions.router, prefix="/api/transactions", tags=["Transactions"], dependencies=protected)
+app.include_router(debug.router, prefix="/api/debug", tags=["Debug"], dependencies=protected)
+app.include_router(categories.router, prefix="/api/categories", tags=["Categories"], dependencies=protected)
+app.include_router(accounts.router, prefix="/api/accounts", tags=["Accounts"], dependencies=protected)
+app.include_router(users.router, prefix="/api/users", tags=["Users"], dependencies=protected)
+app.include_router(budgets.router, prefix="/api/budgets", tags=["Budgets"], dependencies=protected)
+app.include_router(reports.router, prefix="/api/reports", tags=["Reports"], dependencies=protected)
+app.include_router(files.router, prefix="/api/files", tags=["Files"], dependencies=protected)
+app.include_router(sync.router, prefix="/api/sync", tags=["Sync"], dependencies=protected)
+app.include_router(events.router, prefix="/api/events", tags=["Events"], dependencies=protected)
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"], dependencies=protected)
 
 # Health check endpoint
 
@@ -106,6 +221,22 @@ async def health_check():
             }
         )
 
+
+@app.get("/readyz", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: 503 until the startup warmup has finished."""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
+
+# Metrics endpoint
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of in-process metrics."""
+    return Response(content=metrics.REGISTRY.expose(), media_type=metrics.CONTENT_TYPE)
+
 # Root endpoint
 
 
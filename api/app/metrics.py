@@ -0,0 +1,311 @@
+"""
+プロセス内メトリクス（Prometheus テキスト形式）
+
+A small metrics registry exposed at ``/metrics``. Each labelled series owns its
+own lock, so recording a sample touches one uncontended lock and never the
+registry; the registry lock is only taken when a new label set is first seen.
+
+Pool metrics come from ``InstrumentedQueuePool`` (checkout wait time and
+timeouts) plus gauges read from the pool at scrape time. The same pool feeds
+``POOL_PRESSURE`` (checkouts waiting right now and a decaying average of recent
+waits), which admission control reads on every request.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "_value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def get(self) -> float:
+        return self._value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ("_function",)
+
+    def __init__(self):
+        super().__init__()
+        self._function: Optional[Callable[[], float]] = None
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from ``function`` at scrape time instead."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function else self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "_counts", "_sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the series for a label set, creating it on first use."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in the text exposition format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def expose(self) -> str:
+        return "\n".join(metric.expose() for metric in list(self._metrics.values())) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Total HTTP requests by route template and status.",
+    ("method", "route", "status")
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route")
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method",)
+)
+
+# DB connection pool
+DB_POOL_CHECKOUTS = REGISTRY.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool."
+)
+DB_POOL_CONNECTS = REGISTRY.counter(
+    "db_pool_connections_created_total", "New DBAPI connections opened by the pool."
+)
+DB_POOL_TIMEOUTS = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that timed out waiting for a connection."
+)
+DB_POOL_WAIT = REGISTRY.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting to check out a connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+DB_POOL_SIZE = REGISTRY.gauge("db_pool_size", "Configured pool size.")
+DB_POOL_CHECKED_OUT = REGISTRY.gauge("db_pool_checked_out", "Connections currently checked out.")
+DB_POOL_OVERFLOW = REGISTRY.gauge("db_pool_overflow", "Connections currently open beyond pool_size.")
+DB_POOL_WAITING = REGISTRY.gauge("db_pool_waiting", "Checkouts currently waiting for a connection (all pools).")
+
+
+class PoolPressure:
+    """
+    Checkouts waiting for a connection right now and an exponentially weighted
+    average of recent checkout waits, across all instrumented pools. The
+    average decays by half every ``half_life`` seconds without checkouts, so
+    pressure clears once the database recovers.
+    """
+
+    def __init__(self, weight: float = 0.2, half_life: float = 2.0):
+        self.weight = weight
+        self.half_life = half_life
+        self.waiting = 0
+        self._average = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def begin(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def end(self, waited: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.waiting -= 1
+            average = self._average * 0.5 ** ((now - self._updated) / self.half_life)
+            self._average = average + (waited - average) * self.weight
+            self._updated = now
+
+    def average_wait(self) -> float:
+        """Recent average checkout wait in seconds."""
+        with self._lock:
+            return self._average * 0.5 ** ((time.monotonic() - self._updated) / self.half_life)
+
+
+POOL_PRESSURE = PoolPressure()
+DB_POOL_WAITING.labels().set_function(lambda: POOL_PRESSURE.waiting)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        POOL_PRESSURE.begin()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.labels().inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            POOL_PRESSURE.end(waited)
+            DB_POOL_WAIT.labels().observe(waited)
+
+
+def instrument_pool(pool) -> None:
+    """Attach checkout counters and scrape-time gauges to an engine pool."""
+    checkouts = DB_POOL_CHECKOUTS.labels()
+    connects = DB_POOL_CONNECTS.labels()
+    event.listen(pool, "checkout", lambda *_: checkouts.inc())
+    event.listen(pool, "connect", lambda *_: connects.inc())
+
+    if isinstance(pool, QueuePool):
+        DB_POOL_SIZE.labels().set_function(pool.size)
+        DB_POOL_CHECKED_OUT.labels().set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.labels().set_function(lambda: max(pool.overflow(), 0))
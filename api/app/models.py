@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Date, Boolean, Text,
+    Column, Integer, BigInteger, String, DateTime, Date, Boolean, Text,
     ForeignKey, Enum, UniqueConstraint, Index, JSON, Numeric
 )
 from sqlalchemy.ext.declarative import declarative_base
@@ -28,12 +28,21 @@ class AuthType(str, enum.Enum):
     pin = "pin"
 
 
+class JobStatus(str, enum.Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
 class Household(Base):
     __tablename__ = "households"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=func.now, nullable=False)
+    data_version = Column(Integer, default=0, server_default="0", nullable=False)  # 書き込みごとに加算
+    sync_epoch = Column(Integer, default=0, server_default="0", nullable=False)  # ID が振り直されたら加算（同期トークン失効）
 
     # Relationships
     users = relationship("User", back_populates="household")
@@ -70,11 +79,18 @@ class Account(Base):
     name = Column(String(255), nullable=False)
     type = Column(Enum(AccountType), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
+    sync_version = Column(Integer, default=0, server_default="0", nullable=False)  # 最後に変更したデータバージョン
 
     # Relationships
     household = relationship("Household", back_populates="accounts")
     transactions = relationship("Transaction", foreign_keys="Transaction.account_id")
     counter_transactions = relationship("Transaction", foreign_keys="Transaction.counter_account_id")
+    balance = relationship("AccountBalance", uselist=False, back_populates="account")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_accounts_household_sync', 'household_id', 'sync_version'),
+    )
 
 
 class Category(Base):
@@ -85,6 +101,7 @@ class Category(Base):
     name = Column(String(255), nullable=False)
     parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
+    sync_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Relationships
     household = relationship("Household", back_populates="categories")
@@ -93,6 +110,25 @@ class Category(Base):
     transaction_items = relationship("TransactionItem", back_populates="category")
     budgets = relationship("Budget", back_populates="category")
 
+    # Indexes
+    __table_args__ = (
+        Index('idx_categories_household_sync', 'household_id', 'sync_version'),
+    )
+
+
+class CategoryClosure(Base):
+    """Transitive closure of the category tree (every ancestor/descendant pair)."""
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_category_closure_descendant', 'descendant_id', 'ancestor_id'),
+    )
+
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -101,7 +137,7 @@ class Transaction(Base):
     household_id = Column(Integer, ForeignKey("households.id"), nullable=False)
     date = Column(Date, nullable=False, index=True)
     type = Column(Enum(TransactionType), nullable=False)
-    amount_total = Column(Numeric(12, 2), nullable=False, index=True)
+    amount_total = Column(BigInteger, nullable=False, index=True)  # 金額は円単位の整数（app.money）
     account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
     counter_account_id = Column(Integer, ForeignKey("accounts.id"), nullable=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
@@ -112,6 +148,7 @@ class Transaction(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=func.now, nullable=False)
     updated_at = Column(DateTime, default=func.now, onupdate=func.now, nullable=False)
+    sync_version = Column(Integer, default=0, server_default="0", nullable=False)  # 明細の変更でも更新
 
     # Relationships
     household = relationship("Household", back_populates="transactions")
@@ -124,6 +161,13 @@ class Transaction(Base):
     receipts = relationship("Receipt", back_populates="transaction", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary="transaction_tags", back_populates="transactions")
 
+    # Indexes
+    __table_args__ = (
+        Index('idx_transactions_account_date', 'account_id', 'date'),
+        Index('idx_transactions_counter_account_date', 'counter_account_id', 'date'),
+        Index('idx_transactions_household_sync', 'household_id', 'sync_version'),
+    )
+
 
 class TransactionItem(Base):
     __tablename__ = "transaction_items"
@@ -132,14 +176,20 @@ class TransactionItem(Base):
     transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=False)
     name = Column(String(255), nullable=False)
     quantity = Column(Numeric(10, 2), default=1, nullable=False)
-    unit_price = Column(Numeric(12, 2), default=0, nullable=False)
-    amount = Column(Numeric(12, 2), nullable=False)
+    unit_price = Column(BigInteger, default=0, nullable=False)
+    amount = Column(BigInteger, nullable=False)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
 
     # Relationships
     transaction = relationship("Transaction", back_populates="items")
     category = relationship("Category", back_populates="transaction_items")
 
+    # Indexes
+    __table_args__ = (
+        # 取引ごとの明細（同期フィードの結合と並び順）。SQLite は外部キーに索引を作らない
+        Index('idx_transaction_items_transaction', 'transaction_id', 'id'),
+    )
+
 
 class Tag(Base):
     __tablename__ = "tags"
@@ -163,6 +213,12 @@ class TransactionTag(Base):
     transaction_id = Column(Integer, ForeignKey("transactions.id"), primary_key=True)
     tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
 
+    # Indexes
+    __table_args__ = (
+        # タグから取引を引く逆方向の検索用
+        Index('idx_transaction_tags_tag_transaction', 'tag_id', 'transaction_id'),
+    )
+
 
 class Receipt(Base):
     __tablename__ = "receipts"
@@ -179,6 +235,35 @@ class Receipt(Base):
     transaction = relationship("Transaction", back_populates="receipts")
 
 
+class AccountBalance(Base):
+    """Current balance per account, maintained on every transaction write."""
+    __tablename__ = "account_balances"
+
+    account_id = Column(Integer, ForeignKey("accounts.id"), primary_key=True)
+    household_id = Column(Integer, ForeignKey("households.id"), nullable=False, index=True)
+    balance = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Relationships
+    account = relationship("Account", back_populates="balance")
+
+
+class AccountBalanceCheckpoint(Base):
+    """Closing balance of an account at the end of a period (month end)."""
+    __tablename__ = "account_balance_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    household_id = Column(Integer, ForeignKey("households.id"), nullable=False)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    as_of_date = Column(Date, nullable=False)
+    balance = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('account_id', 'as_of_date', name='uq_balance_checkpoint_account_date'),
+        Index('idx_balance_checkpoint_household_date', 'household_id', 'as_of_date'),
+    )
+
+
 class Budget(Base):
     __tablename__ = "budgets"
 
@@ -186,7 +271,8 @@ class Budget(Base):
     household_id = Column(Integer, ForeignKey("households.id"), nullable=False)
     month = Column(String(6), nullable=False)  # YYYYMM format
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
-    amount_limit = Column(Numeric(12, 2), nullable=False)
+    amount_limit = Column(BigInteger, nullable=False)
+    sync_version = Column(Integer, default=0, server_default="0", nullable=False)
 
     # Relationships
     household = relationship("Household", back_populates="budgets")
@@ -194,6 +280,7 @@ class Budget(Base):
 
     __table_args__ = (
         UniqueConstraint('household_id', 'month', 'category_id', name='uq_budget_month_category'),
+        Index('idx_budgets_household_sync', 'household_id', 'sync_version'),
     )
 
 
@@ -216,3 +303,52 @@ class AuditLog(Base):
         Index('idx_audit_entity', 'entity', 'entity_id'),
         Index('idx_audit_user_date', 'user_id', 'created_at'),
     )
+
+
+class HouseholdShard(Base):
+    """Directory of households placed on a non-default shard (kept on the default shard)."""
+    __tablename__ = "household_shards"
+
+    household_id = Column(Integer, primary_key=True, autoincrement=False)
+    shard = Column(String(64), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class SyncTombstone(Base):
+    """A deleted row, kept so that sync clients can remove their copy."""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    household_id = Column(Integer, ForeignKey("households.id"), nullable=False)
+    entity = Column(String(32), nullable=False)  # "transactions", "items", "budgets", ...
+    entity_id = Column(Integer, nullable=False)
+    sync_version = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_sync_tombstones_household_sync', 'household_id', 'sync_version'),
+    )
+
+
+class Job(Base):
+    """Background job (app.jobs): parameters, progress and result."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    household_id = Column(Integer, ForeignKey("households.id"), nullable=False)
+    type = Column(String(64), nullable=False)
+    status = Column(Enum(JobStatus), default=JobStatus.queued, nullable=False)
+    params = Column(JSON, nullable=True)
+    progress = Column(Integer, default=0, nullable=False)
+    progress_total = Column(Integer, nullable=True)
+    message = Column(String(255), nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('idx_jobs_household_created', 'household_id', 'created_at'),
+    )
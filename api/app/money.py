@@ -0,0 +1,81 @@
+"""
+金額の整数表現
+
+Amounts are stored, summed and compared as integers in the currency's minor
+unit (``BIGINT`` columns). The yen has no minor unit, so one unit is one yen;
+the scale lives here (``DECIMALS``) and in the migration that introduced it.
+
+Values are converted only at the edges:
+
+- ``to_minor`` parses what clients send (JSON numbers, strings, CSV cells)
+  and refuses amounts finer than the minor unit instead of rounding them.
+- ``to_major`` turns a stored amount into the API's JSON number: whole yen
+  stay ``int``, so nothing is boxed in ``Decimal`` or rounded through ``float``.
+- ``format_amount`` renders an amount for files (CSV).
+
+``payer_share`` splits an amount with the payer's ratio in integers (half up)
+and ``allocate`` spreads a total over several people by weight, so split shares
+always add up to the amount instead of drifting by rounding.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import List, Sequence, Union
+
+CURRENCY = "JPY"
+DECIMALS = 0  # 通貨の小数桁（円は 0）。変更するには金額列の移行が必要
+MINOR_UNITS = 10 ** DECIMALS
+
+
+def to_minor(value) -> int:
+    """Parse an amount (number, ``Decimal`` or string such as ``"1,200"``) into minor units."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid amount: {value!r}")
+    if isinstance(value, int):
+        return value * MINOR_UNITS
+    try:
+        amount = value if isinstance(value, Decimal) else Decimal(str(value).strip().replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    minor = amount.scaleb(DECIMALS)
+    if minor != minor.to_integral_value():
+        raise ValueError(f"Amount {value} is finer than the currency's minor unit")
+    return int(minor)
+
+
+def to_major(minor) -> Union[int, float]:
+    """A stored amount (or a database ``SUM`` of one) as the API's JSON number."""
+    minor = int(minor or 0)
+    return minor if MINOR_UNITS == 1 else minor / MINOR_UNITS
+
+
+def format_amount(minor: int) -> str:
+    """Exact text of an amount, e.g. ``"1200"`` (``"12.00"`` for a two-decimal currency)."""
+    if MINOR_UNITS == 1:
+        return str(minor)
+    return f"{Decimal(minor).scaleb(-DECIMALS):.{DECIMALS}f}"
+
+
+def percent(ratio) -> int:
+    """A ratio such as ``split_ratio_payer`` (0.50) as whole percent (50)."""
+    value = ratio if isinstance(ratio, Decimal) else Decimal(str(ratio))
+    return int((value * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def payer_share(amount: int, ratio_percent: int) -> int:
+    """The payer's part of ``amount`` at ``ratio_percent``, rounded half up in minor units."""
+    return (amount * ratio_percent + 50) // 100
+
+
+def allocate(total: int, weights: Sequence[int]) -> List[int]:
+    """Split ``total`` in proportion to ``weights`` into integers summing to ``total`` (largest remainder)."""
+    weight_sum = sum(weights)
+    if not weight_sum:
+        return [0] * len(weights)
+    parts = [total * weight // weight_sum for weight in weights]
+    # 切り捨てで余った分は、端数の大きい順に 1 単位ずつ配る
+    by_fraction = sorted(range(len(weights)), key=lambda i: -(total * weights[i] % weight_sum))
+    for i in by_fraction[:total - sum(parts)]:
+        parts[i] += 1
+    return parts
@@ -0,0 +1,112 @@
+"""
+リクエスト単位の SQL 計測
+
+SQLAlchemy cursor events count statements and accumulate DB time into the
+``RequestQueryStats`` of the current request, held in a ContextVar. The context
+is copied into the threadpool that runs sync endpoints, so the events fired
+there update the same object the middleware reads afterwards.
+
+In DEBUG the statement shapes are counted as well, so a request that runs the
+same statement more than ``SQL_N_PLUS_ONE_THRESHOLD`` times can be reported as
+a likely N+1 query pattern.
+"""
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,?)+\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_statement(statement: str) -> str:
+    """Reduce a SQL statement to its shape: literals and IN lists collapsed."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("IN (?)", shape)
+    return _LITERAL.sub("?", shape)
+
+
+class RequestQueryStats:
+    """Per-request counters filled in by the cursor event hooks."""
+
+    __slots__ = ("scope", "count", "db_time", "shapes")
+
+    def __init__(self, scope: Optional[dict] = None, track_shapes: bool = False):
+        self.scope = scope or {}
+        self.count = 0
+        self.db_time = 0.0
+        self.shapes: Optional[Counter] = Counter() if track_shapes else None
+
+    @property
+    def route(self) -> Optional[str]:
+        """Route template of the request once routing has matched, else the raw path."""
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path")
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than ``threshold`` times."""
+        if not self.shapes:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request(scope: Optional[dict] = None,
+                  track_shapes: bool = False) -> Tuple[RequestQueryStats, Token]:
+    """Begin collecting stats for the current request context."""
+    stats = RequestQueryStats(scope, track_shapes)
+    return stats, _current.set(stats)
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start_time = time.perf_counter()
+
+
+def elapsed(context) -> float:
+    """Seconds since the statement of ``context`` was handed to the cursor."""
+    return time.perf_counter() - context._query_start_time
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.db_time += elapsed(context)
+    if stats.shapes is not None:
+        stats.shapes[normalize_statement(statement)] += 1
+
+
+def install() -> None:
+    """Register the cursor hooks on every Engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def server_timing(stats: RequestQueryStats, total: float) -> str:
+    """
+    Format a Server-Timing header value.
+
+    ``db`` is time spent in cursor execution, ``app`` is the rest of the
+    request and ``queries`` carries the statement count in its description.
+    """
+    db_ms = stats.db_time * 1000
+    app_ms = max(total * 1000 - db_ms, 0.0)
+    return f'db;dur={db_ms:.2f}, app;dur={app_ms:.2f}, queries;desc="{stats.count}"'
@@ -0,0 +1,82 @@
+"""
+レプリカ読み取りの振り分けと read-your-writes
+
+Safe requests (GET/HEAD) read from a replica unless the client wrote something
+within the last ``READ_YOUR_WRITES_SECONDS``; then its reads are pinned to the
+primary so it never sees a replica that has not caught up with its own write.
+
+A successful write pins the client two ways: in-process, keyed by the token
+digest (or the client address without a token), and with a short-lived cookie
+so the pin also holds when the next request lands on another worker.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.routers.auth import get_token
+from app.settings import settings
+from app.token_cache import token_digest
+
+PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class ReadYourWrites:
+    """Clients whose reads must go to the primary until a deadline."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self._pinned: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, client: str) -> float:
+        now = time.time()
+        until = now + self.window
+        with self._lock:
+            self._pinned[client] = until
+            if len(self._pinned) > 1024:
+                for key in [key for key, deadline in self._pinned.items() if deadline <= now]:
+                    del self._pinned[key]
+        return until
+
+    def is_pinned(self, client: str) -> bool:
+        deadline = self._pinned.get(client)
+        return deadline is not None and deadline > time.time()
+
+
+READ_YOUR_WRITES = ReadYourWrites(settings.READ_YOUR_WRITES_SECONDS)
+
+
+def client_key(request: Request) -> Optional[str]:
+    token = get_token(request)
+    if token:
+        return token_digest(token).hex()
+    return request.client.host if request.client else None
+
+
+def _cookie_pinned(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def reads_from_replica(request: Request) -> bool:
+    """Whether the reads of this request may be served by a replica."""
+    if request.method not in SAFE_METHODS or _cookie_pinned(request):
+        return False
+    client = client_key(request)
+    return client is None or not READ_YOUR_WRITES.is_pinned(client)
+
+
+def record_write(request: Request, response: Response) -> None:
+    """Pin the client to the primary after a successful write."""
+    if request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    client = client_key(request)
+    until = READ_YOUR_WRITES.pin(client) if client else time.time() + READ_YOUR_WRITES.window
+    response.set_cookie(PIN_COOKIE, f"{until:.3f}", max_age=int(READ_YOUR_WRITES.window) + 1,
+                        httponly=True, samesite="lax")
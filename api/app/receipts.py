@@ -0,0 +1,46 @@
+"""
+レシート画像の後処理（バックグラウンドジョブ）
+
+Uploaded images are rotated upright from their EXIF orientation and get a
+JPEG thumbnail next to the original (``<name>.thumb.jpg``). Decoding and
+resizing is CPU-bound, so this runs in the process pool and does not touch
+the database (the runner records its status); PDFs are stored as uploaded.
+"""
+
+import os
+from pathlib import Path
+
+from app.jobs import JobContext, job_type
+from app.lazy import optional_import
+
+THUMBNAIL_SIZE = (512, 512)
+
+
+def thumbnail_path(storage_path: str) -> Path:
+    path = Path(storage_path)
+    return path.with_name(f"{path.stem}.thumb.jpg")
+
+
+@job_type("receipt_processing", executor="process", concurrency=2)
+def process_receipt(context: JobContext, storage_path: str) -> dict:
+    """Normalise orientation and write a thumbnail for an uploaded receipt image."""
+    path = Path(storage_path)
+    if path.suffix.lower() == ".pdf":
+        return {"thumbnail": None}
+
+    image_module = optional_import("PIL.Image", "receipt processing")
+    image_ops = optional_import("PIL.ImageOps", "receipt processing")
+    with image_module.open(path) as image:
+        upright = image_ops.exif_transpose(image)
+        width, height = upright.size
+        if upright is not image:
+            # 回転が必要だった画像だけ書き戻す（EXIF の向き情報は消える）
+            tmp = path.with_name(f".{path.name}.tmp")
+            upright.save(tmp, format=image.format)
+            os.replace(tmp, path)
+        thumbnail = upright.convert("RGB")
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        target = thumbnail_path(storage_path)
+        thumbnail.save(target, format="JPEG", quality=80)
+
+    return {"width": width, "height": height, "thumbnail": target.name}
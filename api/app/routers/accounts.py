@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, insert
 from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
 import logging
 
 from app.database import get_db
-from app.models import Account
+from app.models import Account, AccountBalance
+from app import balances
+from app.money import to_major
+from app.tenancy import current_household_id
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +20,6 @@ router = APIRouter()
 class AccountCreate(BaseModel):
     name: str
     type: str
-    household_id: int = 1
 
 
 class AccountUpdate(BaseModel):
@@ -24,11 +28,10 @@ class AccountUpdate(BaseModel):
 
 
 @router.get("/")
-def get_accounts(db: Session = Depends(get_db)):
+def get_accounts(household_id: int = Depends(current_household_id), db: Session = Depends(get_db)):
     """Get all accounts for the household."""
     try:
-        # 田中家のhousehold_id=1のアカウントを取得
-        result = db.execute(select(Account).where(Account.household_id == 1, Account.is_active == True))
+        result = db.execute(select(Account).where(Account.household_id == household_id, Account.is_active == True))
         accounts = result.scalars().all()
 
         accounts_data = []
@@ -46,18 +49,80 @@ def get_accounts(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/balances")
+def get_account_balances(
+    as_of: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get balances of all accounts for the household.
+
+    Without ``as_of`` the materialized current balances are returned. With
+    ``as_of`` the balance at the end of that day is computed from the nearest
+    month-end checkpoint.
+    """
+    try:
+        as_of_date = None
+        if as_of:
+            try:
+                as_of_date = datetime.strptime(as_of, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid as_of format. Use YYYY-MM-DD")
+
+        accounts = db.execute(
+            select(Account).where(Account.household_id == household_id, Account.is_active == True)
+        ).scalars().all()
+
+        if as_of_date:
+            balance_map = balances.get_balances_as_of(db, household_id, as_of_date)
+        else:
+            balance_map = balances.get_current_balances(db, household_id)
+
+        return {
+            "as_of": as_of_date.isoformat() if as_of_date else None,
+            "balances": [
+                {
+                    "account_id": account.id,
+                    "name": account.name,
+                    "type": account.type,
+                    "balance": to_major(balance_map.get(account.id, 0))
+                }
+                for account in accounts
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching account balances: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.post("/")
-def create_account(account_data: AccountCreate, db: Session = Depends(get_db)):
+def create_account(
+    account_data: AccountCreate,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Create a new account."""
     try:
         new_account = Account(
             name=account_data.name,
             type=account_data.type,
-            household_id=account_data.household_id,
+            household_id=household_id,
             is_active=True
         )
 
         db.add(new_account)
+        db.flush()
+
+        # 残高行を作成しておく
+        db.execute(insert(AccountBalance).values(
+            account_id=new_account.id,
+            household_id=new_account.household_id,
+            balance=0,
+            updated_at=datetime.now()
+        ))
         db.commit()
 
         return {
@@ -73,11 +138,16 @@ def create_account(account_data: AccountCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/{account_id}")
-def update_account(account_id: int, account_data: AccountUpdate, db: Session = Depends(get_db)):
+def update_account(
+    account_id: int,
+    account_data: AccountUpdate,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Update an account."""
     try:
         account = db.execute(
-            select(Account).where(Account.id == account_id, Account.household_id == 1)
+            select(Account).where(Account.id == account_id, Account.household_id == household_id)
         ).scalar_one_or_none()
 
         if not account:
@@ -102,11 +172,15 @@ def update_account(account_id: int, account_data: AccountUpdate, db: Session = D
 
 
 @router.delete("/{account_id}")
-def delete_account(account_id: int, db: Session = Depends(get_db)):
+def delete_account(
+    account_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Delete an account (soft delete)."""
     try:
         account = db.execute(
-            select(Account).where(Account.id == account_id, Account.household_id == 1)
+            select(Account).where(Account.id == account_id, Account.household_id == household_id)
         ).scalar_one_or_none()
 
         if not account:
@@ -3,15 +3,22 @@ from fastapi.security import HTTPBearer
 from fastapi.responses import JSONResponse
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from typing import Optional
 import logging
+import time
 
 from ..settings import settings
+from ..token_cache import RevocationList, TokenCache, token_digest
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
+# 検証済みトークンのキャッシュと失効リスト（プロセス単位）
+TOKEN_CACHE = TokenCache(settings.AUTH_CACHE_SIZE if settings.AUTH_CACHE_ENABLED else 0)
+REVOKED_TOKENS = RevocationList(settings.REVOKED_TOKENS_MAX_SIZE)
+
 
 def create_access_token(data: dict) -> str:
     """Create JWT access token."""
@@ -23,16 +30,54 @@ def create_access_token(data: dict) -> str:
 
 
 def verify_token(token: str) -> dict:
-    """Verify JWT token."""
+    """Verify JWT token, skipping the signature check for recently verified tokens."""
+    digest = token_digest(token)
+    if REVOKED_TOKENS.is_revoked(digest):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    payload = TOKEN_CACHE.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(token, settings.APP_SECRET, algorithms=["HS256"])
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    TOKEN_CACHE.put(digest, payload)
+    return payload
+
+
+def get_token(request: Request) -> Optional[str]:
+    """Read the access token from the cookie or the Authorization header."""
+    # クッキーからトークンを取得
+    token = request.cookies.get("access_token")
+
+    if not token:
+        # Authorizationヘッダーからも確認
+        auth_header = request.headers.get("authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            token = auth_header.split(" ")[1]
+    return token
+
+
+async def require_auth(request: Request) -> dict:
+    """Dependency for protected routes: returns the verified token payload or raises 401."""
+    token = get_token(request)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No token provided",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return verify_token(token)
 
 
 @router.post("/login")
@@ -40,10 +85,18 @@ async def login(pin_data: dict):
     """
     Authenticate with household PIN.
 
-    Expected payload: {"pin": "1234"}
-    Returns JWT token for API access.
+    Expected payload: {"pin": "1234", "household_id": 1}
+    (``household_id`` defaults to ``DEFAULT_HOUSEHOLD_ID``.)
+    Returns JWT token for API access, scoped to that household.
     """
     pin = pin_data.get("pin")
+    try:
+        household_id = int(pin_data.get("household_id") or settings.DEFAULT_HOUSEHOLD_ID)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid household_id"
+        )
 
     if not pin:
         raise HTTPException(
@@ -51,15 +104,19 @@ async def login(pin_data: dict):
             detail="PIN is required"
         )
 
-    if pin != settings.HOUSEHOLD_PIN:
-        logger.warning(f"Invalid login attempt with PIN: {pin[:2]}***")
+    expected_pin = settings.household_pins.get(household_id)
+    if expected_pin is None and household_id == settings.DEFAULT_HOUSEHOLD_ID:
+        expected_pin = settings.HOUSEHOLD_PIN
+
+    if expected_pin is None or pin != expected_pin:
+        logger.warning(f"Invalid login attempt for household {household_id} with PIN: {pin[:2]}***")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid PIN"
         )
 
     # Create token
-    token_data = {"sub": "household", "type": "access"}
+    token_data = {"sub": "household", "type": "access", "hid": household_id}
     access_token = create_access_token(token_data)
 
     response = JSONResponse(
@@ -80,39 +137,37 @@ async def login(pin_data: dict):
         samesite="lax"
     )
 
-    logger.info("Successful household login")
+    logger.info(f"Successful household login (household {household_id})")
     return response
 
 
 @router.post("/logout")
-async def logout():
-    """Logout by clearing the authentication cookie."""
+async def logout(request: Request):
+    """Logout by revoking the current token and clearing the authentication cookie."""
+    token = get_token(request)
+    if token:
+        # 署名を検証できたトークンだけを失効させる（偽造トークンで失効リストを膨らませない）
+        try:
+            payload = verify_token(token)
+        except HTTPException:
+            payload = None
+        if payload is not None:
+            digest = token_digest(token)
+            latest = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            REVOKED_TOKENS.revoke(digest, min(float(payload.get("exp", 0)), latest))
+            TOKEN_CACHE.discard(digest)
+
     response = JSONResponse(content={"message": "Logged out successfully"})
     response.delete_cookie(key="access_token")
     return response
 
 
 @router.get("/me")
-async def get_current_user(request: Request):
+async def get_current_user(payload: dict = Depends(require_auth)):
     """Get current authenticated user information."""
-    # クッキーからトークンを取得
-    token = request.cookies.get("access_token")
-
-    if not token:
-        # Authorizationヘッダーからも確認
-        auth_header = request.headers.get("authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-
-    if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No token provided"
-        )
-
-    payload = verify_token(token)
     return {
         "user_type": "household",
         "authenticated": True,
+        "household_id": payload.get("hid", settings.DEFAULT_HOUSEHOLD_ID),
         "expires_at": payload.get("exp")
     }
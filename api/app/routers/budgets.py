@@ -1,21 +1,32 @@
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select
 from typing import Optional
 from datetime import datetime
 import logging
 
 from app.database import get_db
 from app.models import Budget, Category, Transaction, TransactionType
+from app import category_tree
+from app.money import to_major, to_minor
+from app.tenancy import current_household_id, ensure_owned
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _amount_limit(value) -> int:
+    try:
+        return to_minor(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid amount_limit: {e}")
+
+
 @router.get("/")
 def get_budgets(
     month: Optional[str] = Query(None, description="YYYYMM"),
+    household_id: int = Depends(current_household_id),
     db: Session = Depends(get_db)
 ):
     """Get budgets for specified month with actual vs budget amounts."""
@@ -28,41 +39,40 @@ def get_budgets(
         result = db.execute(
             select(Budget, Category)
             .join(Category, Budget.category_id == Category.id)
-            .where(Budget.household_id == 1, Budget.month == month)
+            .where(Budget.household_id == household_id, Budget.month == month)
         )
         budget_data = result.all()
 
+        # 月の範囲
+        month_start = f"{month[:4]}-{month[4:]}-01"
+        if len(month) == 6 and month[4:] == "12":
+            next_month = f"{int(month[:4]) + 1}-01-01"
+        else:
+            next_month_num = int(month[4:]) + 1
+            next_month = f"{month[:4]}-{next_month_num:02d}-01"
+
+        # 実際の支出を子カテゴリ込みで一括集計（その月の支出取引のみ）
+        spent_by_category = category_tree.rollup_totals(
+            db,
+            [category.id for _, category in budget_data],
+            Transaction.household_id == household_id,
+            Transaction.type == TransactionType.expense,
+            Transaction.date >= month_start,
+            Transaction.date < next_month
+        )
+
         budgets = []
         for budget, category in budget_data:
-            # 実際の支出を計算（その月の支出取引のみ）
-            month_start = f"{month[:4]}-{month[4:]}-01"
-            if len(month) == 6 and month[4:] == "12":
-                next_month = f"{int(month[:4]) + 1}-01-01"
-            else:
-                next_month_num = int(month[4:]) + 1
-                next_month = f"{month[:4]}-{next_month_num:02d}-01"
-
-            spent_result = db.execute(
-                select(func.sum(Transaction.amount_total))
-                .where(
-                    Transaction.household_id == 1,
-                    Transaction.category_id == category.id,
-                    Transaction.type == TransactionType.expense,
-                    Transaction.date >= month_start,
-                    Transaction.date < next_month
-                )
-            ).scalar()
-
-            spent = float(spent_result) if spent_result else 0.0
-            limit = float(budget.amount_limit)
+            spent = spent_by_category.get(category.id, 0)
+            limit = budget.amount_limit
 
             budgets.append({
                 "id": budget.id,
                 "category_id": category.id,
                 "category_name": category.name,
-                "amount_limit": limit,
-                "amount_spent": spent,
-                "amount_remaining": limit - spent,
+                "amount_limit": to_major(limit),
+                "amount_spent": to_major(spent),
+                "amount_remaining": to_major(limit - spent),
                 "percentage": round((spent / limit * 100) if limit > 0 else 0, 1),
                 "month": month
             })
@@ -75,10 +85,16 @@ def get_budgets(
 
 
 @router.put("/")
-def update_budgets(budget_data: list, db: Session = Depends(get_db)):
+def update_budgets(
+    budget_data: list,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Bulk update budgets for a month."""
     try:
         updated_count = 0
+        ensure_owned(db, household_id, Category,
+                     [item.get('category_id') for item in budget_data if isinstance(item, dict)], "Category")
 
         for budget_item in budget_data:
             if not all(key in budget_item for key in ['category_id', 'amount_limit', 'month']):
@@ -87,20 +103,20 @@ def update_budgets(budget_data: list, db: Session = Depends(get_db)):
             # 既存の予算を更新または新規作成
             existing_budget = db.execute(
                 select(Budget).where(
-                    Budget.household_id == 1,
+                    Budget.household_id == household_id,
                     Budget.category_id == budget_item['category_id'],
                     Budget.month == budget_item['month']
                 )
             ).scalar_one_or_none()
 
             if existing_budget:
-                existing_budget.amount_limit = budget_item['amount_limit']
+                existing_budget.amount_limit = _amount_limit(budget_item['amount_limit'])
             else:
                 new_budget = Budget(
-                    household_id=1,
+                    household_id=household_id,
                     category_id=budget_item['category_id'],
                     month=budget_item['month'],
-                    amount_limit=budget_item['amount_limit']
+                    amount_limit=_amount_limit(budget_item['amount_limit'])
                 )
                 db.add(new_budget)
 
@@ -109,6 +125,8 @@ def update_budgets(budget_data: list, db: Session = Depends(get_db)):
         db.commit()
         return {"message": "Budgets updated successfully", "count": updated_count}
 
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error("Error updating budgets: %s", str(e))
@@ -116,18 +134,23 @@ def update_budgets(budget_data: list, db: Session = Depends(get_db)):
 
 
 @router.post("/")
-def create_budget(budget_data: dict, db: Session = Depends(get_db)):
+def create_budget(
+    budget_data: dict,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Create a new budget for a category and month."""
     try:
         required_fields = ['category_id', 'amount_limit', 'month']
         for field in required_fields:
             if field not in budget_data:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
+        ensure_owned(db, household_id, Category, [budget_data['category_id']], "Category")
 
         # 重複チェック
         existing_budget = db.execute(
             select(Budget).where(
-                Budget.household_id == 1,
+                Budget.household_id == household_id,
                 Budget.category_id == budget_data['category_id'],
                 Budget.month == budget_data['month']
             )
@@ -137,10 +160,10 @@ def create_budget(budget_data: dict, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Budget already exists for this category and month")
 
         new_budget = Budget(
-            household_id=1,
+            household_id=household_id,
             category_id=budget_data['category_id'],
             month=budget_data['month'],
-            amount_limit=budget_data['amount_limit']
+            amount_limit=_amount_limit(budget_data['amount_limit'])
         )
 
         db.add(new_budget)
@@ -151,7 +174,7 @@ def create_budget(budget_data: dict, db: Session = Depends(get_db)):
             "id": new_budget.id,
             "category_id": new_budget.category_id,
             "month": new_budget.month,
-            "amount_limit": float(new_budget.amount_limit)
+            "amount_limit": to_major(new_budget.amount_limit)
         }
 
     except HTTPException:
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, update
 from pydantic import BaseModel
+from typing import Optional
 import logging
 
 from app.database import get_db
 from app.models import Category
+from app import category_tree
+from app.tenancy import current_household_id
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +18,32 @@ router = APIRouter()
 class CategoryCreate(BaseModel):
     name: str
     type: str
-    household_id: int = 1
+    parent_id: Optional[int] = None
 
 
 class CategoryUpdate(BaseModel):
     name: str
     type: str
+    parent_id: Optional[int] = None
+
+
+def _get_parent(db: Session, parent_id: Optional[int], household_id: int) -> Optional[Category]:
+    """Validate that the parent category exists in the same household."""
+    if parent_id is None:
+        return None
+    parent = db.execute(
+        select(Category).where(Category.id == parent_id, Category.household_id == household_id)
+    ).scalar_one_or_none()
+    if not parent:
+        raise HTTPException(status_code=400, detail="Parent category not found")
+    return parent
 
 
 @router.get("/")
-def get_categories(db: Session = Depends(get_db)):
+def get_categories(household_id: int = Depends(current_household_id), db: Session = Depends(get_db)):
     """Get all categories for the household."""
     try:
-        # 田中家のhousehold_id=1のカテゴリを取得
-        result = db.execute(select(Category).where(Category.household_id == 1, Category.is_active == True))
+        result = db.execute(select(Category).where(Category.household_id == household_id, Category.is_active == True))
         categories = result.scalars().all()
 
         categories_data = []
@@ -37,6 +52,7 @@ def get_categories(db: Session = Depends(get_db)):
                 "id": category.id,
                 "name": category.name,
                 "type": "expense" if category.parent_id is None else "income",  # 簡易的な判定
+                "parent_id": category.parent_id,
                 "household_id": category.household_id
             })
 
@@ -47,25 +63,38 @@ def get_categories(db: Session = Depends(get_db)):
 
 
 @router.post("/")
-def create_category(category_data: CategoryCreate, db: Session = Depends(get_db)):
+def create_category(
+    category_data: CategoryCreate,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Create a new category."""
     try:
+        _get_parent(db, category_data.parent_id, household_id)
+
         new_category = Category(
             name=category_data.name,
-            household_id=category_data.household_id,
-            parent_id=None,  # 基本的にすべて親カテゴリとして作成
+            household_id=household_id,
+            parent_id=category_data.parent_id,
             is_active=True
         )
 
         db.add(new_category)
+        db.flush()
+
+        # クロージャテーブルに追加
+        category_tree.insert_node(db, new_category.id, new_category.parent_id)
         db.commit()
 
         return {
             "id": new_category.id,
             "name": new_category.name,
             "type": category_data.type,
+            "parent_id": new_category.parent_id,
             "household_id": new_category.household_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logger.error("Error creating category: %s", str(e))
@@ -73,23 +102,39 @@ def create_category(category_data: CategoryCreate, db: Session = Depends(get_db)
 
 
 @router.put("/{category_id}")
-def update_category(category_id: int, category_data: CategoryUpdate, db: Session = Depends(get_db)):
+def update_category(
+    category_id: int,
+    category_data: CategoryUpdate,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Update a category."""
     try:
         category = db.execute(
-            select(Category).where(Category.id == category_id, Category.household_id == 1)
+            select(Category).where(Category.id == category_id, Category.household_id == household_id)
         ).scalar_one_or_none()
 
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
 
         category.name = category_data.name
+
+        # 親が指定された場合はサブツリーごと付け替える（循環は拒否）
+        if "parent_id" in category_data.model_fields_set and category_data.parent_id != category.parent_id:
+            _get_parent(db, category_data.parent_id, category.household_id)
+            try:
+                category_tree.move_subtree(db, category.id, category_data.parent_id)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            category.parent_id = category_data.parent_id
+
         db.commit()
 
         return {
             "id": category.id,
             "name": category.name,
             "type": category_data.type,
+            "parent_id": category.parent_id,
             "household_id": category.household_id
         }
     except HTTPException:
@@ -101,17 +146,27 @@ def update_category(category_id: int, category_data: CategoryUpdate, db: Session
 
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db)):
+def delete_category(
+    category_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Delete a category (soft delete)."""
     try:
         category = db.execute(
-            select(Category).where(Category.id == category_id, Category.household_id == 1)
+            select(Category).where(Category.id == category_id, Category.household_id == household_id)
         ).scalar_one_or_none()
 
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
 
         category.is_active = False
+
+        # 子カテゴリは削除したカテゴリの親に付け替える（過去の取引は引き続き親に集計される）
+        for child_id in category_tree.get_children(db, category.id):
+            category_tree.move_subtree(db, child_id, category.parent_id)
+            db.execute(update(Category).where(Category.id == child_id).values(parent_id=category.parent_id))
+
         db.commit()
 
         return {"message": "Category deleted successfully"}
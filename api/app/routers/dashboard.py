@@ -0,0 +1,252 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Callable, Hashable, Optional, Tuple
+import asyncio
+import logging
+import threading
+
+from app.database import SessionLocal
+from app.models import Account, Budget, Category, CategoryClosure, Transaction, TransactionType
+from app import category_tree, data_version
+from app.money import to_major
+from app.settings import settings
+from app.tenancy import current_household_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class PayloadCache:
+    """Small LRU of computed payloads keyed by (household, parameters, data version)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key: Hashable, payload: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+DASHBOARD_CACHE = PayloadCache(settings.DASHBOARD_CACHE_SIZE)
+
+
+def _month_range(month: str) -> Tuple[date, date]:
+    """First day of ``month`` (YYYYMM) and of the month after."""
+    start = datetime.strptime(month, "%Y%m").date()
+    end = date(start.year + 1, 1, 1) if start.month == 12 else date(start.year, start.month + 1, 1)
+    return start, end
+
+
+def _totals(db: Session, household_id: int, start: date, end: date) -> dict:
+    result = db.execute(
+        select(Transaction.type, func.sum(Transaction.amount_total), func.count())
+        .where(Transaction.household_id == household_id, Transaction.date >= start, Transaction.date < end)
+        .group_by(Transaction.type)
+    )
+    sums = {TransactionType(type_).value: (int(total or 0), count) for type_, total, count in result}
+    income = sums.get("income", (0, 0))[0]
+    expense = sums.get("expense", (0, 0))[0]
+    return {
+        "income": to_major(income),
+        "expense": to_major(expense),
+        "balance": to_major(income - expense),
+        "transaction_count": sum(count for _, count in sums.values()),
+    }
+
+
+def _budget_progress(db: Session, household_id: int, month: str, start: date, end: date) -> list:
+    budget_data = db.execute(
+        select(Budget, Category)
+        .join(Category, Budget.category_id == Category.id)
+        .where(Budget.household_id == household_id, Budget.month == month)
+    ).all()
+
+    spent_by_category = category_tree.rollup_totals(
+        db,
+        [category.id for _, category in budget_data],
+        Transaction.household_id == household_id,
+        Transaction.type == TransactionType.expense,
+        Transaction.date >= start,
+        Transaction.date < end
+    )
+
+    budgets = []
+    for budget, category in budget_data:
+        spent = spent_by_category.get(category.id, 0)
+        limit = budget.amount_limit
+        budgets.append({
+            "id": budget.id,
+            "category_id": category.id,
+            "category_name": category.name,
+            "amount_limit": to_major(limit),
+            "amount_spent": to_major(spent),
+            "amount_remaining": to_major(limit - spent),
+            "percentage": round((spent / limit * 100) if limit > 0 else 0, 1),
+            "month": month
+        })
+    return budgets
+
+
+def _recent_transactions(db: Session, household_id: int, limit: int) -> list:
+    result = db.execute(
+        select(
+            Transaction.id, Transaction.date, Transaction.type, Transaction.amount_total, Transaction.memo,
+            Account.id, Account.name, Category.id, Category.name
+        )
+        .outerjoin(Account, Account.id == Transaction.account_id)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .where(Transaction.household_id == household_id)
+        .order_by(Transaction.date.desc(), Transaction.created_at.desc())
+        .limit(limit)
+    )
+    return [
+        {
+            "id": transaction_id,
+            "date": transaction_date.isoformat(),
+            "type": TransactionType(type_).value,
+            "amount_total": to_major(amount_total),
+            "memo": memo,
+            "account": {"id": account_id, "name": account_name} if account_id else None,
+            "category": {"id": category_id, "name": category_name} if category_id else None,
+        }
+        for (transaction_id, transaction_date, type_, amount_total, memo,
+             account_id, account_name, category_id, category_name) in result
+    ]
+
+
+def _category_breakdown(db: Session, household_id: int, start: date, end: date) -> list:
+    # 支出を最上位カテゴリ（親なし）ごとに子孫込みで集計
+    total = func.sum(Transaction.amount_total)
+    result = db.execute(
+        select(Category.id, Category.name, total)
+        .select_from(Transaction)
+        .join(CategoryClosure, CategoryClosure.descendant_id == Transaction.category_id)
+        .join(Category, Category.id == CategoryClosure.ancestor_id)
+        .where(
+            Category.parent_id.is_(None),
+            Transaction.household_id == household_id,
+            Transaction.type == TransactionType.expense,
+            Transaction.date >= start,
+            Transaction.date < end
+        )
+        .group_by(Category.id, Category.name)
+        .order_by(total.desc())
+    ).all()
+    totals = [(category_id, name, int(amount)) for category_id, name, amount in result]
+    grand_total = sum(amount for _, _, amount in totals)
+    return [
+        {
+            "category_id": category_id,
+            "category_name": name,
+            "amount": to_major(amount),
+            "percentage": round(amount / grand_total * 100, 1) if grand_total else 0.0
+        }
+        for category_id, name, amount in totals
+    ]
+
+
+def _etag(household_id: int, month: str, recent: int, version: int) -> str:
+    return f'W/"dashboard-{household_id}-{month}-{recent}-{version}"'
+
+
+def _version(household_id: int) -> int:
+    with SessionLocal() as db:
+        return data_version.current_version(db, household_id) or 0
+
+
+def _query(household_id: int, fn: Callable, *args) -> Tuple[int, object]:
+    """
+    Run one dashboard query in its own session (and pooled connection).
+
+    The household's data version is read first in the same session: when reads
+    go to a replica, the result is at least as new as that version.
+    """
+    with SessionLocal() as db:
+        version = data_version.current_version(db, household_id) or 0
+        return version, fn(db, household_id, *args)
+
+
+@router.get("/")
+async def get_dashboard(
+    request: Request,
+    month: Optional[str] = Query(None, description="YYYYMM"),
+    recent: int = Query(10, ge=1, le=50, description="Number of recent transactions"),
+    household_id: int = Depends(current_household_id)
+):
+    """
+    Dashboard summary in one round trip: the month's totals, budget progress,
+    recent transactions and expense breakdown by top-level category.
+
+    The four parts are queried concurrently, each on its own pooled
+    connection. The payload is cached per household data version and carries
+    a matching ETag, so an unchanged dashboard is answered with 304 or from
+    memory without touching the data. When a part was read from a replica
+    that lags the household's version, the response carries the oldest
+    version any part saw, so revalidation fetches the dashboard again instead
+    of getting 304 for data it never had.
+    """
+    try:
+        month = month or datetime.now().strftime("%Y%m")
+        try:
+            start, end = _month_range(month)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid month format. Use YYYYMM")
+
+        version = await run_in_threadpool(_version, household_id)
+        headers = {"ETag": _etag(household_id, month, recent, version), "Cache-Control": "private, no-cache"}
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+
+        key = (household_id, month, recent, version)
+        payload = DASHBOARD_CACHE.get(key)
+        if payload is None:
+            results = await asyncio.gather(
+                run_in_threadpool(_query, household_id, _totals, start, end),
+                run_in_threadpool(_query, household_id, _budget_progress, month, start, end),
+                run_in_threadpool(_query, household_id, _recent_transactions, recent),
+                run_in_threadpool(_query, household_id, _category_breakdown, start, end),
+            )
+            (totals, budgets, recent_transactions, breakdown) = [result for _, result in results]
+            # 各部分が読んだバージョンのうち最も古いもの（遅れたレプリカから読んだ部分があれば version 未満）
+            served = min(version, *(seen for seen, _ in results))
+            payload = {
+                "month": month,
+                "version": served,
+                "totals": totals,
+                "budgets": budgets,
+                "recent_transactions": recent_transactions,
+                "category_breakdown": breakdown
+            }
+            if served == version:
+                DASHBOARD_CACHE.put(key, payload)
+            else:
+                # 古い部分を含む応答に version の ETag を付けると、次の書き込みまで 304 で古いまま残る
+                headers["ETag"] = _etag(household_id, month, recent, served)
+
+        return JSONResponse(content=payload, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building dashboard: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
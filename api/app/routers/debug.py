@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Query
+import logging
+
+from app.slow_queries import SLOW_QUERY_LOG
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """
+    Get recently recorded slow queries, newest first.
+
+    Each entry has the normalized statement, duration, row count, route and a
+    sampled EXPLAIN plan (null until the background EXPLAIN has finished).
+    """
+    entries = SLOW_QUERY_LOG.snapshot(limit)
+    return {
+        "threshold_ms": SLOW_QUERY_LOG.threshold * 1000,
+        "count": len(entries),
+        "entries": entries
+    }
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries():
+    """Clear the slow query buffer and cached plans."""
+    SLOW_QUERY_LOG.clear()
+    return {"message": "Slow query log cleared"}
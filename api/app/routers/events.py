@@ -0,0 +1,164 @@
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+
+from app.database import SessionLocal, current_household, read_from_replica
+from app.events import BROKER
+from app.models import Budget, Household, SyncTombstone, Transaction
+from app.settings import settings
+from app.sync import make_token, parse_token
+from app.tenancy import current_household_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _format(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _head(household_id: int) -> Tuple[int, int]:
+    """(sync epoch, data version) of the household, read from the primary."""
+    read_from_replica.set(False)
+    current_household.set(household_id)
+    with SessionLocal() as db:
+        return db.execute(
+            select(Household.sync_epoch, Household.data_version).where(Household.id == household_id)
+        ).one()
+
+
+def _changes_between(household_id: int, since: int, live: Dict[int, List[dict]]) -> Tuple[int, List[tuple]]:
+    """
+    Changes committed after version ``since`` as (version, changes) pairs in
+    version order, plus the version they reach.
+
+    Versions published in-process (``live``) keep their exact event types; the
+    others are rebuilt from the sync tables, where a created transaction cannot
+    be told from an updated one and is reported as ``transaction.updated``.
+    """
+    read_from_replica.set(False)
+    current_household.set(household_id)
+    with SessionLocal() as db:
+        version = db.execute(select(Household.data_version).where(Household.id == household_id)).scalar()
+        if version <= since:
+            return since, []
+
+        rebuilt: Dict[int, List[dict]] = {}
+        in_range = [Transaction.sync_version > since, Transaction.sync_version <= version]
+        for transaction_id, sync_version in db.execute(
+            select(Transaction.id, Transaction.sync_version)
+            .where(Transaction.household_id == household_id, *in_range)
+        ):
+            rebuilt.setdefault(sync_version, []).append({"type": "transaction.updated", "id": transaction_id})
+        for budget_id, month, category_id, sync_version in db.execute(
+            select(Budget.id, Budget.month, Budget.category_id, Budget.sync_version)
+            .where(Budget.household_id == household_id, Budget.sync_version > since, Budget.sync_version <= version)
+        ):
+            rebuilt.setdefault(sync_version, []).append(
+                {"type": "budget.changed", "id": budget_id, "month": month, "category_id": category_id}
+            )
+        for entity, entity_id, sync_version in db.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id, SyncTombstone.sync_version)
+            .where(SyncTombstone.household_id == household_id, SyncTombstone.entity.in_(("transactions", "budgets")),
+                   SyncTombstone.sync_version > since, SyncTombstone.sync_version <= version)
+            .order_by(SyncTombstone.id)
+        ):
+            change = ({"type": "transaction.deleted", "id": entity_id} if entity == "transactions"
+                      else {"type": "budget.changed", "id": entity_id, "deleted": True})
+            rebuilt.setdefault(sync_version, []).append(change)
+
+    rebuilt.update({v: changes for v, changes in live.items() if since < v <= version})
+    return version, sorted(rebuilt.items())
+
+
+async def _stream(request: Request, household_id: int, last_event_id: Optional[str]) -> AsyncIterator[str]:
+    subscription = BROKER.subscribe(household_id)
+    try:
+        epoch, cursor = await run_in_threadpool(_head, household_id)
+        yield f"retry: {settings.SSE_RETRY_MS}\n\n"
+
+        opening, resume_from = "ready", None
+        if last_event_id:
+            try:
+                last_epoch, last_version = parse_token(last_event_id)
+            except ValueError:
+                last_epoch, last_version = None, None
+            if (last_epoch == epoch and last_version <= cursor
+                    and cursor - last_version <= settings.SSE_MAX_REPLAY_VERSIONS):
+                opening, resume_from = None, last_version
+            else:
+                # 続きから送れない: クライアントは一覧を取り直す
+                opening = "resync"
+        if opening is None:
+            cursor = resume_from
+        else:
+            yield _format(opening, {"version": cursor}, make_token(epoch, cursor))
+
+        live: Dict[int, List[dict]] = {}
+        check_database = resume_from is not None
+        while True:
+            if check_database or subscription.overflowed:
+                # このプロセスが見ていない版（他のワーカー、キューあふれ、再接続前）を DB から補完
+                subscription.overflowed = False
+                reached, batches = await run_in_threadpool(_changes_between, household_id, cursor, live)
+                for version, changes in batches:
+                    yield _format("change", {"version": version, "changes": changes}, make_token(epoch, version))
+                cursor = max(cursor, reached)
+                live = {v: changes for v, changes in live.items() if v > cursor}
+
+            try:
+                version, changes = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+                check_database = True
+                continue
+
+            live[version] = changes
+            while not subscription.queue.empty():
+                version, changes = subscription.queue.get_nowait()
+                live[version] = changes
+            # 直前の版に続く分はそのまま送り、間があれば次の周で DB から補完する
+            while cursor + 1 in live:
+                cursor += 1
+                yield _format("change", {"version": cursor, "changes": live.pop(cursor)}, make_token(epoch, cursor))
+            live = {v: changes for v, changes in live.items() if v > cursor}
+            check_database = bool(live)
+    finally:
+        BROKER.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    household_id: int = Depends(current_household_id)
+):
+    """
+    Server-sent events with the household's committed changes.
+
+    Each ``change`` event carries one commit: ``{"version": n, "changes":
+    [{"type": "transaction.created", "id": 1}, {"type": "budget.changed",
+    ...}]}``. Its id is the sync token of that version, so a reconnecting
+    ``EventSource`` resumes after the last event it received (and the id can
+    be passed to ``/api/sync/changes?since=``). ``ready`` starts a fresh
+    stream; ``resync`` means the missed changes cannot be replayed and the
+    client should refetch. A comment line is sent every
+    ``SSE_HEARTBEAT_SECONDS``.
+    """
+    return StreamingResponse(
+        _stream(request, household_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,40 +1,229 @@
-from fastapi import APIRouter, UploadFile, File, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
 import logging
+import os
+import tempfile
+import uuid
+
+from app import csv_files, receipts, snapshots  # noqa: F401 （ジョブの種類を登録する）
+from app.database import get_db, read_from_replica
+from app.jobs import JOB_RUNNER, JobQueueFull
+from app.lazy import OptionalDependencyError, optional_import
+from app.models import Job, JobStatus, Receipt, Transaction
+from app.settings import settings
+from app.tenancy import current_household_id
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+UPLOAD_CHUNK = 1024 * 1024
+
+
+def _check_range(from_date: Optional[str], to_date: Optional[str]) -> None:
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d").date() if from_date else None
+        end = datetime.strptime(to_date, "%Y-%m-%d").date() if to_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="from_date must not be after to_date")
+
+
+async def _submit(household_id: int, job_type: str, params: dict) -> dict:
+    """Queue a job and answer like the other job endpoints (202 with the job id)."""
+    try:
+        job_id = await JOB_RUNNER.submit(household_id, job_type, params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    return {"job_id": job_id, "status": JobStatus.queued.value, "status_url": f"/api/jobs/{job_id}"}
+
+
+def _store_receipt(db: Session, household_id: int, transaction_id: int, filename: str, mime_type: str,
+                   content: bytes) -> Tuple[int, str]:
+    transaction = db.execute(
+        select(Transaction).where(Transaction.id == transaction_id, Transaction.household_id == household_id)
+    ).scalar_one_or_none()
+    if transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
 
-@router.post("/receipts")
-async def upload_receipt(file: UploadFile = File(...)):
-    """Upload receipt image."""
-    # TODO: Implement receipt upload with validation
-    return {"message": "Receipt uploaded", "filename": file.filename}
+    directory = Path(settings.UPLOAD_DIR) / f"household={household_id}"
+    directory.mkdir(parents=True, exist_ok=True)
+    storage_path = directory / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+    storage_path.write_bytes(content)
+    try:
+        receipt = Receipt(transaction_id=transaction_id, filename=filename, mime_type=mime_type,
+                          size=len(content), storage_path=str(storage_path), created_at=datetime.now())
+        db.add(receipt)
+        transaction.has_receipt = True
+        transaction.updated_at = datetime.now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        storage_path.unlink(missing_ok=True)
+        raise
+    return receipt.id, str(storage_path)
 
 
-@router.get("/exports/transactions/csv")
+@router.post("/receipts", status_code=202)
+async def upload_receipt(
+    transaction_id: int = Query(..., description="Transaction the receipt belongs to"),
+    file: UploadFile = File(...),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Store a receipt image (or PDF) for a transaction; rotating and
+    thumbnailing it runs as a ``receipt_processing`` job.
+    """
+    try:
+        extension = Path(file.filename or "").suffix.lower().lstrip(".")
+        if extension not in settings.ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400, detail=f"File type not allowed. Use {', '.join(settings.ALLOWED_EXTENSIONS)}"
+            )
+        limit = settings.MAX_UPLOAD_MB * 1024 * 1024
+        content = await file.read(limit + 1)
+        if len(content) > limit:
+            raise HTTPException(status_code=413, detail=f"File too large (max {settings.MAX_UPLOAD_MB} MB)")
+
+        receipt_id, storage_path = await run_in_threadpool(
+            _store_receipt, db, household_id, transaction_id, file.filename,
+            file.content_type or "application/octet-stream", content
+        )
+        job = await _submit(household_id, "receipt_processing", {"storage_path": storage_path})
+        return {"receipt_id": receipt_id, **job}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error uploading receipt: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/exports/transactions/csv", status_code=202)
 async def export_transactions_csv(
     from_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    to_date: Optional[str] = Query(None, description="YYYY-MM-DD")
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    household_id: int = Depends(current_household_id)
+):
+    """
+    Start a CSV export of the household's transactions. Poll
+    ``GET /api/jobs/{job_id}``, then fetch ``GET /exports/{job_id}/download``.
+    """
+    try:
+        _check_range(from_date, to_date)
+        return await _submit(household_id, "csv_export", {"from_date": from_date, "to_date": to_date})
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error starting CSV export: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/exports/{job_id}/download")
+def download_export(
+    job_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
 ):
-    """Export transactions to CSV."""
-    # TODO: Implement CSV export
-    return {"message": "CSV export", "from_date": from_date, "to_date": to_date}
+    """Download the CSV written by a finished ``csv_export`` job."""
+    try:
+        read_from_replica.set(False)
+        job = db.execute(
+            select(Job).where(Job.id == job_id, Job.household_id == household_id, Job.type == "csv_export")
+        ).scalar_one_or_none()
+        if job is None:
+            raise HTTPException(status_code=404, detail="Export not found")
+        if job.status != JobStatus.succeeded:
+            raise HTTPException(status_code=409, detail=f"Export is {JobStatus(job.status).value}")
+        path = csv_files.export_path(household_id, job_id)
+        if not path.exists():
+            raise HTTPException(status_code=410, detail="Export file is no longer available")
+
+        return FileResponse(
+            path, media_type="text/csv; charset=utf-8",
+            filename=f"transactions_{job.created_at.strftime('%Y%m%d')}.csv"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error downloading export: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def _save_upload(file: UploadFile) -> str:
+    descriptor, path = tempfile.mkstemp(prefix="import_", suffix=".csv")
+    with os.fdopen(descriptor, "wb") as f:
+        while chunk := file.file.read(UPLOAD_CHUNK):
+            f.write(chunk)
+    return path
 
 
-@router.post("/imports/transactions/csv")
+@router.post("/imports/transactions/csv", status_code=202)
 async def import_transactions_csv(
     file: UploadFile = File(...),
-    dry_run: bool = Query(True, description="Preview without saving")
+    dry_run: bool = Query(True, description="Preview without saving"),
+    household_id: int = Depends(current_household_id)
 ):
-    """Import transactions from CSV."""
-    # TODO: Implement CSV import with validation
-    return {
-        "message": "CSV import processed",
-        "filename": file.filename,
-        "dry_run": dry_run,
-        "errors": [],
-        "imported": 0
-    }
+    """
+    Start a CSV import (the export's format). Every row is validated first;
+    the job result lists the errors, and nothing is saved if there are any.
+    """
+    try:
+        path = await run_in_threadpool(_save_upload, file)
+        try:
+            return await _submit(household_id, "csv_import", {"path": path, "dry_run": dry_run})
+        except HTTPException:
+            Path(path).unlink(missing_ok=True)
+            raise
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error starting CSV import: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/exports/parquet", status_code=202)
+async def export_parquet_snapshot(
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: first transaction)"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: last transaction)"),
+    household_id: int = Depends(current_household_id)
+):
+    """
+    Start writing the household's transactions and items to Parquet snapshots
+    partitioned by year/month (whole months covering the range) for analytics.
+    """
+    try:
+        _check_range(from_date, to_date)
+        optional_import("pyarrow.parquet", "Parquet snapshots")  # 未インストールならジョブを積む前に 503
+        return await _submit(household_id, "parquet_snapshot", {"from_date": from_date, "to_date": to_date})
+
+    except HTTPException:
+        raise
+    except OptionalDependencyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Error starting Parquet snapshot: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/exports/parquet")
+def list_parquet_snapshots(household_id: int = Depends(current_household_id)):
+    """List the household's Parquet snapshot partitions with row counts and data versions."""
+    try:
+        return {"partitions": snapshots.list_partitions(household_id)}
+    except OptionalDependencyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Error listing Parquet snapshots: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Optional
+import logging
+
+from app.database import get_db, read_from_replica
+from app.jobs import serialize
+from app.models import Job
+from app.tenancy import current_household_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/")
+def get_jobs(
+    type: Optional[str] = Query(None, description="Job type (e.g. csv_export)"),
+    limit: int = Query(20, ge=1, le=100),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """The household's most recent jobs, newest first."""
+    try:
+        query = select(Job).where(Job.household_id == household_id)
+        if type:
+            query = query.where(Job.type == type)
+        jobs = db.execute(query.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit)).scalars().all()
+        return {"jobs": [serialize(job) for job in jobs]}
+
+    except Exception as e:
+        logger.error("Error fetching jobs: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/{job_id}")
+def get_job(
+    job_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """Status, progress and (once finished) result or error of a job."""
+    try:
+        # ジョブ行は主 DB に書かれるので、ポーリングがレプリカの遅れを見ないよう主から読む
+        read_from_replica.set(False)
+        job = db.execute(
+            select(Job).where(Job.id == job_id, Job.household_id == household_id)
+        ).scalar_one_or_none()
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return serialize(job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error fetching job: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
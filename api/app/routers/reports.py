@@ -1,35 +1,248 @@
-from fastapi import APIRouter, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
 import logging
 
+from app import snapshots
+from app.column_store import (
+    COLUMN_STORE, NO_CATEGORY, TYPE_CODES, month_key, month_of_key, week_key, week_of_key
+)
+from app.database import get_db
+from app.models import Category, CategoryClosure, TransactionType, User
+from app.money import allocate, to_major
+from app.tenancy import current_household_id
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+INCOME = TYPE_CODES[TransactionType.income]
+EXPENSE = TYPE_CODES[TransactionType.expense]
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format. Use YYYY-MM-DD")
+
+
+def _date_range(from_date: Optional[str], to_date: Optional[str], default_from) -> Tuple[date, date]:
+    """Inclusive (from, to) with defaults: ``default_from(to)`` and today."""
+    end = _parse_date(to_date, "to_date") or date.today()
+    start = _parse_date(from_date, "from_date") or default_from(end)
+    if start > end:
+        raise HTTPException(status_code=400, detail="from_date must not be after to_date")
+    return start, end
+
+
+def _top_level_categories(db: Session, household_id: int) -> Dict[int, Tuple[int, str]]:
+    """Category id -> (top-level category id, name), via the closure table."""
+    result = db.execute(
+        select(CategoryClosure.descendant_id, Category.id, Category.name)
+        .join(Category, Category.id == CategoryClosure.ancestor_id)
+        .where(Category.household_id == household_id, Category.parent_id.is_(None))
+    )
+    return {descendant_id: (category_id, name) for descendant_id, category_id, name in result}
+
 
 @router.get("/monthly")
-async def get_monthly_report(month: Optional[str] = Query(None, description="YYYYMM")):
-    """Get monthly spending summary."""
-    # TODO: Implement monthly report
-    return {"month": month, "total_income": 0, "total_expenses": 0, "categories": []}
+def get_monthly_report(
+    month: Optional[str] = Query(None, description="YYYYMM"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """Monthly income and expense totals with expenses by top-level category."""
+    try:
+        month = month or datetime.now().strftime("%Y%m")
+        try:
+            start = datetime.strptime(month, "%Y%m").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid month format. Use YYYYMM")
+        end = month_of_key(month_key(start) + 1)
+
+        columns = COLUMN_STORE.get(db, household_id)
+        by_type = columns.group_sum(("type",), start=start, end=end)
+        by_category = columns.group_sum(("category",), start=start, end=end, types=[TransactionType.expense])
+
+        # 子カテゴリの支出は最上位カテゴリにまとめる（ダッシュボードと同じ）
+        top_level = _top_level_categories(db, household_id)
+        categories: Dict[Optional[int], dict] = {}
+        for (category_id,), (amount, count) in by_category.items():
+            top_id, name = top_level.get(category_id, (None, None)) if category_id != NO_CATEGORY else (None, None)
+            entry = categories.setdefault(top_id, {"category_id": top_id, "category_name": name, "amount": 0, "count": 0})
+            entry["amount"] += amount
+            entry["count"] += count
+
+        income = by_type.get((INCOME,), (0, 0))[0]
+        expense = by_type.get((EXPENSE,), (0, 0))[0]
+        return {
+            "month": month,
+            "total_income": to_major(income),
+            "total_expenses": to_major(expense),
+            "balance": to_major(income - expense),
+            "transaction_count": sum(count for _, count in by_type.values()),
+            "categories": [
+                {**entry, "amount": to_major(entry["amount"]),
+                 "percentage": round(entry["amount"] / expense * 100, 1) if expense else 0.0}
+                for entry in sorted(categories.values(), key=lambda entry: -entry["amount"])
+            ],
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building monthly report: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("/trend")
-async def get_trend_report(
-    from_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    to_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    group_by: str = Query("month", description="month or week")
+def get_trend_report(
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: 12 months up to to_date)"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: today)"),
+    group_by: str = Query("month", description="month or week"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
 ):
-    """Get spending trend over time."""
-    # TODO: Implement trend report
-    return {"from_date": from_date, "to_date": to_date, "group_by": group_by, "data": []}
+    """Income, expense and balance per month or week (Monday start), including empty periods."""
+    try:
+        if group_by not in ("month", "week"):
+            raise HTTPException(status_code=400, detail="group_by must be 'month' or 'week'")
+        start, end = _date_range(from_date, to_date, lambda end: month_of_key(month_key(end) - 11))
+
+        columns = COLUMN_STORE.get(db, household_id)
+        sums = columns.group_sum(
+            (group_by, "type"), start=start, end=end + timedelta(days=1),
+            types=[TransactionType.income, TransactionType.expense]
+        )
+
+        key_of, date_of = (month_key, month_of_key) if group_by == "month" else (week_key, week_of_key)
+        data = []
+        for period in range(key_of(start), key_of(end) + 1):
+            income = sums.get((period, INCOME), (0, 0))[0]
+            expense = sums.get((period, EXPENSE), (0, 0))[0]
+            period_start = date_of(period)
+            data.append({
+                "period": period_start.strftime("%Y-%m") if group_by == "month" else period_start.isoformat(),
+                "income": to_major(income),
+                "expense": to_major(expense),
+                "balance": to_major(income - expense),
+            })
+
+        return {"from_date": start.isoformat(), "to_date": end.isoformat(), "group_by": group_by, "data": data}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building trend report: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("/split")
-async def get_split_report(
-    from_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    to_date: Optional[str] = Query(None, description="YYYY-MM-DD")
+def get_split_report(
+    from_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: start of to_date's month)"),
+    to_date: Optional[str] = Query(None, description="YYYY-MM-DD (default: today)"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Expense split between users: what each paid, their share (the payer's
+    ``split_ratio_payer`` of each expense, the rest shared equally by the other
+    users) and the balance (positive: the others owe this user).
+    """
+    try:
+        start, end = _date_range(from_date, to_date, lambda end: end.replace(day=1))
+
+        columns = COLUMN_STORE.get(db, household_id)
+        filters = {"start": start, "end": end + timedelta(days=1), "types": [TransactionType.expense]}
+        paid = {payer: amount for (payer,), (amount, _) in columns.group_sum(("payer",), **filters).items()}
+        payer_share = {payer: amount for (payer,), (amount, _) in
+                       columns.group_sum(("payer",), value="payer_share", **filters).items()}
+
+        users = db.execute(
+            select(User.id, User.name, User.is_active).where(User.household_id == household_id).order_by(User.id)
+        ).all()
+        user_ids = [user_id for user_id, _, is_active in users if is_active or user_id in paid]
+        # 各支払いのうち支払者の負担分を除いた残りを、支払者以外で等分する
+        # （端数は最大剰余法で配り、負担額の合計が支出合計と一致するようにする）
+        remainder = {user_id: paid.get(user_id, 0) - payer_share.get(user_id, 0) for user_id in user_ids}
+        total_remainder = sum(remainder.values())
+        owed = dict(zip(user_ids, allocate(total_remainder, [total_remainder - remainder[user_id]
+                                                              for user_id in user_ids])))
+
+        result = []
+        for user_id, name, _ in users:
+            if user_id not in user_ids:
+                continue
+            user_paid = paid.get(user_id, 0)
+            share = payer_share.get(user_id, 0) + owed[user_id] if len(user_ids) > 1 else user_paid
+            result.append({
+                "user_id": user_id,
+                "name": name,
+                "paid": to_major(user_paid),
+                "share": to_major(share),
+                "balance": to_major(user_paid - share),
+            })
+
+        return {
+            "from_date": start.isoformat(),
+            "to_date": end.isoformat(),
+            "total_expenses": to_major(sum(paid.values())),
+            "users": result,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building split report: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/year-over-year")
+def get_year_over_year_report(
+    year: Optional[int] = Query(None, ge=1900, le=9999, description="YYYY (default: this year)"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
 ):
-    """Get expense split analysis between users."""
-    # TODO: Implement split report
-    return {"from_date": from_date, "to_date": to_date, "users": []}
+    """
+    Income and expense per month of ``year`` next to the same month of the
+    year before. Months with a current Parquet snapshot are read from it
+    (``app.snapshots.monthly_totals``); the rest are summed in the database.
+    """
+    try:
+        year = year or date.today().year
+        sums, snapshot_months = snapshots.monthly_totals(db, household_id, date(year - 1, 1, 1), date(year, 12, 31))
+
+        def totals(of_year: int, month: int) -> Tuple[int, int]:
+            return sums.get((of_year, month, "income"), 0), sums.get((of_year, month, "expense"), 0)
+
+        months = []
+        for month in range(1, 13):
+            income, expense = totals(year, month)
+            previous_income, previous_expense = totals(year - 1, month)
+            months.append({
+                "month": f"{year:04d}-{month:02d}",
+                "income": to_major(income),
+                "expense": to_major(expense),
+                "previous_income": to_major(previous_income),
+                "previous_expense": to_major(previous_expense),
+                "expense_change": (round((expense - previous_expense) / previous_expense * 100, 1)
+                                   if previous_expense else None),
+            })
+
+        return {
+            "year": year,
+            "previous_year": year - 1,
+            "months": months,
+            "snapshot_months": [f"{snapshot_year:04d}-{month:02d}" for snapshot_year, month in snapshot_months],
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error building year-over-year report: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
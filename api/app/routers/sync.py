@@ -0,0 +1,113 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+import enum
+import logging
+
+from app.database import get_db, read_from_replica
+from app.models import Household, SyncTombstone, Transaction, TransactionItem
+from app.sync import SYNCED_MODELS, make_token, parse_token
+from app.tenancy import current_household_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _serialize(rows, columns) -> list:
+    names = [column.name for column in columns]
+    return [dict(zip(names, (_json_value(value) for value in row))) for row in rows]
+
+
+def _columns(model) -> list:
+    return [column for column in model.__table__.columns if column.name != "household_id"]
+
+
+@router.get("/changes")
+def get_changes(
+    since: Optional[str] = Query(None, description="Token of the previous sync; omit for a full snapshot"),
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Accounts, categories, budgets, transactions and items created, updated or
+    deleted since the ``since`` token, plus the token for the next call.
+
+    Without ``since`` every row is returned (``full: true``). Items are sent as
+    the complete item list of each changed transaction. Deleted ids are listed
+    under ``deleted``; soft-deleted accounts and categories come back as rows
+    with ``is_active: false``. A token from before a household move or restore
+    is answered with 410, and the client starts over with a full snapshot.
+    """
+    try:
+        # トークンは主 DB のバージョン。遅れたレプリカから読むと新しいトークンを 410 で捨ててしまう
+        read_from_replica.set(False)
+        epoch, version = db.execute(
+            select(Household.sync_epoch, Household.data_version).where(Household.id == household_id)
+        ).one()
+
+        since_version = None
+        if since:
+            try:
+                since_epoch, since_version = parse_token(since)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid sync token")
+            if since_epoch != epoch or since_version > version:
+                raise HTTPException(status_code=410, detail="Sync token expired; fetch a full snapshot")
+
+        # 読んだバージョンまでに区切る（それより後の変更は次回の同期で返す）
+        def changed(model):
+            criteria = [model.household_id == household_id, model.sync_version <= version]
+            if since_version is not None:
+                criteria.append(model.sync_version > since_version)
+            return criteria
+
+        payload = {"token": make_token(epoch, version), "full": since_version is None}
+        for name, model in SYNCED_MODELS.items():
+            columns = _columns(model)
+            payload[name] = _serialize(
+                db.execute(select(*columns).where(*changed(model)).order_by(model.id)), columns
+            )
+
+        item_columns = list(TransactionItem.__table__.columns)
+        payload["items"] = _serialize(
+            db.execute(
+                select(*item_columns)
+                .join(Transaction, Transaction.id == TransactionItem.transaction_id)
+                .where(*changed(Transaction))
+                .order_by(TransactionItem.transaction_id, TransactionItem.id)
+            ),
+            item_columns
+        )
+
+        deleted = {name: [] for name in (*SYNCED_MODELS, "items")}
+        if since_version is not None:
+            tombstones = db.execute(
+                select(SyncTombstone.entity, SyncTombstone.entity_id)
+                .where(*changed(SyncTombstone))
+                .order_by(SyncTombstone.sync_version, SyncTombstone.id)
+            )
+            for entity, entity_id in tombstones:
+                deleted.setdefault(entity, []).append(entity_id)
+        payload["deleted"] = deleted
+
+        return payload
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error fetching sync changes: %s", str(e))
+        raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,20 +1,224 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from typing import Optional
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, func, distinct
+from typing import Dict, List, Optional
 from datetime import datetime
 import logging
 
 from app.database import get_db
-from app.models import Transaction, Category, Account, User, TransactionItem
+from app.models import Transaction, Category, Account, User, TransactionItem, Tag, TransactionTag, Receipt
+from app import balances
+from app.money import to_major, to_minor
+from app.tenancy import current_household_id, ensure_owned
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _tag_filter(tag_ids: List[int], tag_match: str):
+    """
+    Build a semi-join condition on transaction_tags.
+
+    ``any`` keeps transactions with at least one of the tags; ``all`` keeps
+    transactions carrying every tag, using a grouped HAVING count.
+    """
+    tagged = select(TransactionTag.transaction_id).where(TransactionTag.tag_id.in_(tag_ids))
+    if tag_match == "all":
+        tagged = tagged.group_by(TransactionTag.transaction_id).having(
+            func.count(distinct(TransactionTag.tag_id)) == len(set(tag_ids))
+        )
+    return Transaction.id.in_(tagged)
+
+
+def _load_tags(db: Session, transaction_ids: List[int]) -> Dict[int, List[dict]]:
+    """Batch-load tags for a page of transactions in one query."""
+    tags_by_transaction: Dict[int, List[dict]] = {transaction_id: [] for transaction_id in transaction_ids}
+    if not transaction_ids:
+        return tags_by_transaction
+
+    result = db.execute(
+        select(TransactionTag.transaction_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == TransactionTag.tag_id)
+        .where(TransactionTag.transaction_id.in_(transaction_ids))
+        .order_by(Tag.name)
+    )
+    for transaction_id, tag_id, tag_name in result:
+        tags_by_transaction[transaction_id].append({"id": tag_id, "name": tag_name})
+    return tags_by_transaction
+
+
+# fields= で選べる項目 -> 取得する列
+SCALAR_FIELDS = {
+    "date": Transaction.date,
+    "type": Transaction.type,
+    "amount_total": Transaction.amount_total,
+    "memo": Transaction.memo,
+    "split_ratio_payer": Transaction.split_ratio_payer,
+    "has_receipt": Transaction.has_receipt,
+    "created_at": Transaction.created_at,
+}
+# 関連エンティティ -> (モデル, 取引側の外部キー)。選ばれたものだけ外部結合する
+RELATED_FIELDS = {
+    "account": (Account, Transaction.account_id),
+    "category": (Category, Transaction.category_id),
+    "payer_user": (User, Transaction.payer_user_id),
+}
+FIELDS = ("id", "date", "type", "amount_total", "account", "category", "payer_user", "memo",
+          "split_ratio_payer", "has_receipt", "created_at")
+EXPANSIONS = ("items", "tags", "receipts")
+
+
+def _parse_list(value: Optional[str], allowed, name: str) -> Optional[List[str]]:
+    """Parse a comma-separated parameter into names in ``allowed`` order, rejecting unknown ones with 400."""
+    if value is None:
+        return None
+    names = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [part for part in names if part not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {name}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+        )
+    return [part for part in allowed if part in names]
+
+
+def _serialize_scalar(field: str, value):
+    if value is None:
+        return None
+    if field in ("date", "created_at"):
+        return value.isoformat()
+    if field == "amount_total":
+        return to_major(value)
+    if field == "split_ratio_payer":
+        return float(value)
+    return value
+
+
+def _amount(value, field: str) -> int:
+    """Parse a request amount into minor units (400 if it is not a valid amount)."""
+    try:
+        return to_minor(value)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {field}: {e}")
+
+
+def _select_fields(fields: List[str]):
+    """Build the SELECT for the requested fields: only their columns, and only the joins they need."""
+    columns = [Transaction.id.label("id")]
+    columns += [SCALAR_FIELDS[field].label(field) for field in fields if field in SCALAR_FIELDS]
+    related = []
+    for field in fields:
+        if field in RELATED_FIELDS:
+            model, foreign_key = RELATED_FIELDS[field]
+            alias = aliased(model)
+            columns += [alias.id.label(f"{field}__id"), alias.name.label(f"{field}__name")]
+            related.append((alias, foreign_key))
+
+    query = select(*columns).select_from(Transaction)
+    for alias, foreign_key in related:
+        query = query.outerjoin(alias, alias.id == foreign_key)
+    return query
+
+
+def _serialize_rows(rows, fields: List[str]) -> List[dict]:
+    transactions_data = []
+    for row in rows:
+        transaction_dict = {"id": row.id}
+        for field in fields:
+            if field in SCALAR_FIELDS:
+                transaction_dict[field] = _serialize_scalar(field, row._mapping[field])
+            elif field in RELATED_FIELDS:
+                related_id = row._mapping[f"{field}__id"]
+                transaction_dict[field] = {
+                    "id": related_id,
+                    "name": row._mapping[f"{field}__name"]
+                } if related_id is not None else None
+        transactions_data.append(transaction_dict)
+    return transactions_data
+
+
+def _load_items(db: Session, transaction_ids: List[int]) -> Dict[int, List[dict]]:
+    """Batch-load the items of a page of transactions in one query."""
+    items_by_transaction: Dict[int, List[dict]] = {transaction_id: [] for transaction_id in transaction_ids}
+    if not transaction_ids:
+        return items_by_transaction
+
+    result = db.execute(
+        select(TransactionItem.transaction_id, TransactionItem.id, TransactionItem.name, TransactionItem.amount,
+               TransactionItem.quantity, TransactionItem.unit_price)
+        .where(TransactionItem.transaction_id.in_(transaction_ids))
+        .order_by(TransactionItem.transaction_id, TransactionItem.id)
+    )
+    for transaction_id, item_id, name, amount, quantity, unit_price in result:
+        items_by_transaction[transaction_id].append({
+            "id": item_id,
+            "name": name,
+            "amount": to_major(amount),
+            "quantity": float(quantity) if quantity else None,
+            "unit_price": to_major(unit_price) if unit_price else None
+        })
+    return items_by_transaction
+
+
+def _load_receipts(db: Session, transaction_ids: List[int]) -> Dict[int, List[dict]]:
+    """Batch-load receipt metadata for a page of transactions in one query."""
+    receipts_by_transaction: Dict[int, List[dict]] = {transaction_id: [] for transaction_id in transaction_ids}
+    if not transaction_ids:
+        return receipts_by_transaction
+
+    result = db.execute(
+        select(Receipt.transaction_id, Receipt.id, Receipt.filename, Receipt.mime_type, Receipt.size,
+               Receipt.created_at)
+        .where(Receipt.transaction_id.in_(transaction_ids))
+        .order_by(Receipt.transaction_id, Receipt.id)
+    )
+    for transaction_id, receipt_id, filename, mime_type, size, created_at in result:
+        receipts_by_transaction[transaction_id].append({
+            "id": receipt_id,
+            "filename": filename,
+            "mime_type": mime_type,
+            "size": size,
+            "created_at": created_at.isoformat()
+        })
+    return receipts_by_transaction
+
+
+EXPANSION_LOADERS = {"items": _load_items, "tags": _load_tags, "receipts": _load_receipts}
+
+
+def _expand(db: Session, transactions_data: List[dict], expand: List[str]) -> None:
+    """Attach the requested relations, one batched query per relation."""
+    transaction_ids = [transaction["id"] for transaction in transactions_data]
+    for name in expand:
+        loaded = EXPANSION_LOADERS[name](db, transaction_ids)
+        for transaction in transactions_data:
+            transaction[name] = loaded[transaction["id"]]
+
+
+def _first_active_id(db: Session, model, household_id: int) -> Optional[int]:
+    return db.execute(
+        select(model.id)
+        .where(model.household_id == household_id, model.is_active == True)
+        .order_by(model.id)
+        .limit(1)
+    ).scalar()
+
+
+def _check_references(db: Session, household_id: int, transaction_data: dict,
+                      account_id: Optional[int], payer_user_id: Optional[int]) -> None:
+    """Reject accounts, categories and users that belong to another household."""
+    ensure_owned(db, household_id, Account, [account_id, transaction_data.get("counter_account_id")], "Account")
+    ensure_owned(db, household_id, Category, [
+        transaction_data.get("category_id"),
+        *[item.get("category_id") for item in transaction_data.get("items") or [] if isinstance(item, dict)]
+    ], "Category")
+    ensure_owned(db, household_id, User, [payer_user_id], "User")
+
+
 @router.get("/")
 def get_transactions(
+    household_id: int = Depends(current_household_id),
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1),
     size: int = Query(50, ge=1, le=100),
@@ -23,97 +227,68 @@ def get_transactions(
     category_id: Optional[int] = Query(None),
     account_id: Optional[int] = Query(None),
     user_id: Optional[int] = Query(None),
-    q: Optional[str] = Query(None, description="Search query")
+    q: Optional[str] = Query(None, description="Search query"),
+    tag_ids: Optional[List[int]] = Query(None, description="Filter by tag IDs"),
+    tag_match: str = Query("any", pattern="^(any|all)$", description="any or all"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default: all)"),
+    expand: str = Query("items,tags", description="Comma-separated: items, tags, receipts")
 ):
     """
     Get paginated list of transactions with filters.
+
+    ``fields`` limits the returned fields (``id`` is always included) and
+    ``expand`` picks the nested relations; both shape the SQL as well as the
+    payload, so ``fields=date,amount_total,category&expand=`` reads three
+    columns and one joined table per row.
     """
     try:
-        # シンプルなクエリから開始
-        query = select(Transaction)
+        fields = _parse_list(fields, FIELDS, "fields") or list(FIELDS)
+        expand = _parse_list(expand, EXPANSIONS, "expand")
+
+        filters = [Transaction.household_id == household_id]
 
         # 日付フィルター
         if from_date:
             try:
                 from_date_parsed = datetime.strptime(from_date, "%Y-%m-%d").date()
-                query = query.where(Transaction.date >= from_date_parsed)
+                filters.append(Transaction.date >= from_date_parsed)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid from_date format. Use YYYY-MM-DD")
 
         if to_date:
             try:
                 to_date_parsed = datetime.strptime(to_date, "%Y-%m-%d").date()
-                query = query.where(Transaction.date <= to_date_parsed)
+                filters.append(Transaction.date <= to_date_parsed)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid to_date format. Use YYYY-MM-DD")
 
         # その他のフィルター
         if category_id:
-            query = query.where(Transaction.category_id == category_id)
+            filters.append(Transaction.category_id == category_id)
         if account_id:
-            query = query.where(Transaction.account_id == account_id)
+            filters.append(Transaction.account_id == account_id)
         if user_id:
-            query = query.where(Transaction.payer_user_id == user_id)
+            filters.append(Transaction.payer_user_id == user_id)
         if q:
-            query = query.where(Transaction.memo.contains(q))
-
-        # ソート（日付の降順）
-        query = query.order_by(Transaction.date.desc(), Transaction.created_at.desc())
+            filters.append(Transaction.memo.contains(q))
+        if tag_ids:
+            filters.append(_tag_filter(tag_ids, tag_match))
 
         # 総件数を取得
-        count_query = select(func.count('*')).select_from(query.subquery())
-        total = db.execute(count_query).scalar()
-
-        # ページネーション
-        offset = (page - 1) * size
-        query = query.offset(offset).limit(size)
-
-        # 実行
-        result = db.execute(query)
-        transactions = result.scalars().all()
-
-        # レスポンス用にデータを変換（関連データは別クエリで取得）
-        transactions_data = []
-        for transaction in transactions:
-            # 関連データを個別に取得
-            account = db.execute(select(Account).where(Account.id == transaction.account_id)).scalar_one_or_none() if transaction.account_id else None
-            category = db.execute(select(Category).where(Category.id == transaction.category_id)).scalar_one_or_none() if transaction.category_id else None
-            payer_user = db.execute(select(User).where(User.id == transaction.payer_user_id)).scalar_one_or_none() if transaction.payer_user_id else None
-            items = db.execute(select(TransactionItem).where(TransactionItem.transaction_id == transaction.id)).scalars().all()
-
-            transaction_dict = {
-                "id": transaction.id,
-                "date": transaction.date.isoformat(),
-                "type": transaction.type,
-                "amount_total": float(transaction.amount_total),
-                "account": {
-                    "id": account.id,
-                    "name": account.name
-                } if account else None,
-                "category": {
-                    "id": category.id,
-                    "name": category.name
-                } if category else None,
-                "payer_user": {
-                    "id": payer_user.id,
-                    "name": payer_user.name
-                } if payer_user else None,
-                "memo": transaction.memo,
-                "split_ratio_payer": float(transaction.split_ratio_payer),
-                "has_receipt": transaction.has_receipt,
-                "created_at": transaction.created_at.isoformat(),
-                "items": [
-                    {
-                        "id": item.id,
-                        "name": item.name,
-                        "amount": float(item.amount),
-                        "quantity": float(item.quantity) if item.quantity else None,
-                        "unit_price": float(item.unit_price) if item.unit_price else None
-                    }
-                    for item in items
-                ]
-            }
-            transactions_data.append(transaction_dict)
+        total = db.execute(select(func.count()).select_from(Transaction).where(*filters)).scalar()
+
+        # 要求された列と結合だけを取得（日付の降順）
+        query = (
+            _select_fields(fields)
+            .where(*filters)
+            .order_by(Transaction.date.desc(), Transaction.created_at.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+        )
+        transactions_data = _serialize_rows(db.execute(query), fields)
+
+        # ページ内の関連データを関連ごとに一括取得
+        _expand(db, transactions_data, expand)
 
         return {
             "transactions": transactions_data,
@@ -123,13 +298,19 @@ def get_transactions(
             "pages": (total + size - 1) // size
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Error fetching transactions: %s", str(e))
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.post("/")
-def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
+def create_transaction(
+    transaction_data: dict,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """
     Create a new transaction with items and split information.
 
@@ -137,7 +318,7 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
     {
         "date": "2024-01-01",
         "type": "expense",
-        "amount_total": 1000.00,
+        "amount_total": 1000,
         "account_id": 1,
         "category_id": 1,
         "payer_user_id": 1,
@@ -168,20 +349,26 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
+        # 口座・支払者の既定値は世帯の最初の有効な口座（現金）とユーザー
+        account_id = transaction_data.get("account_id") or _first_active_id(db, Account, household_id)
+        payer_user_id = transaction_data.get("payer_user_id") or _first_active_id(db, User, household_id)
+        _check_references(db, household_id, transaction_data, account_id, payer_user_id)
+
         # トランザクションの作成
         now = datetime.now()
         new_transaction = Transaction(
-            household_id=1,  # 田中家固定
+            household_id=household_id,
             date=transaction_date,
             type=transaction_data["type"],
-            amount_total=float(transaction_data["amount_total"]),
-            account_id=transaction_data.get("account_id", 1),  # デフォルトで現金
+            amount_total=_amount(transaction_data["amount_total"], "amount_total"),
+            account_id=account_id,
+            counter_account_id=transaction_data.get("counter_account_id"),  # 振替先
             category_id=transaction_data.get("category_id"),
-            payer_user_id=transaction_data.get("payer_user_id", 1),  # デフォルトで田中太郎
+            payer_user_id=payer_user_id,
             split_ratio_payer=float(transaction_data.get("split_ratio_payer", 50)) / 100.0,
             memo=transaction_data.get("memo", ""),
             has_receipt=False,  # デフォルトでfalse
-            created_by=transaction_data.get("payer_user_id", 1),  # 作成者は支払者と同じ
+            created_by=payer_user_id,  # 作成者は支払者と同じ
             created_at=now,
             updated_at=now
         )
@@ -189,6 +376,9 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
         db.add(new_transaction)
         db.flush()  # IDを取得するため
 
+        # 口座残高を同一トランザクション内で更新
+        balances.record_transaction(db, new_transaction)
+
         # アイテムの追加（もしあれば）
         if "items" in transaction_data and transaction_data["items"]:
             for item_data in transaction_data["items"]:
@@ -196,9 +386,10 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
                     new_item = TransactionItem(
                         transaction_id=new_transaction.id,
                         name=item_data["name"],
-                        amount=float(item_data["amount"]),
+                        amount=_amount(item_data["amount"], "item amount"),
                         quantity=float(item_data["quantity"]) if item_data.get("quantity") else None,
-                        unit_price=float(item_data["unit_price"]) if item_data.get("unit_price") else None,
+                        unit_price=(_amount(item_data["unit_price"], "unit_price")
+                                    if item_data.get("unit_price") else None),
                         category_id=item_data.get("category_id")
                     )
                     db.add(new_item)
@@ -209,7 +400,7 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
             "message": "Transaction created successfully",
             "id": new_transaction.id,
             "date": new_transaction.date.isoformat(),
-            "amount_total": float(new_transaction.amount_total)
+            "amount_total": to_major(new_transaction.amount_total)
         }
 
     except HTTPException:
@@ -221,55 +412,30 @@ def create_transaction(transaction_data: dict, db: Session = Depends(get_db)):
 
 
 @router.get("/{transaction_id}")
-def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
-    """Get transaction by ID with items and split details."""
+def get_transaction(
+    transaction_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default: all)"),
+    expand: str = Query("items,tags", description="Comma-separated: items, tags, receipts")
+):
+    """Get transaction by ID with items and split details (``fields``/``expand`` as in the list)."""
     try:
-        # トランザクションを取得
-        transaction = db.execute(
-            select(Transaction).where(Transaction.id == transaction_id)
-        ).scalar_one_or_none()
+        fields = _parse_list(fields, FIELDS, "fields") or list(FIELDS)
+        expand = _parse_list(expand, EXPANSIONS, "expand")
 
-        if not transaction:
-            raise HTTPException(status_code=404, detail="Transaction not found")
+        # トランザクションと関連データを1クエリで取得
+        row = db.execute(
+            _select_fields(fields)
+            .where(Transaction.id == transaction_id, Transaction.household_id == household_id)
+        ).first()
 
-        # 関連データを取得
-        account = db.execute(select(Account).where(Account.id == transaction.account_id)).scalar_one_or_none() if transaction.account_id else None
-        category = db.execute(select(Category).where(Category.id == transaction.category_id)).scalar_one_or_none() if transaction.category_id else None
-        payer_user = db.execute(select(User).where(User.id == transaction.payer_user_id)).scalar_one_or_none() if transaction.payer_user_id else None
-        items = db.execute(select(TransactionItem).where(TransactionItem.transaction_id == transaction.id)).scalars().all()
+        if not row:
+            raise HTTPException(status_code=404, detail="Transaction not found")
 
-        return {
-            "id": transaction.id,
-            "date": transaction.date.isoformat(),
-            "type": transaction.type,
-            "amount_total": float(transaction.amount_total),
-            "account": {
-                "id": account.id,
-                "name": account.name
-            } if account else None,
-            "category": {
-                "id": category.id,
-                "name": category.name
-            } if category else None,
-            "payer_user": {
-                "id": payer_user.id,
-                "name": payer_user.name
-            } if payer_user else None,
-            "memo": transaction.memo,
-            "split_ratio_payer": float(transaction.split_ratio_payer),
-            "has_receipt": transaction.has_receipt,
-            "created_at": transaction.created_at.isoformat(),
-            "items": [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "amount": float(item.amount),
-                    "quantity": float(item.quantity) if item.quantity else None,
-                    "unit_price": float(item.unit_price) if item.unit_price else None
-                }
-                for item in items
-            ]
-        }
+        transactions_data = _serialize_rows([row], fields)
+        _expand(db, transactions_data, expand)
+        return transactions_data[0]
     except HTTPException:
         raise
     except Exception as e:
@@ -278,17 +444,30 @@ def get_transaction(transaction_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{transaction_id}")
-def update_transaction(transaction_id: int, transaction_data: dict, db: Session = Depends(get_db)):
+def update_transaction(
+    transaction_id: int,
+    transaction_data: dict,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Update existing transaction."""
     try:
         # トランザクションを取得
         transaction = db.execute(
-            select(Transaction).where(Transaction.id == transaction_id)
+            select(Transaction).where(Transaction.id == transaction_id, Transaction.household_id == household_id)
         ).scalar_one_or_none()
 
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
+        _check_references(
+            db, household_id, transaction_data,
+            transaction_data.get("account_id"), transaction_data.get("payer_user_id")
+        )
+
+        # 変更前の残高への影響を取り消す
+        balances.reverse_transaction(db, transaction)
+
         # 更新可能フィールドの処理
         if "date" in transaction_data:
             try:
@@ -299,9 +478,11 @@ def update_transaction(transaction_id: int, transaction_data: dict, db: Session
         if "type" in transaction_data:
             transaction.type = transaction_data["type"]
         if "amount_total" in transaction_data:
-            transaction.amount_total = float(transaction_data["amount_total"])
+            transaction.amount_total = _amount(transaction_data["amount_total"], "amount_total")
         if "account_id" in transaction_data:
             transaction.account_id = transaction_data["account_id"]
+        if "counter_account_id" in transaction_data:
+            transaction.counter_account_id = transaction_data["counter_account_id"]
         if "category_id" in transaction_data:
             transaction.category_id = transaction_data["category_id"]
         if "payer_user_id" in transaction_data:
@@ -314,6 +495,9 @@ def update_transaction(transaction_id: int, transaction_data: dict, db: Session
         # 更新時刻を設定
         transaction.updated_at = datetime.now()
 
+        # 変更後の内容で残高を再計上
+        balances.record_transaction(db, transaction)
+
         # アイテムの更新（既存のアイテムを削除して新しく追加）
         if "items" in transaction_data:
             # 既存アイテムを削除
@@ -332,9 +516,10 @@ def update_transaction(transaction_id: int, transaction_data: dict, db: Session
                     new_item = TransactionItem(
                         transaction_id=transaction_id,
                         name=item_data["name"],
-                        amount=float(item_data["amount"]),
+                        amount=_amount(item_data["amount"], "item amount"),
                         quantity=float(item_data["quantity"]) if item_data.get("quantity") else None,
-                        unit_price=float(item_data["unit_price"]) if item_data.get("unit_price") else None,
+                        unit_price=(_amount(item_data["unit_price"], "unit_price")
+                                    if item_data.get("unit_price") else None),
                         category_id=item_data.get("category_id")
                     )
                     db.add(new_item)
@@ -345,7 +530,7 @@ def update_transaction(transaction_id: int, transaction_data: dict, db: Session
             "message": "Transaction updated successfully",
             "id": transaction.id,
             "date": transaction.date.isoformat(),
-            "amount_total": float(transaction.amount_total)
+            "amount_total": to_major(transaction.amount_total)
         }
     except HTTPException:
         raise
@@ -356,17 +541,24 @@ def update_transaction(transaction_id: int, transaction_data: dict, db: Session
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction(transaction_id: int, db: Session = Depends(get_db)):
+def delete_transaction(
+    transaction_id: int,
+    household_id: int = Depends(current_household_id),
+    db: Session = Depends(get_db)
+):
     """Delete transaction and associated items."""
     try:
         # トランザクションを取得
         transaction = db.execute(
-            select(Transaction).where(Transaction.id == transaction_id)
+            select(Transaction).where(Transaction.id == transaction_id, Transaction.household_id == household_id)
         ).scalar_one_or_none()
 
         if not transaction:
             raise HTTPException(status_code=404, detail="Transaction not found")
 
+        # 口座残高から取り消す
+        balances.reverse_transaction(db, transaction)
+
         # 関連アイテムを削除
         items = db.execute(
             select(TransactionItem).where(TransactionItem.transaction_id == transaction_id)
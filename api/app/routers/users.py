@@ -5,6 +5,7 @@ import logging
 
 from app.database import get_db
 from app.models import User
+from app.tenancy import current_household_id
 
 logger = logging.getLogger(__name__)
 
@@ -12,11 +13,10 @@ router = APIRouter()
 
 
 @router.get("/")
-def get_users(db: Session = Depends(get_db)):
+def get_users(household_id: int = Depends(current_household_id), db: Session = Depends(get_db)):
     """Get all users for the household."""
     try:
-        # 田中家のhousehold_id=1のユーザーを取得
-        result = db.execute(select(User).where(User.household_id == 1, User.is_active == True))
+        result = db.execute(select(User).where(User.household_id == household_id, User.is_active == True))
         users = result.scalars().all()
 
         users_data = []
@@ -50,15 +50,15 @@ class TagBase(BaseModel):
 class TransactionItemBase(BaseModel):
     name: str
     quantity: Decimal = Field(default=Decimal("1"), ge=0)
-    unit_price: Decimal = Field(default=Decimal("0"), ge=0)
-    amount: Decimal = Field(ge=0)
+    unit_price: int = Field(default=0, ge=0)  # 金額は円単位の整数（app.money）
+    amount: int = Field(ge=0)
     category_id: Optional[int] = None
 
 
 class TransactionBase(BaseModel):
     date: date_type
     type: TransactionType
-    amount_total: Decimal = Field(gt=0)
+    amount_total: int = Field(gt=0)
     account_id: int
     counter_account_id: Optional[int] = None
     category_id: Optional[int] = None
@@ -71,7 +71,7 @@ class TransactionBase(BaseModel):
 class BudgetBase(BaseModel):
     month: str = Field(pattern=r"^\d{6}$")  # YYYYMM format
     category_id: int
-    amount_limit: Decimal = Field(gt=0)
+    amount_limit: int = Field(gt=0)
 
 # Create schemas
 
@@ -108,7 +108,7 @@ class TransactionCreate(TransactionBase):
     def validate_items_total(cls, v, values, **_):
         if 'amount_total' in values and v:
             items_total = sum(item.amount for item in v)
-            if abs(items_total - values['amount_total']) > Decimal('0.01'):
+            if items_total != values['amount_total']:
                 raise ValueError('Sum of item amounts must equal total amount')
         return v
 
@@ -194,7 +194,7 @@ class BudgetResponse(BudgetBase):
 class TransactionUpdate(BaseModel):
     date: Optional[date_type] = None
     type: Optional[TransactionType] = None
-    amount_total: Optional[Decimal] = Field(None, gt=0)
+    amount_total: Optional[int] = Field(None, gt=0)
     account_id: Optional[int] = None
     counter_account_id: Optional[int] = None
     category_id: Optional[int] = None
@@ -223,9 +223,9 @@ class TransactionListResponse(PaginatedResponse):
 
 class MonthlyReportResponse(BaseModel):
     month: str
-    total_income: Decimal
-    total_expenses: Decimal
-    net_amount: Decimal
+    total_income: int
+    total_expenses: int
+    net_amount: int
     categories: List[dict]
     budget_status: List[dict]
 
@@ -234,7 +234,7 @@ class SplitReportResponse(BaseModel):
     from_date: Optional[date_type]
     to_date: Optional[date_type]
     users: List[dict]
-    total_expenses: Decimal
+    total_expenses: int
 
 # File upload
 
@@ -0,0 +1,557 @@
+"""
+論理バックアップとリストア
+
+``dump`` writes a consistent logical backup of one database (one shard) to a
+directory of compressed chunk files plus ``manifest.json``:
+
+- ``--workers`` connections read from one shared snapshot. On MySQL the
+  snapshots are opened under ``FLUSH TABLES WITH READ LOCK``, held only for
+  as long as it takes to open them; without the RELOAD privilege the dump
+  falls back to a single snapshot connection. On SQLite a short
+  ``BEGIN IMMEDIATE`` on a guard connection plays the same role.
+- Tables are split into primary-key ranges of ``--chunk-rows`` ids and the
+  chunks are dumped in parallel, each streamed as JSON lines through gzip (or
+  zstd when ``zstandard`` is installed) straight to disk.
+- The manifest records the Alembic revision, the columns of every table and,
+  per chunk, the row count, a SHA-256 of the rows and a SHA-256 of the file.
+
+``restore`` creates the schema at the manifest's revision in an empty database
+and loads the chunks in parallel, one transaction per chunk, with foreign-key
+checks off for the loading connections (SQLite loads with one connection).
+
+``verify`` checks the file hashes, restores into a scratch database and
+recomputes the row checksums there over the same key ranges.
+
+実行方法:
+docker-compose exec api python -m app.scripts.backup dump --dir /db_backups --workers 4
+docker-compose exec api python -m app.scripts.backup verify /db_backups/family_budget_20261019_030000 \\
+    --scratch-url mysql+pymysql://root:pw@db:3306/family_budget_verify
+docker-compose exec api python -m app.scripts.backup restore /db_backups/family_budget_20261019_030000 \\
+    --database-url mysql+pymysql://root:pw@db:3306/family_budget_restored
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import queue
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, MetaData, Numeric, Table, func, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+
+from app.database import DATABASE_URL, create_db_engine, sync_url
+from app.lazy import OptionalDependencyError, optional_import
+from app.models import Base
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+INSERT_BATCH = 2000
+
+
+# ---------------------------------------------------------------------------
+# 行のエンコード
+# ---------------------------------------------------------------------------
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def encode_row(row) -> bytes:
+    return (json.dumps(list(row), default=_json_default, ensure_ascii=False, separators=(",", ":")) + "\n").encode()
+
+
+def _decoders(table: Table, columns: List[str]) -> List[Callable]:
+    decoders = []
+    for name in columns:
+        column_type = table.c[name].type
+        if isinstance(column_type, DateTime):
+            decoders.append(datetime.fromisoformat)
+        elif isinstance(column_type, Date):
+            decoders.append(date.fromisoformat)
+        elif isinstance(column_type, Numeric) and column_type.asdecimal:
+            decoders.append(Decimal)
+        else:
+            decoders.append(None)
+    return decoders
+
+
+# ---------------------------------------------------------------------------
+# 圧縮ファイル
+# ---------------------------------------------------------------------------
+
+class _HashingWriter:
+    """File wrapper that hashes the (compressed) bytes as they are written."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data) -> int:
+        self.sha256.update(data)
+        return self.raw.write(data)
+
+    def flush(self) -> None:
+        self.raw.flush()
+
+
+def available_compression() -> str:
+    try:
+        optional_import("zstandard", "zstd backups")
+        return "zstd"
+    except OptionalDependencyError:
+        return "gzip"
+
+
+@contextmanager
+def _chunk_writer(path: Path, compression: str) -> Iterator[Tuple[object, _HashingWriter]]:
+    with open(path, "wb") as raw:
+        hashing = _HashingWriter(raw)
+        if compression == "zstd":
+            zstd = optional_import("zstandard", "zstd backups")
+            with zstd.ZstdCompressor(level=3).stream_writer(hashing, closefd=False) as out:
+                yield out, hashing
+        else:
+            with gzip.GzipFile(fileobj=hashing, mode="wb", compresslevel=6, mtime=0) as out:
+                yield out, hashing
+
+
+def _read_lines(path: Path, compression: str) -> Iterator[bytes]:
+    if compression == "zstd":
+        zstd = optional_import("zstandard", "zstd backups")
+        with open(path, "rb") as raw, zstd.ZstdDecompressor().stream_reader(raw) as reader:
+            buffer = b""
+            while True:
+                block = reader.read(1 << 20)
+                if not block:
+                    break
+                buffer += block
+                *lines, buffer = buffer.split(b"\n")
+                yield from lines
+            if buffer:
+                yield buffer
+    else:
+        with gzip.open(path, "rb") as reader:
+            for line in reader:
+                yield line.rstrip(b"\n")
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# スナップショットとチャンク
+# ---------------------------------------------------------------------------
+
+def backup_tables() -> List[Table]:
+    return list(Base.metadata.sorted_tables)
+
+
+@contextmanager
+def snapshot_connections(engine: Engine, count: int) -> Iterator[Tuple[List[Connection], str]]:
+    """
+    Open up to ``count`` connections that all read the same snapshot.
+
+    Yields the connections and a description of how the snapshot was taken.
+    """
+    guard = engine.connect()
+    connections: List[Connection] = []
+    try:
+        if engine.dialect.name == "mysql":
+            try:
+                guard.exec_driver_sql("FLUSH TABLES WITH READ LOCK")
+                locked, method = True, "shared snapshot (FLUSH TABLES WITH READ LOCK)"
+            except DBAPIError:
+                # RELOAD 権限がない: 1本のスナップショットで読む（並列度は落ちるが一貫性は保つ）
+                guard.rollback()
+                locked, count, method = False, 1, "single snapshot (no RELOAD privilege)"
+            for _ in range(count):
+                conn = engine.connect()
+                conn.exec_driver_sql("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                conn.exec_driver_sql("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+                connections.append(conn)
+            if locked:
+                # スナップショットが揃ったらすぐに書き込みを再開させる（接続が1本でも）
+                guard.exec_driver_sql("UNLOCK TABLES")
+        else:
+            # 書き込みを一瞬止めている間に各接続の読み取りスナップショットを確定させる
+            guard.exec_driver_sql("BEGIN IMMEDIATE")
+            for _ in range(count):
+                conn = engine.connect()
+                conn.exec_driver_sql("BEGIN")
+                conn.exec_driver_sql("SELECT count(*) FROM sqlite_master").scalar()
+                connections.append(conn)
+            guard.exec_driver_sql("ROLLBACK")
+            method = "shared snapshot (BEGIN IMMEDIATE)"
+        yield connections, method
+    finally:
+        for conn in connections:
+            conn.close()
+        guard.close()
+
+
+def _chunk_key(table: Table):
+    """The integer primary-key column chunks are ranged over, or None."""
+    first = list(table.primary_key.columns)[0]
+    return first if isinstance(first.type, Integer) else None
+
+
+def plan_chunks(conn: Connection, table: Table, chunk_rows: int) -> List[dict]:
+    key = _chunk_key(table)
+    if key is None:
+        return [{"lower": None, "upper": None}]
+    low, high = conn.execute(select(func.min(key), func.max(key))).one()
+    if low is None:
+        return [{"lower": None, "upper": None}]
+    return [{"lower": start, "upper": min(start + chunk_rows, high + 1)}
+            for start in range(low, high + 1, chunk_rows)]
+
+
+def _chunk_query(table: Table, chunk: dict):
+    query = select(table).order_by(*table.primary_key.columns)
+    if chunk["lower"] is not None:
+        key = _chunk_key(table)
+        query = query.where(key >= chunk["lower"], key < chunk["upper"])
+    return query
+
+
+def read_chunk(conn: Connection, table: Table, chunk: dict, out=None) -> Tuple[int, str]:
+    """Stream one chunk (optionally into ``out``); returns (rows, rows SHA-256)."""
+    digest = hashlib.sha256()
+    rows = 0
+    result = conn.execution_options(yield_per=5000).execute(_chunk_query(table, chunk))
+    for row in result:
+        line = encode_row(row)
+        digest.update(line)
+        if out is not None:
+            out.write(line)
+        rows += 1
+    return rows, digest.hexdigest()
+
+
+def _run_on_connections(connections: List[Connection], tasks: List, fn: Callable) -> List:
+    """Run ``fn(conn, task)`` for every task, each on a connection no other thread is using."""
+    pool: "queue.Queue[Connection]" = queue.Queue()
+    for conn in connections:
+        pool.put(conn)
+
+    def run(task):
+        conn = pool.get()
+        try:
+            return fn(conn, task)
+        finally:
+            pool.put(conn)
+
+    with ThreadPoolExecutor(max_workers=len(connections)) as executor:
+        return list(executor.map(run, tasks))
+
+
+def _table_checksum(chunks: List[dict]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk["checksum"].encode())
+    return digest.hexdigest()
+
+
+def _alembic_revision(conn: Connection) -> Optional[str]:
+    if not inspect(conn).has_table("alembic_version"):
+        return None
+    return conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+
+
+# ---------------------------------------------------------------------------
+# dump / restore / verify
+# ---------------------------------------------------------------------------
+
+def dump(database_url: str, output: Path, workers: int = 4, chunk_rows: int = 50000,
+         compression: Optional[str] = None) -> dict:
+    compression = compression or available_compression()
+    engine = create_db_engine(database_url, poolclass=NullPool)
+    partial = output.with_name(output.name + ".partial")
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    extension = "zst" if compression == "zstd" else "gz"
+
+    try:
+        with snapshot_connections(engine, workers) as (connections, method):
+            tables = backup_tables()
+            revision = _alembic_revision(connections[0])
+            tasks = []
+            for table in tables:
+                for index, chunk in enumerate(plan_chunks(connections[0], table, chunk_rows)):
+                    chunk["file"] = f"{table.name}.{index:05d}.jsonl.{extension}"
+                    tasks.append((table, chunk))
+
+            def dump_chunk(conn: Connection, task) -> dict:
+                table, chunk = task
+                with _chunk_writer(partial / chunk["file"], compression) as (out, hashing):
+                    rows, checksum = read_chunk(conn, table, chunk, out)
+                return {**chunk, "rows": rows, "checksum": checksum, "sha256": hashing.sha256.hexdigest()}
+
+            results = _run_on_connections(connections, tasks, dump_chunk)
+    finally:
+        engine.dispose()
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": make_url(sync_url(database_url)).render_as_string(hide_password=True),
+        "dialect": engine.dialect.name,
+        "snapshot": method,
+        "alembic_revision": revision,
+        "compression": compression,
+        "chunk_rows": chunk_rows,
+        "tables": {},
+    }
+    for table in tables:
+        chunks = [result for (task_table, _), result in zip(tasks, results) if task_table is table]
+        manifest["tables"][table.name] = {
+            "columns": [column.name for column in table.columns],
+            "rows": sum(chunk["rows"] for chunk in chunks),
+            "checksum": _table_checksum(chunks),
+            "chunks": chunks,
+        }
+    with open(partial / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    # マニフェストまで書けたものだけを完成したバックアップとして置く
+    shutil.rmtree(output, ignore_errors=True)
+    partial.rename(output)
+    return manifest
+
+
+def load_manifest(backup: Path) -> dict:
+    with open(backup / MANIFEST, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported backup format {manifest.get('format')}")
+    return manifest
+
+
+def check_files(backup: Path, manifest: dict, workers: int = 4) -> List[str]:
+    """Return the chunk files whose SHA-256 does not match the manifest."""
+    chunks = [chunk for table in manifest["tables"].values() for chunk in table["chunks"]]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(lambda chunk: file_sha256(backup / chunk["file"]), chunks))
+    return [chunk["file"] for chunk, sha256 in zip(chunks, hashes) if sha256 != chunk["sha256"]]
+
+
+def create_schema(database_url: str, revision: Optional[str]) -> None:
+    """Migrate an empty database to ``revision`` (or create the model schema if unknown)."""
+    if revision is None:
+        engine = create_db_engine(database_url, poolclass=NullPool)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+        return
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(Path(__file__).resolve().parents[2] / "alembic.ini"))
+    config.set_main_option("script_location", str(Path(__file__).resolve().parents[2] / "alembic"))
+    previous = os.environ.get("DATABASE_URL")
+    os.environ["DATABASE_URL"] = sync_url(database_url)  # env.py は DATABASE_URL を読む
+    try:
+        command.upgrade(config, revision)
+    finally:
+        if previous is None:
+            os.environ.pop("DATABASE_URL", None)
+        else:
+            os.environ["DATABASE_URL"] = previous
+
+
+def _loading_connection(engine: Engine) -> Connection:
+    conn = engine.connect()
+    if engine.dialect.name == "mysql":
+        conn.exec_driver_sql("SET SESSION FOREIGN_KEY_CHECKS=0")
+        conn.exec_driver_sql("SET SESSION UNIQUE_CHECKS=0")
+    else:
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+    conn.commit()
+    return conn
+
+
+def restore(backup: Path, database_url: str, workers: int = 4) -> Dict[str, int]:
+    manifest = load_manifest(backup)
+    engine = create_db_engine(database_url, poolclass=NullPool)
+    existing = [name for name in inspect(engine).get_table_names() if name != "alembic_version"]
+    if existing:
+        engine.dispose()
+        raise ValueError(f"Target database is not empty ({len(existing)} tables); restore needs an empty database")
+
+    create_schema(database_url, manifest["alembic_revision"])
+    tables = {table.name: table for table in backup_tables()}
+    tasks = [(tables[name], entry["columns"], chunk)
+             for name, entry in manifest["tables"].items() for chunk in entry["chunks"] if chunk["rows"]]
+    if engine.dialect.name == "sqlite":
+        workers = 1  # 書き込みは1接続ずつ
+
+    def load_chunk(conn: Connection, task) -> int:
+        table, columns, chunk = task
+        decoders = _decoders(table, columns)
+        rows, batch = 0, []
+        with conn.begin():
+            for line in _read_lines(backup / chunk["file"], manifest["compression"]):
+                values = json.loads(line)
+                batch.append({
+                    name: (decode(value) if decode and value is not None else value)
+                    for name, decode, value in zip(columns, decoders, values)
+                })
+                if len(batch) >= INSERT_BATCH:
+                    conn.execute(insert(table), batch)
+                    rows += len(batch)
+                    batch = []
+            if batch:
+                conn.execute(insert(table), batch)
+                rows += len(batch)
+        return rows
+
+    connections = [_loading_connection(engine) for _ in range(max(1, min(workers, len(tasks) or 1)))]
+    try:
+        loaded = _run_on_connections(connections, tasks, load_chunk)
+    finally:
+        for conn in connections:
+            conn.close()
+        engine.dispose()
+
+    counts = {name: 0 for name in manifest["tables"]}
+    for (table, _, _), rows in zip(tasks, loaded):
+        counts[table.name] += rows
+    return counts
+
+
+def drop_all(database_url: str) -> None:
+    engine = create_db_engine(database_url, poolclass=NullPool)
+    metadata = MetaData()
+    metadata.reflect(engine)
+    with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            conn.exec_driver_sql("SET FOREIGN_KEY_CHECKS=0")
+        metadata.drop_all(conn)
+    engine.dispose()
+
+
+def verify(backup: Path, scratch_url: str, workers: int = 4) -> List[str]:
+    """Restore into ``scratch_url`` (dropping what is there) and return a list of mismatches."""
+    if sync_url(scratch_url) == sync_url(DATABASE_URL):
+        raise ValueError("The scratch database must not be the application database")
+    manifest = load_manifest(backup)
+    problems = [f"{name}: file checksum mismatch" for name in check_files(backup, manifest, workers)]
+    if problems:
+        return problems
+
+    drop_all(scratch_url)
+    restore(backup, scratch_url, workers)
+
+    engine = create_db_engine(scratch_url, poolclass=NullPool)
+    tables = {table.name: table for table in backup_tables()}
+    tasks = [(name, chunk) for name, entry in manifest["tables"].items() for chunk in entry["chunks"]]
+    try:
+        with snapshot_connections(engine, workers) as (connections, _):
+            results = _run_on_connections(
+                connections, tasks, lambda conn, task: read_chunk(conn, tables[task[0]], task[1])
+            )
+    finally:
+        engine.dispose()
+
+    actual: Dict[str, List[dict]] = {}
+    for (name, chunk), (rows, checksum) in zip(tasks, results):
+        actual.setdefault(name, []).append({"rows": rows, "checksum": checksum})
+        if rows != chunk["rows"] or checksum != chunk["checksum"]:
+            problems.append(f"{name} [{chunk['lower']}, {chunk['upper']}): "
+                            f"{rows} rows (expected {chunk['rows']}), checksum {'ok' if checksum == chunk['checksum'] else 'differs'}")
+    for name, entry in manifest["tables"].items():
+        if _table_checksum(actual.get(name, [])) != entry["checksum"]:
+            problems.append(f"{name}: table checksum differs")
+    return problems
+
+
+def prune(directory: Path, keep: int) -> List[Path]:
+    """Delete all but the newest ``keep`` complete backups in ``directory``."""
+    backups = sorted(path for path in directory.iterdir() if (path / MANIFEST).exists())
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        shutil.rmtree(path)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel logical backup, restore and verification")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = subparsers.add_parser("dump", help="write a backup")
+    dump_parser.add_argument("--database-url", default=DATABASE_URL)
+    dump_parser.add_argument("--dir", default=os.getenv("BACKUP_DIR", "backups"), help="directory for backups")
+    dump_parser.add_argument("--name", help="backup name (default: family_budget_YYYYmmdd_HHMMSS)")
+    dump_parser.add_argument("--workers", type=int, default=4)
+    dump_parser.add_argument("--chunk-rows", type=int, default=50000, help="primary-key range per chunk file")
+    dump_parser.add_argument("--compression", choices=["gzip", "zstd"], help="default: zstd if installed")
+    dump_parser.add_argument("--keep", type=int, default=0, help="keep only the newest N backups in --dir")
+
+    restore_parser = subparsers.add_parser("restore", help="load a backup into an empty database")
+    restore_parser.add_argument("backup")
+    restore_parser.add_argument("--database-url", required=True)
+    restore_parser.add_argument("--workers", type=int, default=4)
+
+    verify_parser = subparsers.add_parser("verify", help="restore into a scratch database and compare checksums")
+    verify_parser.add_argument("backup")
+    verify_parser.add_argument("--scratch-url", required=True, help="scratch database (its tables are dropped!)")
+    verify_parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "dump":
+            name = args.name or f"family_budget_{datetime.now():%Y%m%d_%H%M%S}"
+            output = Path(args.dir) / name
+            print(f"📦 バックアップ中: {output}")
+            manifest = dump(args.database_url, output, args.workers, args.chunk_rows, args.compression)
+            size = sum(path.stat().st_size for path in output.iterdir())
+            for table, entry in manifest["tables"].items():
+                print(f"  {table}: {entry['rows']:,}行 ({len(entry['chunks'])}チャンク)")
+            print(f"ℹ️ {manifest['snapshot']}, {manifest['compression']}, {size / 1024 / 1024:.1f}MB")
+            for removed in prune(Path(args.dir), args.keep):
+                print(f"🗑️ 古いバックアップを削除しました: {removed.name}")
+            print(f"🎉 バックアップが完了しました ({time.perf_counter() - start:.1f}秒)")
+
+        elif args.command == "restore":
+            counts = restore(Path(args.backup), args.database_url, args.workers)
+            for table, count in counts.items():
+                print(f"  {table}: {count:,}行")
+            print(f"🎉 リストアが完了しました ({sum(counts.values()):,}行, {time.perf_counter() - start:.1f}秒)")
+
+        else:
+            problems = verify(Path(args.backup), args.scratch_url, args.workers)
+            if problems:
+                for problem in problems:
+                    print(f"❌ {problem}")
+                raise SystemExit(1)
+            print(f"✅ 検証に成功しました: 行数とチェックサムが一致 ({time.perf_counter() - start:.1f}秒)")
+
+    except (ValueError, LookupError, OSError, DBAPIError) as e:
+        print(f"❌ {args.command} に失敗しました: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
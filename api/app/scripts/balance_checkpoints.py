@@ -0,0 +1,51 @@
+"""
+口座残高の月末チェックポイントを作成するスクリプト
+
+実行方法（cron などで月初に実行）:
+docker-compose exec api python -m app.scripts.balance_checkpoints
+docker-compose exec api python -m app.scripts.balance_checkpoints --rebuild
+"""
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.balances import create_checkpoints, rebuild_balances
+from app.database import shard_engines
+from app.models import Household
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create month-end account balance checkpoints")
+    parser.add_argument("--through", help="YYYY-MM-DD (default: end of last month)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Recompute balances and checkpoints from the full history")
+    args = parser.parse_args()
+
+    through = datetime.strptime(args.through, "%Y-%m-%d").date() if args.through else None
+
+    # 世帯は各シャードの households テーブルにあるので、シャードごとに処理する
+    for shard, shard_engine in shard_engines.items():
+        db = Session(bind=shard_engine)
+        try:
+            household_ids = db.execute(select(Household.id)).scalars().all()
+            for household_id in household_ids:
+                if args.rebuild:
+                    rebuild_balances(db, household_id)
+                    print(f"✅ [{shard}] 家族 {household_id}: 残高を再計算しました")
+                else:
+                    count = create_checkpoints(db, household_id, through)
+                    print(f"✅ [{shard}] 家族 {household_id}: {count}件のチェックポイントを作成しました")
+            db.commit()
+        except Exception as e:
+            print(f"❌ [{shard}] エラーが発生しました: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+大量のサンプルデータを生成するスクリプト
+
+Generates a realistic multi-household, multi-year history: nested Japanese
+categories, fixed monthly bills, salaries and bonuses, card settlements, and
+day-to-day spending with itemized receipts. Rows are inserted in large
+executemany batches, optionally from several worker processes (one household
+at a time each). Every id is derived from the household number, and the
+history ends at ``--end`` (the current month by default), so the output is
+identical for a given seed and end month regardless of the worker count.
+
+実行方法:
+docker-compose exec api python -m app.scripts.generate_data --reset
+docker-compose exec api python -m app.scripts.generate_data --reset \\
+    --households 50 --years 10 --tx-per-month 150 --workers 4 --end 2026-01
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from faker import Faker
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app import balances
+from app.database import create_db_engine, is_memory_sqlite
+from app.models import (
+    Account, AccountType, Base, Budget, Category, CategoryClosure, Household, Tag,
+    Transaction, TransactionItem, TransactionTag, TransactionType, User, AuthType
+)
+from app.settings import settings
+
+# 親カテゴリ -> 子カテゴリ
+CATEGORY_TREE = {
+    "食費": ["食料品", "外食", "カフェ"],
+    "日用品": [],
+    "交通費": ["電車", "バス", "タクシー"],
+    "住居費": ["家賃"],
+    "光熱費": ["電気", "ガス", "水道"],
+    "通信費": ["携帯電話", "インターネット"],
+    "医療費": [],
+    "衣服": [],
+    "娯楽": ["書籍", "映画", "旅行"],
+    "教育": [],
+    "収入": ["給与", "賞与"],
+}
+CATEGORY_NAMES = [name for parent, children in CATEGORY_TREE.items() for name in [parent, *children]]
+
+# 口座: 現金, 夫の銀行, 妻の銀行, カード, 交通系IC（household 1 では id 1 が現金）
+ACCOUNTS = [
+    ("現金", AccountType.cash),
+    ("みずほ銀行（夫）", AccountType.bank),
+    ("三井住友銀行（妻）", AccountType.bank),
+    ("楽天カード", AccountType.card),
+    ("Suica", AccountType.ic),
+]
+CASH, BANK_1, BANK_2, CARD, IC = range(5)
+
+TAGS = ["食材", "有機", "セール", "必需品", "贅沢", "ふるさと納税", "子ども"]
+
+# 日々の支出: (カテゴリ, 重み, 金額範囲, メモ候補, 品目候補, 品目数範囲, 口座の重み[現金, カード, IC])
+SPENDING = [
+    ("食料品", 30, (800, 9000), ["イオン", "西友", "ライフ", "業務スーパー", "成城石井", "まいばすけっと"],
+     [("米", 1800, 3800), ("卵", 200, 350), ("牛乳", 180, 280), ("食パン", 150, 320), ("鶏むね肉", 300, 800),
+      ("豚こま肉", 300, 900), ("キャベツ", 100, 300), ("玉ねぎ", 100, 280), ("豆腐", 60, 150), ("納豆", 80, 150),
+      ("鮭", 300, 700), ("ヨーグルト", 130, 300), ("バナナ", 100, 250), ("味噌", 250, 600), ("醤油", 200, 500)],
+     (3, 12), (3, 5, 2)),
+    ("外食", 10, (800, 9000), ["ランチ", "ディナー", "回転寿司", "ラーメン", "ファミレス", "焼肉"], [], (0, 0), (4, 5, 1)),
+    ("カフェ", 6, (300, 1300), ["スターバックス", "ドトール", "タリーズ", "コメダ珈琲"], [], (0, 0), (2, 3, 5)),
+    ("日用品", 8, (300, 5000), ["マツモトキヨシ", "ダイソー", "ニトリ", "ウエルシア"],
+     [("洗剤", 200, 600), ("ティッシュ", 250, 500), ("トイレットペーパー", 300, 700), ("シャンプー", 400, 1500),
+      ("歯ブラシ", 100, 400), ("ゴミ袋", 150, 400)],
+     (1, 5), (2, 6, 1)),
+    ("電車", 8, (150, 1200), ["通勤外", "乗り越し精算", "新幹線"], [], (0, 0), (0, 0, 1)),
+    ("バス", 2, (210, 600), ["都営バス", "路線バス"], [], (0, 0), (0, 0, 1)),
+    ("タクシー", 1, (700, 6000), ["タクシー"], [], (0, 0), (2, 5, 0)),
+    ("医療費", 2, (500, 8000), ["内科", "歯科", "薬局", "眼科"], [], (0, 0), (5, 2, 0)),
+    ("衣服", 3, (1500, 15000), ["ユニクロ", "GU", "しまむら", "無印良品"], [], (0, 0), (1, 6, 0)),
+    ("書籍", 2, (500, 4000), ["紀伊國屋書店", "Amazon", "ブックオフ"], [], (0, 0), (1, 6, 0)),
+    ("映画", 1, (1200, 4000), ["TOHOシネマズ", "イオンシネマ"], [], (0, 0), (1, 4, 0)),
+    ("教育", 1, (1000, 30000), ["習い事", "教材", "模試"], [], (0, 0), (1, 4, 0)),
+    ("旅行", 0.3, (20000, 150000), ["国内旅行", "温泉旅行", "帰省"], [], (0, 0), (0, 1, 0)),
+]
+
+
+def _month_starts(years: int, end: Optional[date] = None) -> List[date]:
+    """First days of the ``years * 12`` months before the month of ``end`` (default: today)."""
+    end = (end or date.today()).replace(day=1)
+    months = []
+    year, month = end.year - years, end.month
+    while (year, month) < (end.year, end.month):
+        months.append(date(year, month, 1))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _days_in_month(month_start: date) -> int:
+    return (balances.month_end(month_start) - month_start).days + 1
+
+
+def _split_amount(rng: random.Random, items: list, count: int) -> List[dict]:
+    rows = []
+    for name, low, high in rng.sample(items, min(count, len(items))):
+        quantity = rng.choices((1, 2, 3), (8, 2, 1))[0]
+        unit_price = rng.randrange(low, high + 1, 10)
+        rows.append({"name": name, "quantity": Decimal(quantity), "unit_price": unit_price,
+                     "amount": unit_price * quantity})
+    return rows
+
+
+def transactions_per_household(years: int, tx_per_month: int) -> int:
+    """Upper bound of transactions per household, used to reserve id ranges."""
+    return len(_month_starts(years)) * (int(tx_per_month * 1.2) + 12)
+
+
+def build_household(household_id: int, years: int, tx_per_month: int, seed: int,
+                    end: Optional[date] = None) -> Dict[str, List[dict]]:
+    """Build all rows of one household. Deterministic for (household_id, seed, end)."""
+    rng = random.Random(seed * 1_000_003 + household_id)
+    fake = Faker("ja_JP")
+    fake.seed_instance(seed * 1_000_003 + household_id)
+
+    end = (end or date.today()).replace(day=1)
+    # 作成日時も終了月から決める（実行日によって行が変わらないように）
+    now = datetime.combine(end, datetime.min.time())
+    family_name = fake.last_name()
+    user_ids = [household_id * 2 - 1, household_id * 2]
+    account_ids = [(household_id - 1) * len(ACCOUNTS) + i + 1 for i in range(len(ACCOUNTS))]
+    category_ids = {name: (household_id - 1) * len(CATEGORY_NAMES) + i + 1
+                    for i, name in enumerate(CATEGORY_NAMES)}
+    tag_ids = [(household_id - 1) * len(TAGS) + i + 1 for i in range(len(TAGS))]
+    next_transaction_id = (household_id - 1) * transactions_per_household(years, tx_per_month) + 1
+
+    rows: Dict[str, List[dict]] = {
+        "households": [{"id": household_id, "name": f"{family_name}家", "created_at": now}],
+        "users": [
+            {"id": user_id, "household_id": household_id, "name": f"{family_name}{first_name}",
+             "email": fake.email(), "auth_type": AuthType.pin, "is_active": True, "created_at": now}
+            for user_id, first_name in zip(user_ids, (fake.first_name_male(), fake.first_name_female()))
+        ],
+        "accounts": [
+            {"id": account_id, "household_id": household_id, "name": name, "type": account_type, "is_active": True}
+            for account_id, (name, account_type) in zip(account_ids, ACCOUNTS)
+        ],
+        "categories": [],
+        "category_closure": [],
+        "tags": [{"id": tag_id, "household_id": household_id, "name": name} for tag_id, name in zip(tag_ids, TAGS)],
+        "budgets": [],
+        "transactions": [],
+        "transaction_items": [],
+        "transaction_tags": [],
+    }
+
+    for parent, children in CATEGORY_TREE.items():
+        parent_id = category_ids[parent]
+        rows["categories"].append({"id": parent_id, "household_id": household_id, "name": parent,
+                                   "parent_id": None, "is_active": True})
+        rows["category_closure"].append({"ancestor_id": parent_id, "descendant_id": parent_id, "depth": 0})
+        for child in children:
+            child_id = category_ids[child]
+            rows["categories"].append({"id": child_id, "household_id": household_id, "name": child,
+                                       "parent_id": parent_id, "is_active": True})
+            rows["category_closure"] += [
+                {"ancestor_id": child_id, "descendant_id": child_id, "depth": 0},
+                {"ancestor_id": parent_id, "descendant_id": child_id, "depth": 1},
+            ]
+
+    # 世帯ごとに固定の生活水準
+    rent = rng.randrange(70000, 160000, 1000)
+    salaries = [rng.randrange(220000, 520000, 1000), rng.randrange(0, 320000, 1000)]
+    phone = rng.randrange(3000, 12000, 100)
+    internet = rng.randrange(4000, 6500, 100)
+    shops = {category: memos + [fake.company() for _ in range(3)] for category, _, _, memos, _, _, _ in SPENDING}
+    spending_weights = [weight for _, weight, *_ in SPENDING]
+
+    def add_transaction(day: date, transaction_type: TransactionType, amount: int, account: int,
+                        category: Optional[str], memo: str, payer: int = 0, counter: Optional[int] = None,
+                        items: Optional[List[dict]] = None) -> None:
+        nonlocal next_transaction_id
+        transaction_id = next_transaction_id
+        next_transaction_id += 1
+        created_at = datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(7 * 60, 23 * 60))
+        rows["transactions"].append({
+            "id": transaction_id,
+            "household_id": household_id,
+            "date": day,
+            "type": transaction_type,
+            "amount_total": amount,
+            "account_id": account_ids[account],
+            "counter_account_id": account_ids[counter] if counter is not None else None,
+            "category_id": category_ids[category] if category else None,
+            "payer_user_id": user_ids[payer],
+            "split_ratio_payer": Decimal("1.00") if transaction_type == TransactionType.income else Decimal("0.50"),
+            "memo": memo,
+            "has_receipt": bool(items),
+            "created_by": user_ids[payer],
+            "created_at": created_at,
+            "updated_at": created_at,
+        })
+        for item in items or ():
+            rows["transaction_items"].append({"transaction_id": transaction_id, "category_id": category_ids[category],
+                                              **item})
+        if rng.random() < 0.1:
+            rows["transaction_tags"].append({"transaction_id": transaction_id, "tag_id": rng.choice(tag_ids)})
+
+    # 前月の利用額（カード・現金・IC）を月初に銀行口座から精算する
+    spent = {CASH: 0, CARD: 0, IC: 0}
+    wallet_bank = BANK_2 if salaries[1] else BANK_1
+    settlements = {CASH: ("ATM引き出し", 10000, 1, wallet_bank), CARD: ("カード引き落とし", 1, 27, BANK_1),
+                   IC: ("Suica チャージ", 1000, 1, wallet_bank)}
+    for month_start in _month_starts(years, end):
+        days = _days_in_month(month_start)
+        month_key = month_start.strftime("%Y%m")
+
+        for parent in ("食費", "日用品", "交通費", "光熱費", "通信費", "娯楽", "衣服"):
+            rows["budgets"].append({"household_id": household_id, "month": month_key,
+                                    "category_id": category_ids[parent],
+                                    "amount_limit": rng.randrange(10000, 80000, 1000)})
+
+        # 収入と固定費
+        for payer, salary in enumerate(salaries):
+            if salary:
+                add_transaction(month_start.replace(day=25), TransactionType.income, salary,
+                                (BANK_1, BANK_2)[payer], "給与", f"{month_start.month}月分給与", payer)
+                if month_start.month in (6, 12):
+                    add_transaction(month_start.replace(day=10), TransactionType.income, salary * 2,
+                                    (BANK_1, BANK_2)[payer], "賞与", "賞与", payer)
+        add_transaction(month_start.replace(day=27), TransactionType.expense, rent, BANK_1, "家賃", "家賃")
+        winter = month_start.month in (12, 1, 2)
+        summer = month_start.month in (7, 8)
+        add_transaction(month_start.replace(day=20), TransactionType.expense,
+                        rng.randrange(9000 if winter or summer else 5000, 18000 if winter or summer else 9000, 10),
+                        BANK_1, "電気", "電気代")
+        add_transaction(month_start.replace(day=20), TransactionType.expense,
+                        rng.randrange(6000 if winter else 3000, 12000 if winter else 6000, 10),
+                        BANK_1, "ガス", "ガス代")
+        if month_start.month % 2 == 0:
+            add_transaction(month_start.replace(day=15), TransactionType.expense,
+                            rng.randrange(4000, 9000, 10), BANK_1, "水道", "水道代（2ヶ月分）")
+        add_transaction(month_start.replace(day=5), TransactionType.expense, phone, CARD, "携帯電話", "携帯電話")
+        add_transaction(month_start.replace(day=5), TransactionType.expense, internet, CARD,
+                        "インターネット", "インターネット")
+
+        for account, (memo, unit, day, bank) in settlements.items():
+            if spent[account]:
+                amount = -(-spent[account] // unit) * unit
+                add_transaction(month_start.replace(day=day), TransactionType.transfer, amount, bank, None,
+                                memo, counter=account)
+                spent[account] = 0
+        spent[CARD] += phone + internet
+
+        # 日々の支出
+        for _ in range(rng.randint(int(tx_per_month * 0.8), int(tx_per_month * 1.2))):
+            category, _, (low, high), _, item_choices, (min_items, max_items), account_weights = rng.choices(
+                SPENDING, spending_weights)[0]
+            day = month_start.replace(day=rng.randint(1, days))
+            items = _split_amount(rng, item_choices, rng.randint(min_items, max_items)) if item_choices else None
+            amount = sum(item["amount"] for item in items) if items else (
+                int(rng.lognormvariate(0, 0.6) * (low + high) / 2 // 10 * 10) or low)
+            account = rng.choices((CASH, CARD, IC), account_weights)[0]
+            spent[account] += amount
+            add_transaction(day, TransactionType.expense, amount, account, category,
+                            rng.choice(shops[category]), payer=rng.randrange(2), items=items)
+
+    return rows
+
+
+# 外部キーの依存順
+TABLE_ORDER = [
+    (Household, "households"), (User, "users"), (Account, "accounts"), (Category, "categories"),
+    (CategoryClosure, "category_closure"), (Tag, "tags"), (Budget, "budgets"),
+    (Transaction, "transactions"), (TransactionItem, "transaction_items"), (TransactionTag, "transaction_tags"),
+]
+
+
+def insert_household(engine, household_id: int, years: int, tx_per_month: int, seed: int,
+                     batch_size: int, end: Optional[date] = None) -> Dict[str, int]:
+    """Generate and bulk insert one household, then rebuild its balances."""
+    rows = build_household(household_id, years, tx_per_month, seed, end)
+    with Session(engine) as db:
+        for model, table in TABLE_ORDER:
+            table_rows = rows[table]
+            for start in range(0, len(table_rows), batch_size):
+                db.execute(insert(model), table_rows[start:start + batch_size])
+        balances.rebuild_balances(db, household_id)
+        db.commit()
+    return {table: len(table_rows) for table, table_rows in rows.items()}
+
+
+def _worker(url: str, household_id: int, years: int, tx_per_month: int, seed: int,
+            batch_size: int, end: date) -> Dict[str, int]:
+    engine = create_db_engine(url, poolclass=NullPool)
+    try:
+        return insert_household(engine, household_id, years, tx_per_month, seed, batch_size, end)
+    finally:
+        engine.dispose()
+
+
+def generate(engine, households: int = 1, years: int = 1, tx_per_month: int = 60, seed: int = 42,
+             workers: int = 1, batch_size: int = 10000, reset: bool = False,
+             end: Optional[date] = None) -> Dict[str, int]:
+    """
+    Fill the database behind ``engine`` and return row counts per table.
+
+    The history covers the ``years`` years before the month of ``end``
+    (default: the current month). With ``reset`` all tables are dropped and
+    recreated first; otherwise the database must not contain any household yet.
+    """
+    # 全ワーカーで同じ終了月を使う（日付をまたいで実行しても揃う）
+    end = (end or date.today()).replace(day=1)
+    if reset:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+    else:
+        with Session(engine) as db:
+            if db.execute(select(func.count(Household.id))).scalar():
+                raise RuntimeError("Database already contains households; use --reset to regenerate")
+
+    totals: Dict[str, int] = {}
+    household_ids = range(1, households + 1)
+    if workers <= 1:
+        results = (insert_household(engine, household_id, years, tx_per_month, seed, batch_size, end)
+                   for household_id in household_ids)
+        for counts in results:
+            for table, count in counts.items():
+                totals[table] = totals.get(table, 0) + count
+    else:
+        url = engine.url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_worker, url, household_id, years, tx_per_month, seed, batch_size, end)
+                       for household_id in household_ids]
+            for future in futures:
+                for table, count in future.result().items():
+                    totals[table] = totals.get(table, 0) + count
+    return totals
+
+
+def _month(value: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic household budget data")
+    parser.add_argument("--database-url", default=None, help="default: DATABASE_URL setting")
+    parser.add_argument("--households", type=int, default=1)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--tx-per-month", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=_month, default=None, metavar="YYYY-MM",
+                        help="the history ends before this month (default: the current month)")
+    parser.add_argument("--workers", type=int, default=1, help="parallel worker processes")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    url = args.database_url or settings.DATABASE_URL
+    if is_memory_sqlite(url):
+        parser.error("an in-memory database would be discarded on exit; use a file or server URL")
+    engine = create_db_engine(url)
+
+    print(f"🏠 {args.households}世帯 × {args.years}年 × 月{args.tx_per_month}件のデータを生成中...")
+    start = time.perf_counter()
+    try:
+        totals = generate(engine, args.households, args.years, args.tx_per_month, args.seed,
+                          args.workers, args.batch_size, args.reset, args.end)
+    except Exception as e:
+        print(f"❌ エラーが発生しました: {e}")
+        raise
+    finally:
+        engine.dispose()
+    elapsed = time.perf_counter() - start
+
+    total_rows = sum(totals.values())
+    print(f"\n🎉 データ生成が完了しました！（{elapsed:.1f}秒, {total_rows / elapsed:,.0f}行/秒）")
+    for table, count in totals.items():
+        print(f"   - {table}: {count:,}件")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+世帯を別のシャードへ移動するスクリプト
+
+Copies every row of one household from its current shard to another in bulk,
+records the new placement in the shard directory and then deletes the rows
+from the source shard.
+
+- Rows are read from the source in one transaction (a consistent snapshot on
+  InnoDB) and streamed table by table in ``--batch-size`` chunks, parents
+  before children.
+- The household keeps its id. Every other id is renumbered above the current
+  maximum of the target table and foreign keys are rewritten accordingly, so
+  the household can land on a shard that already holds others.
+- Sync tombstones are not copied: the renumbered ids make outstanding sync
+  tokens meaningless, so ``households.sync_epoch`` is incremented and clients
+  fetch a full snapshot.
+- Background job rows are not copied either (they are status records of the
+  process that ran them); wait for running jobs to finish before moving.
+- The copy is one target transaction: a failure (for example an id taken by a
+  concurrent insert on the target) leaves the target untouched and the move
+  can simply be retried.
+
+Run it while the household is quiet (no writes). Other API processes keep
+routing the household to the old shard until their directory cache expires
+(``SHARD_DIRECTORY_TTL_SECONDS``); keep the source rows with ``--keep-source``
+and delete them later if writes during that window matter.
+
+実行方法:
+docker-compose exec api python -m app.scripts.move_household --household 2 --to shard1
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+
+from app.database import SHARD_MAP, shard_engines
+from app.models import (
+    Account, AccountBalance, AccountBalanceCheckpoint, AuditLog, Budget, Category, CategoryClosure,
+    Household, Job, Receipt, SyncTombstone, Tag, Transaction, TransactionItem, TransactionTag, User,
+)
+
+# 親テーブルから順に。各テーブルの外部キー列 -> 参照先テーブル
+MOVE_ORDER = [
+    (Household, {}),
+    (User, {}),
+    (Account, {}),
+    (Category, {}),  # parent_id は全カテゴリ挿入後に付け替える
+    (CategoryClosure, {"ancestor_id": "categories", "descendant_id": "categories"}),
+    (Tag, {}),
+    (Budget, {"category_id": "categories"}),
+    (Transaction, {"account_id": "accounts", "counter_account_id": "accounts", "category_id": "categories",
+                   "payer_user_id": "users", "created_by": "users"}),
+    (TransactionItem, {"transaction_id": "transactions", "category_id": "categories"}),
+    (TransactionTag, {"transaction_id": "transactions", "tag_id": "tags"}),
+    (Receipt, {"transaction_id": "transactions"}),
+    (AccountBalance, {"account_id": "accounts"}),
+    (AccountBalanceCheckpoint, {"account_id": "accounts"}),
+    (AuditLog, {"user_id": "users"}),
+]
+
+# 監査ログの entity 名 -> entity_id が指すテーブル
+AUDIT_ENTITY_TABLES = {
+    "transaction": "transactions", "account": "accounts", "category": "categories",
+    "budget": "budgets", "tag": "tags", "user": "users",
+}
+
+
+def household_criteria(model, household_id: int):
+    """WHERE clause selecting the rows of ``model`` that belong to the household."""
+    if model is Household:
+        return Household.id == household_id
+    if hasattr(model, "household_id"):
+        return model.household_id == household_id
+    if model is CategoryClosure:
+        return CategoryClosure.descendant_id.in_(select(Category.id).where(Category.household_id == household_id))
+    if model is AuditLog:
+        return AuditLog.user_id.in_(select(User.id).where(User.household_id == household_id))
+    return model.transaction_id.in_(select(Transaction.id).where(Transaction.household_id == household_id))
+
+
+def _renumbers(model) -> bool:
+    return model is not Household and "id" in model.__table__.c
+
+
+def copy_household(source: Connection, target: Connection, household_id: int, batch_size: int) -> Dict[str, int]:
+    """Copy the household from ``source`` to ``target``; returns row counts per table."""
+    id_maps: Dict[str, Dict[int, int]] = {}
+    counts: Dict[str, int] = {}
+    category_parents: List[dict] = []
+
+    for model, foreign_keys in MOVE_ORDER:
+        table = model.__table__
+        id_map = id_maps.setdefault(table.name, {})
+        next_id = (target.execute(select(func.max(table.c.id))).scalar() or 0) + 1 if _renumbers(model) else None
+        counts[table.name] = 0
+
+        query = select(table).where(household_criteria(model, household_id)).order_by(*table.primary_key.columns)
+        result = source.execution_options(yield_per=batch_size).execute(query)
+        for partition in result.mappings().partitions():
+            rows = []
+            for source_row in partition:
+                row = dict(source_row)
+                if next_id is not None:
+                    id_map[row["id"]] = next_id
+                    row["id"] = next_id
+                    next_id += 1
+                for column, referenced in foreign_keys.items():
+                    if row[column] is not None:
+                        row[column] = id_maps[referenced][row[column]]
+                if model is Household:
+                    row["sync_epoch"] += 1
+                if model is Category and row["parent_id"] is not None:
+                    category_parents.append({"_id": row["id"], "_old_parent": row["parent_id"]})
+                    row["parent_id"] = None
+                if model is AuditLog and AUDIT_ENTITY_TABLES.get(row["entity"]) in id_maps:
+                    row["entity_id"] = id_maps[AUDIT_ENTITY_TABLES[row["entity"]]].get(
+                        row["entity_id"], row["entity_id"]
+                    )
+                rows.append(row)
+            target.execute(insert(table), rows)
+            counts[table.name] += len(rows)
+
+        if model is Category and category_parents:
+            for parent in category_parents:
+                parent["_parent"] = id_map[parent.pop("_old_parent")]
+            target.execute(
+                update(table).where(table.c.id == bindparam("_id")).values(parent_id=bindparam("_parent")),
+                category_parents,
+            )
+    return counts
+
+
+def delete_household(conn: Connection, household_id: int) -> None:
+    """Delete every row of the household, children first."""
+    categories = Category.__table__
+    conn.execute(update(categories).where(categories.c.household_id == household_id).values(parent_id=None))
+    conn.execute(delete(SyncTombstone.__table__).where(SyncTombstone.household_id == household_id))
+    conn.execute(delete(Job.__table__).where(Job.household_id == household_id))
+    for model, _ in reversed(MOVE_ORDER):
+        conn.execute(delete(model.__table__).where(household_criteria(model, household_id)))
+
+
+def move(household_id: int, to: str, keep_source: bool = False, batch_size: int = 5000) -> Dict[str, int]:
+    source_shard = SHARD_MAP.shard_for(household_id)
+    if to not in shard_engines:
+        raise LookupError(f"Unknown shard '{to}' (configured: {', '.join(sorted(shard_engines))})")
+    if to == source_shard:
+        raise ValueError(f"Household {household_id} is already on shard '{to}'")
+
+    with shard_engines[source_shard].begin() as source, shard_engines[to].begin() as target:
+        if not source.execute(select(Household.id).where(Household.id == household_id)).scalar():
+            raise LookupError(f"Household {household_id} not found on shard '{source_shard}'")
+        if target.execute(select(Household.id).where(Household.id == household_id)).scalar():
+            raise ValueError(f"Household {household_id} already exists on shard '{to}'")
+        counts = copy_household(source, target, household_id, batch_size)
+
+    SHARD_MAP.assign(household_id, to)
+
+    if not keep_source:
+        with shard_engines[source_shard].begin() as conn:
+            delete_household(conn, household_id)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move a household to another shard")
+    parser.add_argument("--household", type=int, required=True)
+    parser.add_argument("--to", required=True, help="target shard name (see SHARD_URLS)")
+    parser.add_argument("--keep-source", action="store_true", help="do not delete the rows from the source shard")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        source_shard = SHARD_MAP.shard_for(args.household)
+        counts = move(args.household, args.to, args.keep_source, args.batch_size)
+    except Exception as e:
+        print(f"❌ 移動に失敗しました: {e}")
+        raise SystemExit(1)
+
+    for table, count in counts.items():
+        print(f"  {table}: {count}件")
+    print(f"🎉 家族 {args.household} を {source_shard} から {args.to} へ移動しました "
+          f"({sum(counts.values())}行, {time.perf_counter() - start:.1f}秒)")
+    if args.keep_source:
+        print(f"ℹ️ 移動元 ({source_shard}) の行は残しています")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+分析用の Parquet スナップショットを書き出すスクリプト
+
+Writes transactions and items to ``SNAPSHOT_DIR`` partitioned by household,
+year and month (see ``app.snapshots``). Ranges are widened to whole months.
+
+実行方法（cron などで夜間に実行）:
+docker-compose exec api python -m app.scripts.parquet_snapshots
+docker-compose exec api python -m app.scripts.parquet_snapshots --household 2 --from 2023-01-01 --to 2024-12-31
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database import current_household, shard_engines
+from app.models import Household
+from app.snapshots import write_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write Parquet snapshots of transactions and items")
+    parser.add_argument("--household", type=int, help="only this household (default: all)")
+    parser.add_argument("--from", dest="from_date", help="YYYY-MM-DD (default: first transaction)")
+    parser.add_argument("--to", dest="to_date", help="YYYY-MM-DD (default: last transaction)")
+    parser.add_argument("--dir", help="snapshot directory (default: SNAPSHOT_DIR)")
+    args = parser.parse_args()
+
+    from_date = datetime.strptime(args.from_date, "%Y-%m-%d").date() if args.from_date else None
+    to_date = datetime.strptime(args.to_date, "%Y-%m-%d").date() if args.to_date else None
+
+    # 世帯は各シャードの households テーブルにあるので、シャードごとに処理する
+    for shard, shard_engine in shard_engines.items():
+        db = Session(bind=shard_engine)
+        try:
+            query = select(Household.id).order_by(Household.id)
+            if args.household is not None:
+                query = query.where(Household.id == args.household)
+            for household_id in db.execute(query).scalars().all():
+                current_household.set(household_id)
+                start = time.perf_counter()
+                result = write_snapshot(db, household_id, from_date, to_date, args.dir)
+                rows = {dataset: sum(p["rows"] for p in result["partitions"] if p["dataset"] == dataset)
+                        for dataset in ("transactions", "items")}
+                months = len({(p["year"], p["month"]) for p in result["partitions"]})
+                print(f"✅ [{shard}] 家族 {household_id}: {result['from_date']}〜{result['to_date']} "
+                      f"取引 {rows['transactions']:,}件・明細 {rows['items']:,}件 ({months}か月, "
+                      f"{time.perf_counter() - start:.1f}秒)")
+            db.rollback()
+        except Exception as e:
+            print(f"❌ [{shard}] エラーが発生しました: {e}")
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
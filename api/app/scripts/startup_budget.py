@@ -0,0 +1,134 @@
+"""
+起動時間の予算チェック
+
+Measures, each in a fresh interpreter:
+
+- import time of ``app.main`` (``python -X importtime``) with the slowest direct
+  imports, and whether any module from ``app.lazy.HEAVY_MODULES`` got imported
+  eagerly;
+- time until ``/readyz`` answers 200 under uvicorn (includes the warmup), and
+  the latency of the first request to a hot endpoint after that.
+
+Exits non-zero when a budget is exceeded, so it can run in CI.
+
+実行方法:
+docker-compose exec api python -m app.scripts.startup_budget
+python -m app.scripts.startup_budget --database-url sqlite:////tmp/monimoni.db
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+
+IMPORT_PROBE = (
+    "import json, sys\n"
+    "import app.main\n"
+    "from app.lazy import HEAVY_MODULES\n"
+    "print(json.dumps([m for m in HEAVY_MODULES if m in sys.modules]))\n"
+)
+
+
+def measure_imports(env: dict) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """Return (app.main cumulative ms, slowest direct imports, eagerly loaded heavy modules)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", IMPORT_PROBE],
+                            capture_output=True, text=True, env=env, check=True)
+    total_ms, children = 0.0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if name.strip() == "app.main":
+            total_ms = int(cumulative) / 1000
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    heavy = json.loads(result.stdout.strip().splitlines()[-1])
+    return total_ms, sorted(children, key=lambda child: -child[1])[:10], heavy
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(env: dict, path: str, timeout: float) -> Tuple[float, float]:
+    """Return (ms until /readyz is 200, ms of the first request to ``path``)."""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"/readyz not ready after {timeout}s")
+                try:
+                    if client.get("/readyz").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            ready_ms = (time.perf_counter() - start) * 1000
+
+            request_start = time.perf_counter()
+            client.get(path)
+            first_ms = (time.perf_counter() - request_start) * 1000
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return ready_ms, first_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import-time and time-to-first-response budgets")
+    parser.add_argument("--database-url", default=None, help="default: DATABASE_URL of the environment")
+    parser.add_argument("--path", default="/api/transactions/?size=50", help="hot endpoint for the first request")
+    parser.add_argument("--import-budget-ms", type=float, default=1500)
+    parser.add_argument("--ready-budget-ms", type=float, default=5000)
+    parser.add_argument("--first-response-budget-ms", type=float, default=250)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for readiness")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+
+    failed = False
+
+    def check(label: str, value: float, budget: float) -> None:
+        nonlocal failed
+        ok = value <= budget
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {label}: {value:.0f}ms (予算 {budget:.0f}ms)")
+
+    import_ms, slowest, heavy = measure_imports(env)
+    check("import app.main", import_ms, args.import_budget_ms)
+    for name, ms in slowest:
+        print(f"   - {name}: {ms:.1f}ms")
+    if heavy:
+        failed = True
+        print(f"❌ 起動時に重いモジュールが読み込まれています: {', '.join(heavy)}")
+
+    ready_ms, first_ms = measure_first_response(env, args.path, args.timeout)
+    check("プロセス起動から /readyz まで", ready_ms, args.ready_budget_ms)
+    check(f"最初のリクエスト {args.path}", first_ms, args.first_response_budget_ms)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
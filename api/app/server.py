@@ -0,0 +1,133 @@
+"""
+本番用サーバー起動モジュール
+
+Starts uvicorn with one worker per available core (CPU affinity and cgroup
+quota aware, ``WEB_CONCURRENCY`` overrides), uvloop and httptools when they
+are installed, and a per-worker connection pool sized so that
+``workers × (pool_size + max_overflow)`` stays within MySQL's
+``max_connections`` minus a reserve for migrations, backups and admin
+sessions. The pool settings reach the workers through the environment, which
+``settings`` reads when each worker imports the app, and are applied to this
+process's ``settings`` too: with a single worker uvicorn imports the app here.
+The launcher therefore only uses ``app.engines`` and never imports
+``app.database``, whose engines are sized when it is first imported.
+
+Login revocations (``/auth/logout``) are per process (``app.token_cache``):
+with several workers a logged-out token is rejected by the worker that
+handled the logout and keeps working on the others until it expires.
+
+On SIGTERM uvicorn stops accepting connections, lets in-flight requests finish
+for up to ``SHUTDOWN_GRACE_SECONDS`` and then runs the lifespan shutdown, which
+marks the app not ready and closes the pool.
+
+実行方法:
+python -m app.server
+python -m app.server --workers 4 --port 8000
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+from typing import Optional, Tuple
+
+import uvicorn
+from sqlalchemy.pool import NullPool
+
+from app.engines import DATABASE_URL, create_db_engine, is_memory_sqlite
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> int:
+    """Cores this process may use, honouring CPU affinity and a cgroup v2 quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(int(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return max(cores, 1)
+
+
+def server_max_connections(url: str) -> Optional[int]:
+    """Read ``max_connections`` from a MySQL server, or None if unavailable."""
+    engine = create_db_engine(url, poolclass=NullPool)
+    try:
+        if engine.dialect.name != "mysql":
+            return None
+        with engine.connect() as conn:
+            return int(conn.exec_driver_sql("SELECT @@max_connections").scalar())
+    except Exception as e:
+        logger.warning("Could not read max_connections, using DB_MAX_CONNECTIONS: %s", e)
+        return None
+    finally:
+        engine.dispose()
+
+
+def pool_per_worker(workers: int, max_connections: int) -> Tuple[int, int]:
+    """Split the connection budget across workers: (pool_size, max_overflow) per worker."""
+    budget = max((max_connections - settings.DB_RESERVED_CONNECTIONS) // workers, 1)
+    pool_size = min(settings.DB_POOL_SIZE, budget)
+    max_overflow = min(settings.DB_MAX_OVERFLOW, budget - pool_size)
+    return pool_size, max_overflow
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with production settings")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")),
+                        help="default: WEB_CONCURRENCY or one per available core")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    workers = args.workers or available_cores()
+    if is_memory_sqlite(DATABASE_URL):
+        # インメモリDBはプロセスごとに別物になるため1プロセスに限定
+        workers = 1
+
+    max_connections = server_max_connections(DATABASE_URL) or settings.DB_MAX_CONNECTIONS
+    budget = max_connections - settings.DB_RESERVED_CONNECTIONS
+    if workers > budget:
+        logger.warning("Only %d connections available, reducing workers from %d", budget, workers)
+        workers = max(budget, 1)
+    pool_size, max_overflow = pool_per_worker(workers, max_connections)
+    # 子プロセスのワーカーは環境変数から、1ワーカー時（このプロセスで app を読み込む）は settings から
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    settings.DB_POOL_SIZE = pool_size
+    settings.DB_MAX_OVERFLOW = max_overflow
+    if workers > 1:
+        logger.warning("Logout revokes tokens per worker; other workers accept them until they expire")
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    logger.info(
+        "Starting %d worker(s) (loop=%s, http=%s), pool_size=%d max_overflow=%d per worker, "
+        "max_connections=%d", workers, loop, http, pool_size, max_overflow, max_connections
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        timeout_graceful_shutdown=settings.SHUTDOWN_GRACE_SECONDS,
+        access_log=False,  # アクセスログは app.main のミドルウェアで出力済み
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
@@ -8,17 +8,62 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "mysql+aiomysql://app:app_password@db:3306/family_budget"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_MAX_CONNECTIONS: int = 151  # MySQL の既定値。app.server は起動時にサーバーから取得を試みる
+    DB_RESERVED_CONNECTIONS: int = 10  # マイグレーション・バックアップ・管理用に残す接続数
+    DATABASE_REPLICA_URLS: str = ""  # カンマ区切り。GET の読み取りをレプリカへ振り分ける
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # 書き込み後この秒数はそのクライアントの読み取りをプライマリに固定
+
+    # Multi-tenancy / sharding
+    DEFAULT_HOUSEHOLD_ID: int = 1  # household_id を含まない旧トークン・ログインの既定世帯
+    HOUSEHOLD_PINS: str = ""  # 世帯ごとのPIN "2:5678,3:4321"（既定世帯は HOUSEHOLD_PIN）
+    SHARD_URLS: str = ""  # 追加シャード "shard1=mysql+pymysql://...,shard2=..."（"default" は DATABASE_URL）
+    SHARD_MAP_CLASS: str = "app.sharding.DirectoryShardMap"
+    SHARD_DIRECTORY_TTL_SECONDS: float = 30.0
+
+    @property
+    def household_pins(self) -> Dict[int, str]:
+        """Parse HOUSEHOLD_PINS into {household_id: pin}."""
+        pins = {}
+        for entry in self.HOUSEHOLD_PINS.split(","):
+            if ":" in entry:
+                household_id, pin = entry.split(":", 1)
+                pins[int(household_id.strip())] = pin.strip()
+        return pins
+
+    @property
+    def shard_urls(self) -> Dict[str, str]:
+        """Parse SHARD_URLS into {shard name: url}."""
+        shards = {}
+        for entry in self.SHARD_URLS.split(","):
+            if "=" in entry:
+                name, url = entry.split("=", 1)
+                shards[name.strip()] = url.strip()
+        return shards
+
+    @property
+    def replica_urls_list(self) -> List[str]:
+        """Convert comma-separated replica URLs to a list."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
     # Security
     APP_SECRET: str = "your-secret-key-change-in-production"
     HOUSEHOLD_PIN: str = "1234"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 1 week
+    AUTH_CACHE_ENABLED: bool = True  # 検証済みトークンをキャッシュして署名検証を省略
+    AUTH_CACHE_SIZE: int = 1024
+    REVOKED_TOKENS_MAX_SIZE: int = 10000  # ログアウト済みトークンの保持数の上限（プロセス単位）
 
     # File Upload
     UPLOAD_DIR: str = "/data/receipts"
     MAX_UPLOAD_MB: int = 5
     ALLOWED_EXTENSIONS: List[str] = ["jpg", "jpeg", "png", "pdf"]
 
+    # Analytics snapshots (app.snapshots)
+    SNAPSHOT_DIR: str = "/data/snapshots"  # 世帯ごとの年/月パーティションの Parquet
+    SNAPSHOT_BATCH_ROWS: int = 10000  # DB から読み Parquet に書く1バッチの行数
+
     # CORS
     FRONTEND_ORIGIN: str = "http://localhost"
     CORS_ALLOWED_ORIGINS: str = "http://localhost,http://localhost:5173"
@@ -32,6 +77,70 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     TIMEZONE: str = "Asia/Tokyo"
 
+    # Instrumentation
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10  # 同一形状のSQLが1リクエストでこの回数を超えたら警告（DEBUG時）
+    SQL_ECHO: bool = False  # 全SQLをログ出力（重いので調査時のみ）
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # これより小さい完結したレスポンスは圧縮しない（bytes）
+    COMPRESSION_ENCODINGS: str = "br,zstd,gzip"  # 同じ q 値ならこの順で選ぶ（未インストールのものは除外）
+
+    @property
+    def compression_encodings_list(self) -> List[str]:
+        return [name.strip() for name in self.COMPRESSION_ENCODINGS.split(",") if name.strip()]
+
+    # Server-sent events (/api/events/stream)
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # コメント行の間隔。このときに他ワーカーの変更も DB から拾う
+    SSE_RETRY_MS: int = 3000  # 切断時にブラウザが再接続するまでの待ち
+    SSE_QUEUE_SIZE: int = 100  # 購読者ごとの未送信イベント数（あふれた分は DB から補完）
+    SSE_MAX_REPLAY_VERSIONS: int = 1000  # Last-Event-ID からこれ以上離れていたら resync
+
+    # Background jobs (app.jobs)
+    JOBS_THREAD_WORKERS: int = 4  # I/O・DB 中心のジョブ（CSV 入出力、スナップショット）
+    JOBS_PROCESS_WORKERS: int = 2  # CPU 中心のジョブ（レシート画像処理）
+    JOBS_MAX_QUEUED: int = 100  # 種類ごとの待ち行列の上限。あふれたら 503
+    JOBS_PROGRESS_INTERVAL_SECONDS: float = 1.0  # 進捗を jobs テーブルへ書く最短間隔
+    JOB_CONCURRENCY: str = ""  # 種類ごとの同時実行数の上書き "csv_import=1,csv_export=4"
+    EXPORT_DIR: str = "/data/exports"  # CSV エクスポートの出力先
+
+    @property
+    def job_concurrency(self) -> Dict[str, int]:
+        """Parse JOB_CONCURRENCY into {job type: limit}."""
+        limits = {}
+        for entry in self.JOB_CONCURRENCY.split(","):
+            if "=" in entry:
+                name, limit = entry.split("=", 1)
+                limits[name.strip()] = int(limit.strip())
+        return limits
+
+    # Admission control (app.admission)
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_POOL_WAIT_MS: float = 100.0  # 接続待ちの直近平均がこれを超えたら飽和（低優先度を断る）
+    ADMISSION_POOL_WAITERS: int = 4  # 接続待ちの数がこれに達したら飽和
+    ADMISSION_OVERLOAD_FACTOR: float = 5.0  # 飽和度がこの倍率に達したら通常のリクエストも断る
+    ADMISSION_LOW_MAX_IN_FLIGHT: int = 4  # レポート・エクスポートなどの同時実行数の上限
+    ADMISSION_NORMAL_MAX_IN_FLIGHT: int = 64  # 通常のリクエストの同時実行数の上限
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5  # 503 の Retry-After
+
+    # Caching
+    DASHBOARD_CACHE_SIZE: int = 512  # ダッシュボードのペイロードを (世帯, 月, データバージョン) ごとに保持
+    COLUMN_STORE_MAX_MB: int = 64  # レポート用の列ストア（世帯ごとの NumPy 配列）の上限。超えたら古い世帯から破棄
+
+    # Startup / shutdown
+    SHUTDOWN_GRACE_SECONDS: int = 30  # SIGTERM 後に処理中リクエストの完了を待つ秒数
+    STARTUP_WARMUP: bool = True  # 起動時に接続プールとホットパスを温めてから ready にする
+    WARMUP_PATHS: List[str] = [
+        "/api/dashboard/",
+        "/api/transactions/?size=50",
+        "/api/accounts/balances",
+        "/api/budgets/",
+        "/api/categories/",
+    ]
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,107 @@
+"""
+世帯のシャード振り分け
+
+Each household lives entirely on one shard (one database with the full
+schema). ``ShardMap`` decides which; the engine for the current household is
+picked by ``RoutingSession.get_bind``. The implementation is chosen with
+``SHARD_MAP_CLASS``:
+
+- ``SingleShardMap``: everything on ``default`` (``DATABASE_URL``).
+- ``ModuloShardMap``: ``household_id % number of shards`` over the sorted names.
+- ``DirectoryShardMap`` (default): explicit placements from the
+  ``household_shards`` table on the default shard, cached per process for
+  ``SHARD_DIRECTORY_TTL_SECONDS``; unlisted households stay on ``default``.
+  ``app.scripts.move_household`` updates it when moving a household.
+
+With only the default shard configured every map short-circuits to it without
+any lookup.
+"""
+
+import importlib
+import threading
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Engine
+
+from app.models import HouseholdShard
+
+DEFAULT_SHARD = "default"
+
+
+class ShardMap:
+    """Maps household ids to shard names and engines."""
+
+    def __init__(self, engines: Dict[str, Engine]):
+        if DEFAULT_SHARD not in engines:
+            raise ValueError("The shard map needs a 'default' engine")
+        self.engines = engines
+
+    def shard_for(self, household_id: int) -> str:
+        raise NotImplementedError
+
+    def engine_for(self, household_id: int) -> Engine:
+        if len(self.engines) == 1:
+            return self.engines[DEFAULT_SHARD]
+        return self.engines[self.shard_for(household_id)]
+
+    def assign(self, household_id: int, shard: str) -> None:
+        """Record that a household now lives on ``shard`` (only for directory-based maps)."""
+        raise NotImplementedError(f"{type(self).__name__} places households implicitly")
+
+
+class SingleShardMap(ShardMap):
+    def shard_for(self, household_id: int) -> str:
+        return DEFAULT_SHARD
+
+
+class ModuloShardMap(ShardMap):
+    def __init__(self, engines: Dict[str, Engine]):
+        super().__init__(engines)
+        self._names = sorted(engines)
+
+    def shard_for(self, household_id: int) -> str:
+        return self._names[household_id % len(self._names)]
+
+
+class DirectoryShardMap(ShardMap):
+    def __init__(self, engines: Dict[str, Engine], ttl: float = 30.0):
+        super().__init__(engines)
+        self.ttl = ttl
+        self._cache: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def shard_for(self, household_id: int) -> str:
+        cached = self._cache.get(household_id)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        with self.engines[DEFAULT_SHARD].connect() as conn:
+            shard = conn.execute(
+                select(HouseholdShard.shard).where(HouseholdShard.household_id == household_id)
+            ).scalar() or DEFAULT_SHARD
+        if shard not in self.engines:
+            raise LookupError(f"Household {household_id} is placed on unknown shard '{shard}'")
+        with self._lock:
+            self._cache[household_id] = (shard, time.monotonic() + self.ttl)
+        return shard
+
+    def assign(self, household_id: int, shard: str) -> None:
+        if shard not in self.engines:
+            raise LookupError(f"Unknown shard '{shard}'")
+        with self.engines[DEFAULT_SHARD].begin() as conn:
+            conn.execute(delete(HouseholdShard).where(HouseholdShard.household_id == household_id))
+            if shard != DEFAULT_SHARD:
+                conn.execute(insert(HouseholdShard).values(household_id=household_id, shard=shard))
+        with self._lock:
+            self._cache.pop(household_id, None)
+
+
+def load_shard_map(engines: Dict[str, Engine], class_path: str, ttl: float) -> ShardMap:
+    """Instantiate the shard map named by a dotted path such as ``app.sharding.ModuloShardMap``."""
+    module_name, _, class_name = class_path.rpartition(".")
+    shard_map_class = getattr(importlib.import_module(module_name), class_name)
+    if issubclass(shard_map_class, DirectoryShardMap):
+        return shard_map_class(engines, ttl=ttl)
+    return shard_map_class(engines)
@@ -0,0 +1,117 @@
+"""
+スロークエリの記録
+
+Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` are kept in a bounded ring
+buffer with their normalized text, duration, row count and the route that ran
+them. A sample of them gets an EXPLAIN plan, run on a separate connection in a
+background thread so the slow request itself does not wait for it. Plans are
+cached per statement shape and attached to every entry of that shape.
+"""
+
+import logging
+import random
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import query_stats
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_CACHED_PLANS = 256
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements with sampled EXPLAIN plans."""
+
+    def __init__(self, threshold_ms: float, size: int, explain_sample_rate: float):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self._entries: deque = deque(maxlen=size)
+        self._plans: "OrderedDict[str, list]" = OrderedDict()
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        duration = query_stats.elapsed(context)
+        if duration < self.threshold or statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+
+        stats = query_stats.current_stats()
+        shape = query_stats.normalize_statement(statement)
+        rowcount = getattr(cursor, "rowcount", -1)
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "statement": shape,
+            "duration_ms": round(duration * 1000, 2),
+            "rowcount": rowcount if rowcount is not None and rowcount >= 0 else None,
+            "route": stats.route if stats else None,
+            "explain": None,
+        }
+        self._entries.append(entry)
+        logger.warning("Slow query (%.1fms) on %s: %s", entry["duration_ms"], entry["route"], shape)
+
+        # EXPLAIN は単発の SELECT のみ、形状ごとに1件ずつ
+        explainable = not executemany and statement.lstrip()[:6].upper() == "SELECT"
+        with self._lock:
+            entry["explain"] = self._plans.get(shape)
+            wants_plan = entry["explain"] is None or random.random() < self.explain_sample_rate
+            if not (explainable and wants_plan) or shape in self._pending:
+                return
+            self._pending.add(shape)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+        self._executor.submit(self._explain, conn.engine, statement, parameters, shape, entry)
+
+    def _explain(self, engine: Engine, statement: str, parameters, shape: str, entry: dict) -> None:
+        prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            with engine.connect() as conn:
+                result = conn.exec_driver_sql(prefix + statement, parameters)
+                plan = [{key: value for key, value in row._mapping.items()} for row in result]
+        except Exception as e:
+            plan = [{"error": str(e)}]
+
+        with self._lock:
+            self._pending.discard(shape)
+            self._plans[shape] = plan
+            self._plans.move_to_end(shape)
+            while len(self._plans) > _MAX_CACHED_PLANS:
+                self._plans.popitem(last=False)
+        entry["explain"] = plan
+
+    def snapshot(self, limit: Optional[int] = None) -> List[dict]:
+        """Return recorded entries, newest first."""
+        entries = list(self._entries)[::-1]
+        return entries[:limit] if limit else entries
+
+    def clear(self) -> None:
+        self._entries.clear()
+        with self._lock:
+            self._plans.clear()
+
+
+SLOW_QUERY_LOG = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    size=settings.SLOW_QUERY_LOG_SIZE,
+    explain_sample_rate=settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    SLOW_QUERY_LOG.record(conn, cursor, statement, parameters, context, executemany)
+
+
+def install() -> None:
+    """Register the recorder on every Engine (idempotent)."""
+    query_stats.install()
+    if not event.contains(Engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,435 @@
+"""
+分析用の Parquet スナップショット
+
+Transactions and their items are written per household to Hive-partitioned
+Parquet files::
+
+    {SNAPSHOT_DIR}/household=2/transactions/year=2024/month=03/part.parquet
+    {SNAPSHOT_DIR}/household=2/items/year=2024/month=03/part.parquet
+
+Rows are streamed from the database in ``SNAPSHOT_BATCH_ROWS`` batches ordered
+by date and appended to one open ``ParquetWriter`` per month, so memory stays
+at one batch however long the range is. Snapshots always cover whole months: a
+requested range is widened to month boundaries and each month file is
+replaced atomically (months without rows lose their file). Every file carries
+the household data version it was written at in its schema metadata.
+
+``load_snapshot`` memory-maps the month files of a range back into one Arrow
+table, so long-range reports and year-over-year comparisons read local
+columnar files instead of scanning the OLTP tables. ``monthly_totals`` (the
+year-over-year report) reads a month from its snapshot while it is current:
+written in the household's sync epoch, with no transaction written or deleted
+in that month since (``sync_version`` and tombstones after the snapshot's data
+version). Other months are summed in SQL. Money is ``int64`` in
+minor units like the database (``app.money``); ratios and quantities stay
+exact as ``decimal128``. Month files written before amounts became integers
+have a different schema and must be rewritten. pyarrow is imported lazily
+through ``app.lazy``.
+"""
+
+import os
+from calendar import monthrange
+from datetime import date, datetime
+from enum import Enum
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.jobs import JobContext, job_type
+from app.lazy import OptionalDependencyError, optional_import
+from app.models import Household, SyncTombstone, Transaction, TransactionItem
+from app.settings import settings
+
+DATASETS = ("transactions", "items")
+PART_FILE = "part.parquet"
+
+# (スナップショットの列名, SQLAlchemy の列, Arrow 型の名前)
+_COLUMNS = {
+    "transactions": [
+        ("id", Transaction.id, "int64"),
+        ("date", Transaction.date, "date32"),
+        ("type", Transaction.type, "string"),
+        ("amount_total", Transaction.amount_total, "int64"),
+        ("account_id", Transaction.account_id, "int64"),
+        ("counter_account_id", Transaction.counter_account_id, "int64"),
+        ("category_id", Transaction.category_id, "int64"),
+        ("payer_user_id", Transaction.payer_user_id, "int64"),
+        ("split_ratio_payer", Transaction.split_ratio_payer, "decimal(5,2)"),
+        ("memo", Transaction.memo, "string"),
+        ("has_receipt", Transaction.has_receipt, "bool"),
+        ("created_by", Transaction.created_by, "int64"),
+        ("created_at", Transaction.created_at, "timestamp"),
+        ("updated_at", Transaction.updated_at, "timestamp"),
+    ],
+    "items": [
+        ("id", TransactionItem.id, "int64"),
+        ("transaction_id", TransactionItem.transaction_id, "int64"),
+        ("date", Transaction.date, "date32"),
+        ("type", Transaction.type, "string"),
+        ("name", TransactionItem.name, "string"),
+        ("quantity", TransactionItem.quantity, "decimal(10,2)"),
+        ("unit_price", TransactionItem.unit_price, "int64"),
+        ("amount", TransactionItem.amount, "int64"),
+        ("category_id", TransactionItem.category_id, "int64"),
+        ("transaction_category_id", Transaction.category_id, "int64"),
+        ("payer_user_id", Transaction.payer_user_id, "int64"),
+    ],
+}
+
+
+def _pa():
+    return optional_import("pyarrow", "Parquet snapshots")
+
+
+def _pq():
+    return optional_import("pyarrow.parquet", "Parquet snapshots")
+
+
+def _arrow_type(name: str):
+    pa = _pa()
+    if name.startswith("decimal"):
+        precision, scale = name[len("decimal("):-1].split(",")
+        return pa.decimal128(int(precision), int(scale))
+    return {
+        "int64": pa.int64(),
+        "date32": pa.date32(),
+        "string": pa.string(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("s"),
+    }[name]
+
+
+def schema(dataset: str):
+    pa = _pa()
+    return pa.schema([(name, _arrow_type(type_name)) for name, _, type_name in _COLUMNS[dataset]])
+
+
+def snapshot_root(directory: Optional[str] = None) -> Path:
+    return Path(directory or settings.SNAPSHOT_DIR)
+
+
+def partition_path(household_id: int, dataset: str, year: int, month: int, directory: Optional[str] = None) -> Path:
+    return (snapshot_root(directory) / f"household={household_id}" / dataset
+            / f"year={year:04d}" / f"month={month:02d}" / PART_FILE)
+
+
+def _months(from_date: date, to_date: date) -> Iterator[Tuple[int, int]]:
+    year, month = from_date.year, from_date.month
+    while (year, month) <= (to_date.year, to_date.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def month_range(from_date: date, to_date: date) -> Tuple[date, date]:
+    """Widen a date range to whole months."""
+    return from_date.replace(day=1), to_date.replace(day=monthrange(to_date.year, to_date.month)[1])
+
+
+class _MonthWriter:
+    """One open ``ParquetWriter`` at a time; each month file is swapped in when complete."""
+
+    def __init__(self, household_id: int, dataset: str, metadata: Dict[str, str], directory: Optional[str]):
+        self.household_id = household_id
+        self.dataset = dataset
+        self.directory = directory
+        self.schema = schema(dataset).with_metadata(metadata)
+        self.written: Dict[Tuple[int, int], int] = {}
+        self._month: Optional[Tuple[int, int]] = None
+        self._writer = None
+        self._tmp: Optional[Path] = None
+
+    def write(self, month: Tuple[int, int], rows: List[tuple]) -> None:
+        if month != self._month:
+            self.close()
+            path = partition_path(self.household_id, self.dataset, *month, self.directory)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp = path.with_name(f".{PART_FILE}.{os.getpid()}.tmp")
+            self._writer = _pq().ParquetWriter(str(self._tmp), self.schema, compression="zstd")
+            self._month = month
+        pa = _pa()
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), self.schema)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        self.written[month] = self.written.get(month, 0) + len(rows)
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(self._tmp, self._tmp.with_name(PART_FILE))
+        self._writer = self._tmp = self._month = None
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._tmp.unlink(missing_ok=True)
+            self._writer = self._tmp = self._month = None
+
+
+def _row_values(row) -> tuple:
+    # Enum は値（"expense" など）で保存する
+    return tuple(value.value if isinstance(value, Enum) else value for value in row)
+
+
+def _stream_dataset(db: Session, household_id: int, dataset: str, from_date: date, to_date: date,
+                    writer: _MonthWriter) -> None:
+    query = select(*(column for _, column, _ in _COLUMNS[dataset]))
+    if dataset == "items":
+        query = query.join(Transaction, Transaction.id == TransactionItem.transaction_id)
+        order = (Transaction.date, TransactionItem.transaction_id, TransactionItem.id)
+    else:
+        order = (Transaction.date, Transaction.id)
+    query = query.where(
+        Transaction.household_id == household_id, Transaction.date >= from_date, Transaction.date <= to_date
+    ).order_by(*order)
+
+    date_index = [name for name, _, _ in _COLUMNS[dataset]].index("date")
+    result = db.execute(query.execution_options(yield_per=settings.SNAPSHOT_BATCH_ROWS))
+    for batch in result.partitions():
+        # 日付順なので、バッチ内の月の切れ目で分けるだけでよい
+        rows = [_row_values(row) for row in batch]
+        for month, group in groupby(rows, key=lambda row: (row[date_index].year, row[date_index].month)):
+            writer.write(month, list(group))
+
+
+def write_snapshot(
+    db: Session,
+    household_id: int,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    directory: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    Write the household's transactions and items for the months covering
+    ``from_date``..``to_date`` (default: all of its history).
+
+    Returns the widened range and the rows written per dataset and month.
+    """
+    if from_date is None or to_date is None:
+        first, last = db.execute(
+            select(func.min(Transaction.date), func.max(Transaction.date))
+            .where(Transaction.household_id == household_id)
+        ).one()
+        if first is None:
+            return {"from_date": None, "to_date": None, "data_version": None, "partitions": []}
+        from_date, to_date = from_date or first, to_date or last
+    from_date, to_date = month_range(from_date, to_date)
+
+    sync_epoch, data_version = db.execute(
+        select(Household.sync_epoch, Household.data_version).where(Household.id == household_id)
+    ).one()
+    metadata = {
+        "household_id": str(household_id),
+        "sync_epoch": str(sync_epoch),
+        "data_version": str(data_version),
+        "written_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+    partitions = []
+    for dataset in DATASETS:
+        writer = _MonthWriter(household_id, dataset, metadata, directory)
+        try:
+            _stream_dataset(db, household_id, dataset, from_date, to_date, writer)
+            writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        for year, month in _months(from_date, to_date):
+            rows = writer.written.get((year, month), 0)
+            if not rows:
+                # 行がなくなった月は古いファイルを残さない
+                partition_path(household_id, dataset, year, month, directory).unlink(missing_ok=True)
+                continue
+            partitions.append({"dataset": dataset, "year": year, "month": month, "rows": rows})
+
+    return {
+        "from_date": from_date.isoformat(),
+        "to_date": to_date.isoformat(),
+        "data_version": data_version,
+        "partitions": partitions,
+    }
+
+
+def list_partitions(household_id: int, directory: Optional[str] = None) -> List[Dict[str, object]]:
+    """Snapshot month files of a household with their row counts and metadata (footers only)."""
+    pq = _pq()
+    partitions = []
+    for dataset in DATASETS:
+        base = snapshot_root(directory) / f"household={household_id}" / dataset
+        for path in sorted(base.glob(f"year=*/month=*/{PART_FILE}")):
+            footer = pq.read_metadata(path)
+            metadata = {key.decode(): value.decode() for key, value in (footer.metadata or {}).items()
+                        if key.decode() in ("sync_epoch", "data_version", "written_at")}
+            partitions.append({
+                "dataset": dataset,
+                "year": int(path.parent.parent.name.split("=")[1]),
+                "month": int(path.parent.name.split("=")[1]),
+                "rows": footer.num_rows,
+                "bytes": path.stat().st_size,
+                "sync_epoch": int(metadata["sync_epoch"]) if "sync_epoch" in metadata else None,
+                "data_version": int(metadata["data_version"]) if "data_version" in metadata else None,
+                "written_at": metadata.get("written_at"),
+            })
+    return partitions
+
+
+def load_snapshot(
+    household_id: int,
+    dataset: str = "transactions",
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    columns: Optional[List[str]] = None,
+    directory: Optional[str] = None
+):
+    """
+    Memory-map the snapshot of ``dataset`` for a date range into one
+    ``pyarrow.Table`` (only the month files overlapping the range are opened).
+    """
+    pa, pq = _pa(), _pq()
+    pc = optional_import("pyarrow.compute", "Parquet snapshots")
+    wanted = list(columns) if columns else [field.name for field in schema(dataset)]
+    read_columns = wanted if "date" in wanted else [*wanted, "date"]
+
+    tables = []
+    for partition in list_partitions(household_id, directory):
+        if partition["dataset"] != dataset:
+            continue
+        month = (partition["year"], partition["month"])
+        if from_date and month < (from_date.year, from_date.month):
+            continue
+        if to_date and month > (to_date.year, to_date.month):
+            continue
+        path = partition_path(household_id, dataset, *month, directory)
+        table = pq.read_table(path, columns=read_columns, memory_map=True)
+        tables.append(table.replace_schema_metadata(None))
+
+    if not tables:
+        return schema(dataset).empty_table().select(wanted)
+    table = pa.concat_tables(tables)
+    # 範囲が月の途中から・途中までの場合だけ行を絞る
+    if from_date and from_date.day != 1:
+        table = table.filter(pc.greater_equal(table["date"], pa.scalar(from_date, pa.date32())))
+    if to_date and to_date != month_range(to_date, to_date)[1]:
+        table = table.filter(pc.less_equal(table["date"], pa.scalar(to_date, pa.date32())))
+    return table.select(wanted)
+
+
+def load_frame(household_id: int, dataset: str = "transactions", **kwargs):
+    """``load_snapshot`` as a pandas DataFrame (ratios and quantities stay ``Decimal``)."""
+    return load_snapshot(household_id, dataset, **kwargs).to_pandas()
+
+
+def _current_months(db: Session, household_id: int, from_date: date, to_date: date, directory: Optional[str]):
+    """
+    Months of the range whose transactions snapshot is still current, and the
+    snapshot table of the range (``None`` without usable snapshots).
+    """
+    try:
+        partitions = [
+            partition for partition in list_partitions(household_id, directory)
+            if partition["dataset"] == "transactions"
+            and from_date <= date(partition["year"], partition["month"], 1) <= to_date
+        ]
+    except OptionalDependencyError:
+        return set(), None
+    sync_epoch, version = db.execute(
+        select(Household.sync_epoch, Household.data_version).where(Household.id == household_id)
+    ).one()
+    # 世帯の移動・復元で ID が振り直されたスナップショットと、バージョンのない古いファイルは使わない
+    usable = [partition for partition in partitions
+              if partition["sync_epoch"] == sync_epoch and partition["data_version"] is not None]
+    if not usable:
+        return set(), None
+
+    pa = _pa()
+    pc = optional_import("pyarrow.compute", "Parquet snapshots")
+    table = load_snapshot(household_id, "transactions", from_date, to_date,
+                          columns=["id", "date", "type", "amount_total"], directory=directory)
+    months = {(partition["year"], partition["month"]) for partition in usable}
+    since = min(partition["data_version"] for partition in usable)
+    if since < version:
+        # スナップショット後に書かれた取引の新しい月と、変更・削除された取引のスナップショット上の月は古い
+        changed = db.execute(
+            select(Transaction.id, Transaction.date)
+            .where(Transaction.household_id == household_id, Transaction.sync_version > since)
+        ).all()
+        deleted_ids = db.execute(
+            select(SyncTombstone.entity_id).where(
+                SyncTombstone.household_id == household_id, SyncTombstone.entity == "transactions",
+                SyncTombstone.sync_version > since
+            )
+        ).scalars().all()
+        stale = {(day.year, day.month) for _, day in changed}
+        ids = [transaction_id for transaction_id, _ in changed] + list(deleted_ids)
+        if ids:
+            previous = table.filter(pc.is_in(table["id"], value_set=pa.array(ids, pa.int64())))
+            stale |= {(day.year, day.month) for day in previous["date"].to_pylist()}
+        months -= stale
+    return months, table
+
+
+def monthly_totals(
+    db: Session,
+    household_id: int,
+    from_date: date,
+    to_date: date,
+    directory: Optional[str] = None
+) -> Tuple[Dict[Tuple[int, int, str], int], List[Tuple[int, int]]]:
+    """
+    ``amount_total`` summed per (year, month, type) over the months covering
+    ``from_date``..``to_date``, reading every month whose snapshot is current
+    from Parquet and the rest from the database.
+
+    Returns the sums and the (year, month) pairs served from snapshots.
+    """
+    from_date, to_date = month_range(from_date, to_date)
+    months, table = _current_months(db, household_id, from_date, to_date, directory)
+    sums: Dict[Tuple[int, int, str], int] = {}
+
+    if months:
+        pa = _pa()
+        pc = optional_import("pyarrow.compute", "Parquet snapshots")
+        month_keys = pc.add(pc.multiply(pc.year(table["date"]), 100), pc.month(table["date"]))
+        wanted = pa.array([year * 100 + month for year, month in months], pa.int64())
+        grouped = (
+            table.append_column("month_key", month_keys)
+            .filter(pc.is_in(month_keys, value_set=wanted))
+            .group_by(["month_key", "type"])
+            .aggregate([("amount_total", "sum")])
+        )
+        for key, type_, total in zip(grouped["month_key"].to_pylist(), grouped["type"].to_pylist(),
+                                     grouped["amount_total_sum"].to_pylist()):
+            sums[(key // 100, key % 100, type_)] = total
+
+    # スナップショットで賄えない月は、連続する月ごとの日付範囲で DB から集計する
+    ranges = []
+    for in_snapshot, run in groupby(_months(from_date, to_date), key=lambda month: month in months):
+        run = list(run)
+        if not in_snapshot:
+            ranges.append(and_(Transaction.date >= date(*run[0], 1),
+                               Transaction.date <= month_range(date(*run[-1], 1), date(*run[-1], 1))[1]))
+    if ranges:
+        year, month = func.extract("year", Transaction.date), func.extract("month", Transaction.date)
+        result = db.execute(
+            select(year, month, Transaction.type, func.sum(Transaction.amount_total))
+            .where(Transaction.household_id == household_id, or_(*ranges))
+            .group_by(year, month, Transaction.type)
+        )
+        for row_year, row_month, type_, total in result:
+            # MySQL の SUM は DECIMAL を返すので整数に戻す
+            sums[(int(row_year), int(row_month), type_.value)] = int(total or 0)
+
+    return sums, sorted(months)
+
+
+@job_type("parquet_snapshot")
+def snapshot_job(context: JobContext, from_date: Optional[str] = None, to_date: Optional[str] = None) -> dict:
+    """``write_snapshot`` for the job's household (``POST /api/files/exports/parquet``)."""
+    with context.session() as db:
+        return write_snapshot(
+            db, context.household_id,
+            date.fromisoformat(from_date) if from_date else None,
+            date.fromisoformat(to_date) if to_date else None,
+        )
@@ -0,0 +1,105 @@
+"""
+差分同期（変更の記録）
+
+Every row a request session writes to a synced table is stamped with the
+household data version of its transaction (``sync_version``), and every
+delete leaves a ``sync_tombstones`` row with that version. A client that last
+synced at version ``N`` then needs only the rows and tombstones with
+``sync_version > N``, found through the ``(household_id, sync_version)``
+indexes, so a sync costs O(changes) rather than O(history).
+
+The version is taken with ``data_version.allocate`` under the household row
+lock, so it follows commit order: a reader that sees version ``N`` committed
+also sees every row stamped ``<= N``. Wall-clock ``updated_at`` would not
+give that guarantee (second resolution, commit order differs from clock
+order).
+
+Transaction items are synced through their transaction: any change to an item
+stamps the parent, and the feed sends the full item list of every changed
+transaction. Writes made by scripts through a plain ``Session`` are not
+stamped; ``move_household`` renumbers ids and increments
+``households.sync_epoch``, which invalidates outstanding tokens.
+"""
+
+import itertools
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, func, update
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app import column_store, data_version
+from app.database import RoutingSession, current_household
+from app.models import Account, Budget, Category, SyncTombstone, Transaction, TransactionItem
+
+# フィードのキー -> モデル（親から順に）
+SYNCED_MODELS = {
+    "accounts": Account,
+    "categories": Category,
+    "budgets": Budget,
+    "transactions": Transaction,
+}
+ENTITY_NAMES = {model: name for name, model in SYNCED_MODELS.items()}
+ENTITY_NAMES[TransactionItem] = "items"
+
+
+def make_token(epoch: int, version: int) -> str:
+    return f"{epoch}.{version}"
+
+
+def parse_token(token: str) -> Tuple[int, int]:
+    """Split a sync token into (epoch, version); raises ValueError if malformed."""
+    epoch, version = token.split(".")
+    return int(epoch), int(version)
+
+
+def _household_of(obj) -> Optional[int]:
+    return getattr(obj, "household_id", None) or current_household.get()
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _stamp_flushed(session: Session, flush_context, instances):
+    touched: Dict[int, set] = {}  # 明細が変わった取引（世帯ごと）
+    for obj in itertools.chain(session.new, session.dirty):
+        household_id = _household_of(obj)
+        if household_id is None:
+            continue
+        if type(obj) in ENTITY_NAMES and type(obj) is not TransactionItem:
+            if obj in session.new or session.is_modified(obj, include_collections=False):
+                obj.sync_version = data_version.allocate(session, household_id)
+        elif isinstance(obj, TransactionItem) and obj.transaction_id is not None and (
+                obj in session.new or session.is_modified(obj)):
+            touched.setdefault(household_id, set()).add(obj.transaction_id)
+
+    for obj in list(session.deleted):
+        household_id = _household_of(obj)
+        if type(obj) not in ENTITY_NAMES or household_id is None:
+            continue
+        version = data_version.allocate(session, household_id)
+        session.add(SyncTombstone(
+            household_id=household_id, entity=ENTITY_NAMES[type(obj)], entity_id=obj.id, sync_version=version
+        ))
+        if isinstance(obj, TransactionItem):
+            touched.setdefault(household_id, set()).add(obj.transaction_id)
+
+    for household_id, transaction_ids in touched.items():
+        version = data_version.allocate(session, household_id)
+        with session.no_autoflush:
+            session.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(transaction_ids), Transaction.household_id == household_id)
+                .values(sync_version=version, updated_at=func.now())
+                .execution_options(synchronize_session=False, **{column_store.SKIP: True})
+            )
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _stamp_bulk_updates(execute_state: ORMExecuteState):
+    # update(Category)...values(...) のような一括更新にも同期バージョンを付ける
+    household_id = current_household.get()
+    if household_id is None or not execute_state.is_update:
+        return
+    mapper = execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in SYNCED_MODELS.values():
+        return
+    version = data_version.allocate(execute_state.session, household_id)
+    execute_state.statement = execute_state.statement.values(sync_version=version)
@@ -0,0 +1,66 @@
+"""
+世帯（テナント）コンテキスト
+
+The household a request acts for comes from the ``hid`` claim of its access
+token (tokens issued before multi-tenancy fall back to
+``DEFAULT_HOUSEHOLD_ID``). ``current_household_id`` is the dependency routers
+take it from; it also sets the ``current_household`` context variable, which
+
+- picks the shard engine in ``RoutingSession.get_bind``, and
+- adds a ``household_id = :hid`` criterion to every ORM select, update and
+  delete of a household-scoped model, as a safety net behind the explicit
+  filters in the routers. Models without ``household_id`` (items, tags links,
+  receipts, closure rows) are reached through their household-scoped parents.
+"""
+
+from typing import Iterable, Optional
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import ORMExecuteState, Session, with_loader_criteria
+
+from app.database import RoutingSession, current_household
+from app.models import (
+    Account, AccountBalance, AccountBalanceCheckpoint, Budget, Category, Job, SyncTombstone, Tag, Transaction, User,
+)
+from app.routers.auth import require_auth
+from app.settings import settings
+
+HOUSEHOLD_SCOPED_MODELS = (
+    User, Account, Category, Transaction, Tag, Budget, AccountBalance, AccountBalanceCheckpoint, SyncTombstone, Job,
+)
+
+
+async def current_household_id(payload: dict = Depends(require_auth)) -> int:
+    """Dependency for protected routes: the household id of the authenticated token."""
+    household_id = int(payload.get("hid", settings.DEFAULT_HOUSEHOLD_ID))
+    current_household.set(household_id)
+    return household_id
+
+
+def ensure_owned(db: Session, household_id: int, model, ids: Iterable[Optional[int]], label: str) -> None:
+    """Raise 400 unless every referenced row exists in the household."""
+    ids = {id_ for id_ in ids if id_ is not None}
+    if not ids:
+        return
+    found = db.execute(
+        select(func.count()).select_from(model).where(model.id.in_(ids), model.household_id == household_id)
+    ).scalar()
+    if found != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{label} not found"
+        )
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _scope_to_household(execute_state: ORMExecuteState) -> None:
+    household_id = current_household.get()
+    if household_id is None or execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(model, lambda cls: cls.household_id == household_id, include_aliases=True)
+        for model in HOUSEHOLD_SCOPED_MODELS
+    ])
@@ -0,0 +1,115 @@
+"""
+検証済みトークンのキャッシュと失効リスト
+
+Every authenticated request carries the same cookie until it expires, so
+re-running ``jwt.decode`` (base64, JSON and HMAC-SHA256 through python-jose)
+each time is wasted work. ``TokenCache`` keeps the payloads of recently
+verified tokens in a bounded LRU keyed by the SHA-256 digest of the token,
+and drops an entry once its ``exp`` has passed so an expired token is always
+re-verified (and rejected).
+
+``RevocationList`` holds digests of logged-out tokens until their own expiry,
+up to a fixed number of entries (the soonest to expire are dropped first).
+Both are per process: with several workers a revoked token is rejected by the
+worker that handled ``/logout`` and by the others only once it expires.
+"""
+
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """Bounded LRU of verified token payloads, aware of their expiry."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return payload
+
+    def put(self, digest: bytes, payload: dict) -> None:
+        expires_at = float(payload.get("exp", 0))
+        if self.maxsize <= 0 or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[digest] = (payload, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest: bytes) -> None:
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevocationList:
+    """Digests of revoked tokens, each kept only until the token would expire anyway."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._revoked: Dict[bytes, float] = {}
+        # 期限の早い順に取り出すためのヒープ（再失効で古くなった要素は取り出し時に読み飛ばす）
+        self._expiry: List[Tuple[float, bytes]] = []
+        self._lock = threading.Lock()
+
+    def revoke(self, digest: bytes, expires_at: float) -> None:
+        now = time.time()
+        if self.maxsize <= 0 or expires_at <= now:
+            return
+        with self._lock:
+            self._revoked[digest] = expires_at
+            heapq.heappush(self._expiry, (expires_at, digest))
+            # 期限切れのものは失効リストに残す必要がない。上限を超えたら期限の近いものから捨てる
+            while self._expiry and (self._expiry[0][0] <= now or len(self._revoked) > self.maxsize):
+                self._pop()
+            if len(self._expiry) > 2 * self.maxsize:
+                self._expiry = [(exp, key) for key, exp in self._revoked.items()]
+                heapq.heapify(self._expiry)
+
+    def _pop(self) -> None:
+        expires_at, digest = heapq.heappop(self._expiry)
+        if self._revoked.get(digest) == expires_at:
+            del self._revoked[digest]
+
+    def is_revoked(self, digest: bytes) -> bool:
+        return digest in self._revoked
+
+    def clear(self) -> None:
+        with self._lock:
+            self._revoked.clear()
+            self._expiry.clear()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
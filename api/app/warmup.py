@@ -0,0 +1,69 @@
+"""
+起動時のウォームアップ
+
+Run from the lifespan hook before the app reports ready on ``/readyz``:
+
+1. Open ``pool_size`` connections at once (primary and replicas) so the first requests do not pay for
+   connection setup (TCP, auth, session variables).
+2. Request the hot read endpoints once in-process. This compiles their SQL
+   into the engine's statement cache and builds the response serializers, so
+   the first real user request runs the already-warm path.
+"""
+
+import logging
+import time
+from typing import Iterable, Sequence
+
+import anyio
+import httpx
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def prewarm_pool(engine: Engine) -> int:
+    """Open (and return to the pool) as many connections as the pool keeps."""
+    size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connection = engine.connect()
+            connections.append(connection)
+            connection.exec_driver_sql("SELECT 1")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def warm_routes(app, paths: Iterable[str]) -> None:
+    """Issue one in-process GET per path; failures are logged, never raised."""
+    from app.routers.auth import create_access_token
+    from app.settings import settings
+
+    token = create_access_token({"sub": "household", "type": "access", "hid": settings.DEFAULT_HOUSEHOLD_ID})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost",
+                                 cookies={"access_token": token}) as client:
+        for path in paths:
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    logger.warning("Warmup request %s returned %s", path, response.status_code)
+            except Exception as e:
+                logger.warning("Warmup request %s failed: %s", path, e)
+
+
+async def run(app, engines: Sequence[Engine], paths: Iterable[str]) -> None:
+    start = time.perf_counter()
+    try:
+        connections = 0
+        for engine in engines:
+            connections += await anyio.to_thread.run_sync(prewarm_pool, engine)
+    except Exception as e:
+        # DB未起動でもプロセスは起動させ、readiness は warmup 完了後に立てる
+        logger.warning("Connection pool prewarm failed, skipping route warmup: %s", e)
+        return
+    await warm_routes(app, paths)
+    logger.info("Warmup finished in %.3fs (%d pooled connections)", time.perf_counter() - start, connections)
@@ -0,0 +1 @@
+# API benchmark suite (python -m benchmarks.run)
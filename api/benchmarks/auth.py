@@ -0,0 +1,82 @@
+"""
+認証キャッシュのベンチマーク
+
+Compares token verification with and without the verified-token cache, both
+as raw ``verify_token`` calls per second and as requests per second against a
+protected endpoint (``/api/auth/me``, no database work) through the in-process
+ASGI client.
+
+実行方法:
+python -m benchmarks.auth --duration 5 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+
+def _verify_rate(token: str, iterations: int) -> float:
+    from app.routers.auth import verify_token
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token)
+    return iterations / (time.perf_counter() - start)
+
+
+async def _request_rate(app, token: str, concurrency: int, duration: float) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost",
+                                 cookies={"access_token": token}) as client:
+        count = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal count
+            while time.perf_counter() < deadline:
+                response = await client.get("/api/auth/me")
+                response.raise_for_status()
+                count += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return count / (time.perf_counter() - start)
+
+
+def main(argv: Optional[list] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark JWT verification with and without the cache")
+    parser.add_argument("--iterations", type=int, default=20000, help="verify_token calls per mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of HTTP load per mode")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+
+    from app.main import app
+    from app.routers.auth import TOKEN_CACHE, create_access_token
+    from app.settings import settings
+
+    token = create_access_token({"sub": "household", "type": "access", "hid": settings.DEFAULT_HOUSEHOLD_ID})
+    maxsize = TOKEN_CACHE.maxsize or 1024
+    report = {}
+    for mode, size in (("uncached", 0), ("cached", maxsize)):
+        TOKEN_CACHE.maxsize = size
+        TOKEN_CACHE.clear()
+        report[mode] = {
+            "verify_per_s": round(_verify_rate(token, args.iterations)),
+            "requests_per_s": round(asyncio.run(_request_rate(app, token, args.concurrency, args.duration)), 1),
+        }
+    report["speedup"] = {
+        key: round(report["cached"][key] / report["uncached"][key], 2) for key in report["cached"]
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+レスポンス圧縮のベンチマーク
+
+Fetches typical payloads uncompressed from the in-process app (a transaction
+list page, the sparse ``fields=`` list, the dashboard) plus a CSV export built
+from the same rows, then compresses each with every available encoding and
+level. For each it reports the CPU time per response, the compressed size and
+the CPU spent per KB saved, both for whole bodies and for chunked streaming
+(one flush per chunk, as ``CompressionMiddleware`` does for streaming
+responses).
+
+実行方法:
+python -m benchmarks.compression --database-url sqlite:// --transactions 5000
+"""
+
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+
+
+def _cpu_ms(fn, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) * 1000 / repeat
+
+
+def _measure(encoder_class, level: int, chunks: List[bytes], repeat: int) -> dict:
+    body = b"".join(chunks)
+
+    def whole():
+        encoder = encoder_class(level)
+        return encoder.compress(body) + encoder.finish()
+
+    def streamed():
+        encoder = encoder_class(level)
+        out = [encoder.compress(chunk) + encoder.flush() for chunk in chunks[:-1]]
+        out.append(encoder.compress(chunks[-1]) + encoder.finish())
+        return b"".join(out)
+
+    size = len(whole())
+    stream_size = len(streamed())
+    whole_ms = _cpu_ms(whole, repeat)
+    saved_kb = (len(body) - size) / 1024
+    return {
+        "bytes": size,
+        "ratio": round(size / len(body), 3),
+        "saved_kb": round(saved_kb, 1),
+        "cpu_ms": round(whole_ms, 3),
+        "us_per_kb_saved": round(whole_ms * 1000 / saved_kb, 1) if saved_kb > 0 else None,
+        "stream_bytes": stream_size,
+        "stream_cpu_ms": round(_cpu_ms(streamed, repeat), 3),
+    }
+
+
+def _chunk(body: bytes, size: int) -> List[bytes]:
+    return [body[i:i + size] for i in range(0, len(body), size)] or [b""]
+
+
+async def _fetch_payloads(app, token: str) -> Dict[str, bytes]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost",
+                                 headers={"Authorization": f"Bearer {token}",
+                                          "Accept-Encoding": "identity"}) as client:
+        requests = {
+            "list_page": ("/api/transactions/", {"size": 100}),
+            "list_sparse": ("/api/transactions/", {"size": 100, "fields": "date,amount_total,category",
+                                                   "expand": ""}),
+            "dashboard": ("/api/dashboard/", {}),
+        }
+        payloads = {}
+        for name, (url, params) in requests.items():
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            payloads[name] = response.content
+        return payloads
+
+
+def _export_csv(engine, rows_per_chunk: int) -> List[bytes]:
+    """The transactions as CSV in the import/export format, one chunk per ``rows_per_chunk`` rows."""
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session, aliased
+
+    from app.models import Account, Category, Transaction, User
+
+    payer = aliased(User)
+    statement = (
+        select(Transaction.date, Transaction.type, Transaction.amount_total, Account.name, Category.name,
+               payer.name, Transaction.split_ratio_payer, Transaction.memo)
+        .outerjoin(Account, Account.id == Transaction.account_id)
+        .outerjoin(Category, Category.id == Transaction.category_id)
+        .outerjoin(payer, payer.id == Transaction.payer_user_id)
+        .order_by(Transaction.date, Transaction.id)
+    )
+    chunks, buffer = [], io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["date", "type", "amount_total", "account", "category", "payer", "split_ratio", "memo"])
+    with Session(engine) as db:
+        for index, row in enumerate(db.execute(statement), 1):
+            (date_, type_, amount, account, category, payer_name, split_ratio, memo) = row
+            writer.writerow([date_.isoformat(), getattr(type_, "value", type_), f"{amount:.2f}", account or "",
+                             category or "", payer_name or "", f"{split_ratio:.2f}", memo or ""])
+            if index % rows_per_chunk == 0:
+                chunks.append(buffer.getvalue().encode("utf-8"))
+                buffer.seek(0)
+                buffer.truncate()
+    chunks.append(buffer.getvalue().encode("utf-8"))
+    return chunks
+
+
+def main(argv: Optional[list] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark response compression per encoding and level")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL", "sqlite://"),
+                        help="Benchmark database (dropped and recreated!)")
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20, help="compressions per measurement")
+    parser.add_argument("--chunk-size", type=int, default=16384, help="bytes per streamed JSON chunk")
+    parser.add_argument("--csv-rows-per-chunk", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    # ダッシュボードはアプリの SessionLocal を直接使うため、アプリのエンジン自体をベンチ用 DB に向ける
+    os.environ["DATABASE_URL"] = args.database_url
+    logging.disable(logging.INFO)
+
+    from app.compression import ENCODERS, available_encodings
+    from app.database import engine
+    from app.main import app
+    from app.routers.auth import create_access_token
+    from app.settings import settings
+    from benchmarks.dataset import seed_dataset
+
+    seed_dataset(engine, args.transactions, seed=args.seed)
+    token = create_access_token({"sub": "household", "type": "access", "hid": settings.DEFAULT_HOUSEHOLD_ID})
+
+    payloads = {name: _chunk(body, args.chunk_size)
+                for name, body in asyncio.run(_fetch_payloads(app, token)).items()}
+    payloads["csv_export"] = _export_csv(engine, args.csv_rows_per_chunk)
+
+    encodings = available_encodings(list(ENCODERS))
+    report = {"meta": {"transactions": args.transactions, "encodings": encodings,
+                       "default_levels": {"br": 4, "zstd": 3, "gzip": 6}}}
+    for name, chunks in payloads.items():
+        report[name] = {"bytes": sum(len(chunk) for chunk in chunks), "chunks": len(chunks)}
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                report[name][f"{encoding}-{level}"] = _measure(ENCODERS[encoding], level, chunks, args.repeat)
+    engine.dispose()
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+ベンチマーク用データセットの投入
+
+Builds a fresh schema on the benchmark database and fills it with one household
+from the synthetic data generator, sized to roughly the requested number of
+transactions, then collects the ids the scenarios need. The history ends at a
+fixed month so that runs on different days (and commits) load the same rows.
+"""
+
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Account, Category, Transaction, TransactionType
+from app.scripts.generate_data import SPENDING, generate
+
+MEMO_WORDS = sorted({memo for _, _, _, memos, _, _, _ in SPENDING for memo in memos})
+ITEM_NAMES = sorted({name for *_, items, _, _ in SPENDING for name, _, _ in items})
+# データの終了月（この月の前月までを生成する）
+DATASET_END = date(2026, 1, 1)
+
+
+def seed_dataset(engine, transactions: int, seed: int = 42, years: int = 3, end: date = DATASET_END) -> dict:
+    """
+    Drop and recreate all tables, then insert a deterministic dataset.
+
+    Returns a summary with the ids the scenarios need (accounts, categories, months).
+    """
+    tx_per_month = max(transactions // (years * 12), 1)
+    generate(engine, households=1, years=years, tx_per_month=tx_per_month, seed=seed, reset=True, end=end)
+
+    with Session(engine) as db:
+        accounts = db.execute(select(Account.id).where(Account.household_id == 1).order_by(Account.id)).scalars().all()
+        # 支出カテゴリ（収入系を除く）
+        income_ids = select(Transaction.category_id).where(
+            Transaction.household_id == 1, Transaction.type == TransactionType.income
+        ).distinct()
+        categories = db.execute(
+            select(Category.id).where(Category.household_id == 1, Category.id.not_in(income_ids),
+                                      Category.parent_id.is_not(None)).order_by(Category.id)
+        ).scalars().all()
+        count, start, end = db.execute(
+            select(func.count(Transaction.id), func.min(Transaction.date), func.max(Transaction.date))
+            .where(Transaction.household_id == 1)
+        ).one()
+
+    start, end = date.fromisoformat(str(start)), date.fromisoformat(str(end))
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    return {
+        "transactions": count,
+        "accounts": list(accounts),
+        "categories": list(categories),
+        "months": months,
+        "memo_words": MEMO_WORDS,
+        "item_names": ITEM_NAMES,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
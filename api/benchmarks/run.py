@@ -0,0 +1,268 @@
+"""
+APIベンチマーク
+
+Boots the FastAPI app in-process, seeds a dataset of the requested size and
+drives a weighted mix of realistic requests concurrently through httpx's async
+client. Prints (or writes) a JSON report with throughput and p50/p95/p99 per
+endpoint so runs can be compared across commits.
+
+実行方法:
+python -m benchmarks.run --database-url mysql+pymysql://app:pw@db:3306/bench \\
+    --transactions 50000 --concurrency 16 --duration 30 --output bench.json
+python -m benchmarks.run ... --compare baseline.json
+python -m benchmarks.run --database-url sqlite:// --transactions 5000 --duration 5
+
+The benchmark database is dropped and recreated; never point it at real data.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+Scenario = Tuple[str, int, Callable[[random.Random, dict], dict]]
+
+
+def _list_page(rng: random.Random, data: dict) -> dict:
+    pages = max(data["transactions"] // 50, 1)
+    return {"method": "GET", "url": "/api/transactions/",
+            "params": {"page": min(int(rng.paretovariate(1.5)), pages), "size": 50}}
+
+
+def _search(rng: random.Random, data: dict) -> dict:
+    return {"method": "GET", "url": "/api/transactions/", "params": {"q": rng.choice(data["memo_words"])}}
+
+
+def _create_with_items(rng: random.Random, data: dict) -> dict:
+    items = [{"name": rng.choice(data["item_names"]), "quantity": 1, "unit_price": price, "amount": price}
+             for price in (rng.randrange(100, 3000, 10) for _ in range(rng.randint(1, 4)))]
+    return {"method": "POST", "url": "/api/transactions/", "json": {
+        "date": data["end"],
+        "type": "expense",
+        "amount_total": sum(item["amount"] for item in items),
+        "account_id": rng.choice(data["accounts"]),
+        "category_id": rng.choice(data["categories"]),
+        "payer_user_id": rng.choice((1, 2)),
+        "memo": "ベンチ",
+        "items": items,
+    }}
+
+
+def _budgets(rng: random.Random, data: dict) -> dict:
+    return {"method": "GET", "url": "/api/budgets/", "params": {"month": rng.choice(data["months"])}}
+
+
+def _dashboard(rng: random.Random, data: dict) -> dict:
+    return {"method": "GET", "url": "/api/dashboard/", "params": {"month": rng.choice(data["months"])}}
+
+
+def _monthly_report(rng: random.Random, data: dict) -> dict:
+    return {"method": "GET", "url": "/api/reports/monthly", "params": {"month": rng.choice(data["months"])}}
+
+
+def _balances(rng: random.Random, data: dict) -> dict:
+    return {"method": "GET", "url": "/api/accounts/balances"}
+
+
+def _csv_export(rng: random.Random, data: dict) -> dict:
+    month = rng.choice(data["months"])
+    return {"method": "POST", "url": "/api/files/exports/transactions/csv",
+            "params": {"from_date": f"{month[:4]}-{month[4:]}-01", "to_date": f"{month[:4]}-{month[4:]}-28"}}
+
+
+# (名前, 重み, リクエスト生成関数)
+SCENARIOS: List[Scenario] = [
+    ("list_page", 40, _list_page),
+    ("search", 15, _search),
+    ("create_with_items", 10, _create_with_items),
+    ("budgets", 15, _budgets),
+    ("dashboard", 8, _dashboard),
+    ("monthly_report", 8, _monthly_report),
+    ("balances", 7, _balances),
+    ("csv_export", 5, _csv_export),
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(max(math.ceil(q / 100 * len(sorted_values)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+async def _worker(client: httpx.AsyncClient, rng: random.Random, data: dict, deadline: float,
+                  remaining: List[int], results: Dict[str, List[float]], errors: Dict[str, int]) -> None:
+    names = [name for name, _, _ in SCENARIOS]
+    weights = [weight for _, weight, _ in SCENARIOS]
+    builders = {name: builder for name, _, builder in SCENARIOS}
+
+    while time.perf_counter() < deadline and remaining[0] != 0:
+        remaining[0] -= 1
+        name = rng.choices(names, weights)[0]
+        request = builders[name](rng, data)
+        start = time.perf_counter()
+        try:
+            response = await client.request(**request)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        results[name].append(time.perf_counter() - start)
+        if failed:
+            errors[name] += 1
+
+
+async def run_benchmark(app, data: dict, concurrency: int, duration: float,
+                        requests: Optional[int], seed: int, warmup: int = 20) -> dict:
+    """Drive the scenario mix against ``app`` and return the per-endpoint summary."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        login = await client.post("/api/auth/login", json={"pin": os.getenv("HOUSEHOLD_PIN", "1234")})
+        if login.status_code == 200:
+            client.cookies.set("access_token", login.json()["access_token"])
+
+        # ウォームアップ（接続プール・初回インポートのコストを除外）
+        warm_results = {name: [] for name, _, _ in SCENARIOS}
+        warm_errors = {name: 0 for name, _, _ in SCENARIOS}
+        await _worker(client, random.Random(seed - 1), data, time.perf_counter() + 60,
+                      [warmup], warm_results, warm_errors)
+
+        results = {name: [] for name, _, _ in SCENARIOS}
+        errors = {name: 0 for name, _, _ in SCENARIOS}
+        remaining = [requests if requests else -1]
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*[
+            _worker(client, random.Random(seed + i), data, deadline, remaining, results, errors)
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    endpoints = {name: summarize(results[name], errors[name], elapsed) for name in results if results[name]}
+    all_latencies = [value for values in results.values() for value in values]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": endpoints,
+    }
+
+
+def compare(current: dict, baseline: dict) -> str:
+    """Render a p50/p95/throughput comparison table against a previous report."""
+    lines = [f"{'endpoint':<20}{'p50 ms':>18}{'p95 ms':>18}{'rps':>18}"]
+    rows = [("total", current["total"], baseline.get("total", {}))]
+    rows += [(name, stats, baseline.get("endpoints", {}).get(name, {}))
+             for name, stats in current["endpoints"].items()]
+    for name, stats, base in rows:
+        cells = []
+        for key in ("p50_ms", "p95_ms", "throughput_rps"):
+            if key in base and base[key]:
+                change = (stats[key] - base[key]) / base[key] * 100
+                cells.append(f"{stats[key]:>9.2f} ({change:+6.1f}%)")
+            else:
+                cells.append(f"{stats[key]:>18.2f}")
+        lines.append(f"{name:<20}" + "".join(f"{cell:>18}" for cell in cells))
+    return "\n".join(lines)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the monimoni API in-process")
+    parser.add_argument("--database-url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Benchmark database (dropped and recreated!)")
+    parser.add_argument("--transactions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=None, help="stop after N requests")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="previous JSON report to compare against")
+    parser.add_argument("--log-level", default="ERROR", help="log level of the app during the run")
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("--database-url (or BENCH_DATABASE_URL) is required")
+
+    # アプリ自身のエンジン（とルーティングセッション）をベンチ用 DB に向ける。
+    # get_db の差し替えでは SessionLocal を直接使う経路（ダッシュボード）に届かない
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DB_POOL_SIZE"] = str(args.concurrency)
+    os.environ["DB_MAX_OVERFLOW"] = str(args.concurrency)
+
+    from app.database import engine
+    from app.main import app
+    from benchmarks.dataset import seed_dataset
+
+    logging.getLogger().setLevel(args.log_level)
+
+    seed_start = time.perf_counter()
+    data = seed_dataset(engine, args.transactions, seed=args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+
+    try:
+        result = asyncio.run(run_benchmark(app, data, args.concurrency, args.duration,
+                                           args.requests, args.seed))
+    finally:
+        engine.dispose()
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "dialect": engine.dialect.name,
+            "transactions": args.transactions,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "seed": args.seed,
+            "seed_s": round(seed_seconds, 2),
+        },
+        **result,
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,2 @@
 CREATE DATABASE IF NOT EXISTS family_budget CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
+CREATE DATABASE IF NOT EXISTS family_budget_bench CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -0,0 +1,80 @@
+"""
+テスト共通のフィクスチャ
+
+The API runs in-process against a throwaway SQLite file (never the
+``DATABASE_URL`` of the environment), with the schema created from the
+models. Each test gets a fresh household with its own users, accounts and
+categories, so tests do not see each other's data.
+"""
+
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="monimoni-tests-")
+# app.settings / app.database を読み込む前に設定する
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP}/test.db",
+    "DATABASE_REPLICA_URLS": "",
+    "SHARD_URLS": "",
+    "STARTUP_WARMUP": "false",
+    "UPLOAD_DIR": os.path.join(_TMP, "receipts"),
+    "EXPORT_DIR": os.path.join(_TMP, "exports"),
+    "SNAPSHOT_DIR": os.path.join(_TMP, "snapshots"),
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Account, AccountType, Base, Category, Household, User  # noqa: E402
+from app.routers.auth import create_access_token  # noqa: E402
+
+Base.metadata.create_all(engine)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def household(db):
+    """A household with two users, cash/bank/card accounts and two categories."""
+    now = datetime.now()
+    row = Household(name="テスト家", created_at=now)
+    db.add(row)
+    db.flush()
+    users = [User(household_id=row.id, name=name, created_at=now) for name in ("太郎", "花子")]
+    accounts = [
+        Account(household_id=row.id, name=name, type=account_type)
+        for name, account_type in (("現金", AccountType.cash), ("銀行", AccountType.bank), ("カード", AccountType.card))
+    ]
+    categories = [Category(household_id=row.id, name=name) for name in ("食費", "日用品")]
+    db.add_all([*users, *accounts, *categories])
+    db.commit()
+    return SimpleNamespace(
+        id=row.id,
+        user_ids=[user.id for user in users],
+        account_ids=[account.id for account in accounts],
+        category_ids=[category.id for category in categories],
+    )
+
+
+@pytest.fixture
+def auth_headers(household):
+    token = create_access_token({"sub": "household", "type": "access", "hid": household.id})
+    return {"Authorization": f"Bearer {token}"}
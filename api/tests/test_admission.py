@@ -0,0 +1,86 @@
+import pytest
+
+from app import admission, metrics
+from app.metrics import PoolPressure
+from app.settings import settings
+
+ORIGIN = settings.cors_origins_list[0]
+
+
+@pytest.mark.parametrize("method, path, route_class", [
+    ("GET", "/healthz", admission.EXEMPT),
+    ("GET", "/metrics", admission.EXEMPT),
+    ("GET", "/api/events/stream", admission.EXEMPT),
+    ("POST", "/api/auth/login", admission.CRITICAL),
+    ("POST", "/api/transactions/", admission.CRITICAL),
+    ("GET", "/api/transactions/", admission.NORMAL),
+    ("PUT", "/api/transactions/1", admission.NORMAL),
+    ("GET", "/api/reports/year-over-year", admission.LOW),
+    ("POST", "/api/files/exports/transactions/csv", admission.LOW),
+    ("POST", "/api/files/imports/transactions/csv", admission.LOW),
+])
+def test_classify(method, path, route_class):
+    assert admission.classify(method, path) == route_class
+
+
+@pytest.fixture
+def pressure(monkeypatch):
+    """A fresh pool pressure gauge for admission control to read."""
+    gauge = PoolPressure()
+    monkeypatch.setattr(metrics, "POOL_PRESSURE", gauge)
+    return gauge
+
+
+def status(client, headers, method, path):
+    return client.request(method, path, headers=headers).status_code
+
+
+def test_saturated_pool_sheds_low_priority_only(client, auth_headers, household, pressure):
+    pressure.waiting = settings.ADMISSION_POOL_WAITERS
+    headers = {**auth_headers, "Origin": ORIGIN}
+
+    response = client.get("/api/reports/year-over-year", params={"year": 2025}, headers=headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+    # ブラウザが 503 と Retry-After を読めるよう CORS ヘッダーが付く
+    assert response.headers["Access-Control-Allow-Origin"] == ORIGIN
+    assert "retry-after" in response.headers["Access-Control-Expose-Headers"].lower()
+
+    assert status(client, headers, "GET", "/api/accounts/balances") == 200
+    assert status(client, headers, "GET", "/healthz") == 200
+    assert status(client, headers, "GET", "/api/auth/me") == 200
+    assert admission.ADMISSION.in_flight == {admission.CRITICAL: 0, admission.NORMAL: 0, admission.LOW: 0}
+
+
+def test_overloaded_pool_sheds_normal_but_not_critical(client, auth_headers, household, pressure):
+    pressure.waiting = int(settings.ADMISSION_POOL_WAITERS * settings.ADMISSION_OVERLOAD_FACTOR)
+    assert status(client, auth_headers, "GET", "/api/accounts/balances") == 503
+    assert status(client, auth_headers, "GET", "/api/auth/me") == 200
+    body = {"date": "2025-03-01", "type": "expense", "amount_total": 500, "account_id": household.account_ids[0],
+            "payer_user_id": household.user_ids[0]}
+    assert client.post("/api/transactions/", json=body, headers=auth_headers).status_code == 200
+
+    pressure.waiting = 0
+    assert status(client, auth_headers, "GET", "/api/accounts/balances") == 200
+
+
+def test_recent_checkout_waits_saturate_the_pool(pressure):
+    assert admission.pool_saturation() == 0
+    for _ in range(20):
+        pressure.begin()
+        pressure.end(settings.ADMISSION_POOL_WAIT_MS / 1000 * 2)
+    assert admission.pool_saturation() > 1.0
+
+    controller = admission.AdmissionController()
+    assert controller.try_enter(admission.LOW) == "db_pool"
+    assert controller.try_enter(admission.NORMAL) is None
+    assert controller.try_enter(admission.CRITICAL) is None
+
+
+def test_in_flight_limit_rejects_without_pool_pressure(pressure):
+    controller = admission.AdmissionController()
+    for _ in range(settings.ADMISSION_LOW_MAX_IN_FLIGHT):
+        assert controller.try_enter(admission.LOW) is None
+    assert controller.try_enter(admission.LOW) == "in_flight"
+    controller.leave(admission.LOW)
+    assert controller.try_enter(admission.LOW) is None
@@ -0,0 +1,85 @@
+import time
+
+from jose import jwt
+
+from app.routers import auth
+from app.routers.auth import REVOKED_TOKENS, TOKEN_CACHE, create_access_token
+from app.settings import settings
+from app.token_cache import RevocationList, TokenCache, token_digest
+
+
+def me(client, token):
+    return client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def logout(client, token):
+    response = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+
+
+def test_token_cache_is_bounded_and_drops_expired_payloads():
+    cache = TokenCache(2)
+    later = time.time() + 60
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, {"exp": later, "key": key})
+    assert len(cache) == 2
+    assert cache.get(b"a") is None
+    assert cache.get(b"b")["key"] == b"b"
+
+    # 参照した b が残り、最も古い c が追い出される
+    cache.put(b"d", {"exp": later})
+    assert cache.get(b"c") is None
+    assert cache.get(b"b") is not None
+
+    cache.put(b"old", {"exp": time.time() - 1})
+    assert cache.get(b"old") is None
+
+
+def test_revocation_list_forgets_expired_tokens_and_keeps_the_latest():
+    revoked = RevocationList(3)
+    now = time.time()
+    revoked.revoke(b"gone", now - 1)
+    assert not revoked.is_revoked(b"gone")
+
+    for offset, key in ((300, b"late"), (100, b"soon"), (200, b"middle"), (400, b"latest")):
+        revoked.revoke(key, now + offset)
+    # 上限を超えたら期限の最も近いものから捨てる
+    assert len(revoked) == 3
+    assert not revoked.is_revoked(b"soon")
+    assert all(revoked.is_revoked(key) for key in (b"middle", b"late", b"latest"))
+
+    # 同じトークンの再失効は1件として数える
+    for _ in range(10):
+        revoked.revoke(b"latest", now + 500)
+    assert len(revoked) == 3 and len(revoked._expiry) <= 6
+
+
+def test_logout_revokes_only_verified_tokens(client, household):
+    token = create_access_token({"sub": "household", "type": "access", "hid": household.id})
+    assert me(client, token).status_code == 200
+    assert TOKEN_CACHE.get(token_digest(token)) is not None
+
+    logout(client, token)
+    response = me(client, token)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert TOKEN_CACHE.get(token_digest(token)) is None
+    # 失効済みトークンでのログアウトもクッキーを消して成功する
+    logout(client, token)
+
+    before = len(REVOKED_TOKENS)
+    for index in range(20):
+        forged = jwt.encode({"sub": "household", "hid": index, "exp": 2 ** 40}, "not-the-secret", algorithm="HS256")
+        logout(client, forged)
+        logout(client, f"garbage-{index}")
+    assert len(REVOKED_TOKENS) == before
+
+
+def test_logout_clamps_expiry_to_the_token_lifetime(client, household, monkeypatch):
+    revoked = RevocationList(16)
+    monkeypatch.setattr(auth, "REVOKED_TOKENS", revoked)
+    token = jwt.encode({"sub": "household", "type": "access", "hid": household.id, "exp": 2 ** 40},
+                       settings.APP_SECRET, algorithm="HS256")
+    logout(client, token)
+    expires_at = revoked._revoked[token_digest(token)]
+    assert expires_at <= time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app.database import DATABASE_URL
+from app.scripts import backup
+
+
+class RecordingConnection:
+    """Records the statements a MySQL connection would run."""
+
+    def __init__(self, log, name, refuse=()):
+        self.log, self.name, self.refuse = log, name, refuse
+
+    def exec_driver_sql(self, statement):
+        if statement in self.refuse:
+            raise DBAPIError(statement, None, Exception("Access denied; you need the RELOAD privilege"))
+        self.log.append((self.name, statement))
+
+    def rollback(self):
+        self.log.append((self.name, "ROLLBACK"))
+
+    def close(self):
+        self.log.append((self.name, "CLOSE"))
+
+
+class RecordingEngine:
+    dialect = SimpleNamespace(name="mysql")
+
+    def __init__(self, refuse=()):
+        self.log, self.refuse, self.opened = [], refuse, 0
+
+    def connect(self):
+        name = "guard" if self.opened == 0 else f"reader{self.opened}"
+        self.opened += 1
+        return RecordingConnection(self.log, name, self.refuse)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_mysql_read_lock_is_released_before_the_dump(workers):
+    engine = RecordingEngine()
+    with backup.snapshot_connections(engine, workers) as (connections, method):
+        # ダンプ中（yield の時点）にはグローバル読み取りロックが外れている
+        held = list(engine.log)
+    assert len(connections) == workers
+    assert method.startswith("shared snapshot")
+    assert held[0] == ("guard", "FLUSH TABLES WITH READ LOCK")
+    assert held[-1] == ("guard", "UNLOCK TABLES")
+    snapshots = [entry for entry in held if entry[1] == "START TRANSACTION WITH CONSISTENT SNAPSHOT"]
+    assert len(snapshots) == workers
+    assert engine.log[-1] == ("guard", "CLOSE")
+
+
+def test_mysql_without_reload_privilege_uses_one_snapshot():
+    engine = RecordingEngine(refuse=("FLUSH TABLES WITH READ LOCK",))
+    with backup.snapshot_connections(engine, 4) as (connections, method):
+        held = list(engine.log)
+    assert len(connections) == 1
+    assert method == "single snapshot (no RELOAD privilege)"
+    assert ("guard", "UNLOCK TABLES") not in held
+
+
+def test_single_worker_dump_verifies(tmp_path, client, auth_headers, household):
+    body = {"date": "2025-02-01", "type": "expense", "amount_total": 1500, "account_id": household.account_ids[0],
+            "payer_user_id": household.user_ids[0]}
+    assert client.post("/api/transactions/", json=body, headers=auth_headers).status_code == 200
+
+    manifest = backup.dump(DATABASE_URL, tmp_path / "backup", workers=1, chunk_rows=2)
+    assert manifest["snapshot"] == "shared snapshot (BEGIN IMMEDIATE)"
+    assert manifest["tables"]["transactions"]["rows"] >= 1
+    assert backup.verify(tmp_path / "backup", f"sqlite:///{tmp_path}/scratch.db", workers=1) == []
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app import balances
+from app.models import AccountBalanceCheckpoint, Transaction
+
+AS_OF_DATES = [
+    date(2024, 12, 31), date(2025, 1, 10), date(2025, 1, 31), date(2025, 2, 1),
+    date(2025, 2, 14), date(2025, 2, 28), date(2025, 3, 15), date(2025, 3, 31), date(2025, 4, 30),
+]
+
+
+def brute_force_balances(db, household_id, as_of=None):
+    """Sum every posting up to ``as_of`` straight from the transactions."""
+    totals = {}
+    for row in db.execute(select(Transaction).where(Transaction.household_id == household_id)).scalars():
+        if as_of is not None and row.date > as_of:
+            continue
+        if row.type.value == "income":
+            totals[row.account_id] = totals.get(row.account_id, 0) + row.amount_total
+        else:
+            totals[row.account_id] = totals.get(row.account_id, 0) - row.amount_total
+        if row.type.value == "transfer" and row.counter_account_id:
+            totals[row.counter_account_id] = totals.get(row.counter_account_id, 0) + row.amount_total
+    return totals
+
+
+def api_balances(client, headers, as_of=None):
+    params = {"as_of": as_of.isoformat()} if as_of else {}
+    response = client.get("/api/accounts/balances", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return {entry["account_id"]: entry["balance"] for entry in response.json()["balances"]}
+
+
+def assert_matches_brute_force(client, headers, db, household):
+    db.expire_all()
+    for as_of in [None, *AS_OF_DATES]:
+        expected = brute_force_balances(db, household.id, as_of)
+        actual = api_balances(client, headers, as_of)
+        for account_id in household.account_ids:
+            assert actual[account_id] == expected.get(account_id, 0), (as_of, account_id)
+
+
+@pytest.fixture
+def ledger(client, auth_headers, household):
+    """Create transactions over January-March 2025 through the API."""
+    cash, bank, card = household.account_ids
+
+    def create(day, type_, amount, account_id, counter_account_id=None):
+        body = {"date": day.isoformat(), "type": type_, "amount_total": amount, "account_id": account_id,
+                "payer_user_id": household.user_ids[0]}
+        if counter_account_id:
+            body["counter_account_id"] = counter_account_id
+        response = client.post("/api/transactions/", json=body, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    ids = []
+    start = date(2025, 1, 1)
+    for offset in range(0, 90, 3):
+        day = start + timedelta(days=offset)
+        ids.append(create(day, "expense", 1000 + offset, (cash, card)[offset % 2]))
+        if day.day == 25 or offset % 30 == 0:
+            ids.append(create(day, "income", 250000, bank))
+            ids.append(create(day, "transfer", 30000, bank, cash))
+    return SimpleNamespace(create=create, ids=ids)
+
+
+def test_current_and_as_of_balances_without_checkpoints(client, auth_headers, db, household, ledger):
+    assert_matches_brute_force(client, auth_headers, db, household)
+
+
+def test_as_of_balances_across_checkpoints(client, auth_headers, db, household, ledger):
+    written = balances.create_checkpoints(db, household.id, through=date(2025, 2, 28))
+    db.commit()
+    # 1月末・2月末 × 3口座
+    assert written == 6
+    assert_matches_brute_force(client, auth_headers, db, household)
+
+
+def test_backdated_writes_shift_later_checkpoints(client, auth_headers, db, household, ledger):
+    cash, bank, card = household.account_ids
+    balances.create_checkpoints(db, household.id, through=date(2025, 3, 31))
+    db.commit()
+
+    # チェックポイントより前の日付への挿入・更新・削除
+    ledger.create(date(2025, 1, 5), "expense", 4321, card)
+    ledger.create(date(2025, 1, 31), "transfer", 7000, cash, bank)
+    moved, deleted = ledger.ids[0], ledger.ids[5]
+    response = client.put(f"/api/transactions/{moved}", headers=auth_headers,
+                          json={"date": "2025-03-20", "account_id": bank, "amount_total": 999})
+    assert response.status_code == 200, response.text
+    response = client.delete(f"/api/transactions/{deleted}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    assert_matches_brute_force(client, auth_headers, db, household)
+
+    db.expire_all()
+    checkpoints = db.execute(
+        select(AccountBalanceCheckpoint).where(AccountBalanceCheckpoint.household_id == household.id)
+    ).scalars().all()
+    assert len(checkpoints) == 9
+    for checkpoint in checkpoints:
+        expected = brute_force_balances(db, household.id, checkpoint.as_of_date)
+        assert checkpoint.balance == expected.get(checkpoint.account_id, 0)
+
+
+def test_rebuild_matches_incremental_balances(client, auth_headers, db, household, ledger):
+    balances.create_checkpoints(db, household.id, through=date(2025, 2, 28))
+    db.commit()
+    ledger.create(date(2025, 2, 10), "income", 5000, household.account_ids[0])
+    incremental = [api_balances(client, auth_headers, as_of) for as_of in [None, *AS_OF_DATES]]
+
+    balances.rebuild_balances(db, household.id)
+    db.commit()
+    assert [api_balances(client, auth_headers, as_of) for as_of in [None, *AS_OF_DATES]] == incremental
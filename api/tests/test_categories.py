@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import category_tree
+from app.models import Category, CategoryClosure, Transaction, TransactionType
+
+
+def create(client, headers, name, parent_id=None):
+    response = client.post("/api/categories/", json={"name": name, "type": "expense", "parent_id": parent_id},
+                           headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def move(client, headers, category_id, name, parent_id):
+    return client.put(f"/api/categories/{category_id}", json={"name": name, "type": "expense", "parent_id": parent_id},
+                      headers=headers)
+
+
+def closure_rows(db, category_ids):
+    db.expire_all()
+    return set(db.execute(
+        select(CategoryClosure.ancestor_id, CategoryClosure.descendant_id, CategoryClosure.depth)
+        .where(CategoryClosure.descendant_id.in_(category_ids))
+    ).all())
+
+
+def expected_closure(db, category_ids):
+    """Every (ancestor, descendant, depth) pair, walked up from each category's parent_id."""
+    db.expire_all()
+    parents = dict(db.execute(select(Category.id, Category.parent_id).where(Category.id.in_(category_ids))).all())
+    rows = set()
+    for category_id in category_ids:
+        ancestor, depth = category_id, 0
+        while ancestor is not None:
+            rows.add((ancestor, category_id, depth))
+            ancestor, depth = parents[ancestor], depth + 1
+    return rows
+
+
+def test_moving_a_subtree_rewrites_its_closure_rows(client, auth_headers, db, household):
+    food = create(client, auth_headers, "食費")
+    eating_out = create(client, auth_headers, "外食", food)
+    lunch = create(client, auth_headers, "ランチ", eating_out)
+    groceries = create(client, auth_headers, "食料品", food)
+    hobby = create(client, auth_headers, "趣味")
+    ids = [food, eating_out, lunch, groceries, hobby]
+    assert closure_rows(db, ids) == expected_closure(db, ids)
+
+    response = move(client, auth_headers, eating_out, "外食", hobby)
+    assert response.status_code == 200, response.text
+    assert closure_rows(db, ids) == expected_closure(db, ids)
+    assert category_tree.get_subtree(db, hobby) == {hobby: 0, eating_out: 1, lunch: 2}
+    assert category_tree.get_subtree(db, food) == {food: 0, groceries: 1}
+
+    # ルートへの移動
+    response = move(client, auth_headers, eating_out, "外食", None)
+    assert response.status_code == 200, response.text
+    assert closure_rows(db, ids) == expected_closure(db, ids)
+    assert category_tree.get_subtree(db, hobby) == {hobby: 0}
+
+
+def test_moving_below_itself_or_a_descendant_is_rejected(client, auth_headers, db, household):
+    food = create(client, auth_headers, "食費")
+    eating_out = create(client, auth_headers, "外食", food)
+    lunch = create(client, auth_headers, "ランチ", eating_out)
+    ids = [food, eating_out, lunch]
+    before = closure_rows(db, ids)
+
+    for target in (lunch, eating_out, food):
+        response = move(client, auth_headers, food, "食費", target)
+        assert response.status_code == 400, (target, response.text)
+        assert response.json()["detail"] == "Category cannot be moved below itself or its descendants"
+    response = move(client, auth_headers, eating_out, "外食", lunch)
+    assert response.status_code == 400
+
+    assert closure_rows(db, ids) == before
+    db.expire_all()
+    assert db.get(Category, food).parent_id is None
+    assert db.get(Category, eating_out).parent_id == food
+
+
+def test_deleting_a_category_reparents_its_children(client, auth_headers, db, household):
+    food = create(client, auth_headers, "食費")
+    eating_out = create(client, auth_headers, "外食", food)
+    lunch = create(client, auth_headers, "ランチ", eating_out)
+    dinner = create(client, auth_headers, "ディナー", eating_out)
+    ids = [food, eating_out, lunch, dinner]
+
+    now = datetime.now()
+    db.add_all([
+        Transaction(household_id=household.id, date=now.date(), type=TransactionType.expense, amount_total=amount,
+                    account_id=household.account_ids[0], category_id=category_id,
+                    payer_user_id=household.user_ids[0], split_ratio_payer=0.5,
+                    created_by=household.user_ids[0], created_at=now, updated_at=now)
+        for category_id, amount in ((lunch, 1200), (dinner, 3000), (eating_out, 500))
+    ])
+    db.commit()
+
+    response = client.delete(f"/api/categories/{eating_out}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    listed = {row["id"]: row for row in client.get("/api/categories/", headers=auth_headers).json()}
+    assert eating_out not in listed
+    assert listed[lunch]["parent_id"] == food and listed[dinner]["parent_id"] == food
+    assert closure_rows(db, ids) == expected_closure(db, ids)
+    assert sorted(category_tree.get_children(db, food)) == [eating_out, lunch, dinner]
+
+    # 削除したカテゴリとその子の取引は引き続き親に集計される
+    totals = category_tree.rollup_totals(db, [food, lunch], Transaction.household_id == household.id)
+    assert totals == {food: 4700, lunch: 1200}
@@ -0,0 +1,152 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app import data_version
+from app.column_store import COLUMN_STORE, NO_CATEGORY, TYPE_CODES, month_key
+from app.database import current_household
+from app.models import Transaction, TransactionType
+
+pytest.importorskip("numpy")
+
+GROUPINGS = [(), ("month",), ("type",), ("category",), ("payer",), ("account",), ("month", "type", "category")]
+
+
+def sql_group_sum(db, household_id, by):
+    """What ``group_sum(by)`` should return, aggregated from the transactions table."""
+    db.expire_all()
+    rows = db.execute(
+        select(Transaction.date, Transaction.type, Transaction.category_id, Transaction.payer_user_id,
+               Transaction.account_id, Transaction.amount_total)
+        .where(Transaction.household_id == household_id)
+    ).all()
+    sums = {}
+    for day, type_, category_id, payer_id, account_id, amount in rows:
+        values = {
+            "month": month_key(day),
+            "type": TYPE_CODES[TransactionType(type_)],
+            "category": NO_CATEGORY if category_id is None else category_id,
+            "payer": payer_id,
+            "account": account_id,
+        }
+        key = tuple(values[name] for name in by)
+        total, count = sums.get(key, (0, 0))
+        sums[key] = (total + amount, count + 1)
+    return sums
+
+
+def assert_matches_sql(db, household_id):
+    columns = COLUMN_STORE.get(db, household_id)
+    assert columns.version == data_version.current_version(db, household_id)
+    for by in GROUPINGS:
+        assert columns.group_sum(by) == sql_group_sum(db, household_id, by), by
+    assert len(columns) == db.execute(
+        select(func.count()).select_from(Transaction).where(Transaction.household_id == household_id)
+    ).scalar()
+
+
+def make_transaction(household, rng, day):
+    now = datetime.now()
+    payer_id = rng.choice(household.user_ids)
+    return Transaction(
+        household_id=household.id, date=day, type=rng.choice(list(TransactionType)),
+        amount_total=rng.randint(1, 50000), account_id=rng.choice(household.account_ids),
+        category_id=rng.choice([None, *household.category_ids]), payer_user_id=payer_id,
+        split_ratio_payer=0.5, created_by=payer_id, created_at=now, updated_at=now,
+    )
+
+
+@pytest.fixture
+def rng():
+    return random.Random(47)
+
+
+def test_commits_are_applied_incrementally(db, household, rng):
+    start = date(2025, 1, 1)
+    db.add_all([make_transaction(household, rng, start + timedelta(days=i)) for i in range(10)])
+    db.commit()
+    columns = COLUMN_STORE.get(db, household.id)
+    assert len(columns) == 10
+
+    # 初期容量（64行）を超えて列を伸ばす
+    db.add_all([make_transaction(household, rng, start + timedelta(days=i % 120)) for i in range(100)])
+    db.commit()
+    assert COLUMN_STORE.peek(household.id) is columns
+    assert columns.version == data_version.current_version(db, household.id)
+    assert_matches_sql(db, household.id)
+
+    transactions = db.execute(
+        select(Transaction).where(Transaction.household_id == household.id).order_by(Transaction.id)
+    ).scalars().all()
+    # 月・種別・カテゴリ・金額をまたぐ更新
+    for transaction in transactions[10:40]:
+        transaction.date = transaction.date + timedelta(days=45)
+        transaction.amount_total = rng.randint(1, 50000)
+        transaction.type = rng.choice(list(TransactionType))
+        transaction.category_id = rng.choice([None, *household.category_ids])
+        transaction.updated_at = datetime.now()
+    db.commit()
+    assert_matches_sql(db, household.id)
+
+    # 先頭・途中・末尾の削除（末尾の行を空いた位置へ詰める）
+    for transaction in [transactions[0], transactions[55], transactions[-1], transactions[1]]:
+        db.delete(transaction)
+    db.commit()
+    assert_matches_sql(db, household.id)
+
+    # 同じコミットでの追加・更新・削除
+    db.add(make_transaction(household, rng, date(2025, 6, 1)))
+    transactions[2].amount_total += 1
+    transactions[2].updated_at = datetime.now()
+    db.delete(transactions[3])
+    db.commit()
+    assert_matches_sql(db, household.id)
+
+
+def test_version_gaps_catch_up_from_sync_versions_and_tombstones(db, household, rng):
+    start = date(2025, 3, 1)
+    db.add_all([make_transaction(household, rng, start + timedelta(days=i)) for i in range(30)])
+    db.commit()
+    columns = COLUMN_STORE.get(db, household.id)
+    loaded_version = columns.version
+
+    # 列ストアを通さないバージョンの加算（他のワーカー・スクリプト）で、次のコミットは適用できない
+    data_version.bump(db, household.id)
+    db.commit()
+    transactions = db.execute(
+        select(Transaction).where(Transaction.household_id == household.id).order_by(Transaction.id)
+    ).scalars().all()
+    db.delete(transactions[0])
+    db.delete(transactions[10])
+    transactions[20].amount_total = 123
+    transactions[21].date = date(2025, 7, 7)
+    for transaction in transactions[20:22]:
+        transaction.updated_at = datetime.now()
+    db.add(make_transaction(household, rng, date(2025, 8, 1)))
+    db.commit()
+    assert columns.version == loaded_version
+
+    assert_matches_sql(db, household.id)
+    assert COLUMN_STORE.peek(household.id) is columns
+
+
+def test_bulk_updates_catch_up(db, household, rng):
+    db.add_all([make_transaction(household, rng, date(2025, 5, 1) + timedelta(days=i)) for i in range(20)])
+    db.commit()
+    columns = COLUMN_STORE.get(db, household.id)
+
+    token = current_household.set(household.id)
+    try:
+        db.execute(
+            update(Transaction)
+            .where(Transaction.household_id == household.id, Transaction.date < date(2025, 5, 10))
+            .values(amount_total=Transaction.amount_total * 2, updated_at=datetime.now())
+        )
+        db.commit()
+    finally:
+        current_household.reset(token)
+
+    assert_matches_sql(db, household.id)
+    assert COLUMN_STORE.peek(household.id) is columns
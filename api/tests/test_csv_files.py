@@ -0,0 +1,90 @@
+import csv
+import io
+import time
+
+import pytest
+
+from app.models import Account, Category, Household, User
+from app.routers.auth import create_access_token
+
+
+def run_job(client, headers, response):
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        time.sleep(0.05)
+    pytest.fail(f"job {job_id} did not finish")
+
+
+def upload(client, headers, text, dry_run=False):
+    files = {"file": ("transactions.csv", text.encode("utf-8"), "text/csv")}
+    response = client.post("/api/files/imports/transactions/csv", params={"dry_run": dry_run},
+                           files=files, headers=headers)
+    return run_job(client, headers, response)
+
+
+def balances_by_name(client, headers):
+    response = client.get("/api/accounts/balances", headers=headers)
+    assert response.status_code == 200, response.text
+    return {entry["name"]: entry["balance"] for entry in response.json()["balances"]}
+
+
+@pytest.fixture
+def other_household(db, household):
+    """A second household with accounts, users and categories of the same names."""
+    row = Household(name="別の家", created_at=db.get(Household, household.id).created_at)
+    db.add(row)
+    db.flush()
+    for model in (User, Account, Category):
+        for source in db.query(model).filter(model.household_id == household.id).order_by(model.id):
+            values = {column.name: getattr(source, column.name) for column in model.__table__.columns
+                      if column.name not in ("id", "household_id", "parent_id", "sync_version")}
+            db.add(model(household_id=row.id, **values))
+    db.commit()
+    token = create_access_token({"sub": "household", "type": "access", "hid": row.id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_transfers_round_trip_through_export_and_import(client, auth_headers, household, other_household):
+    cash, bank, _ = household.account_ids
+    for body in (
+        {"date": "2025-01-05", "type": "income", "amount_total": 300000, "account_id": bank},
+        {"date": "2025-01-06", "type": "transfer", "amount_total": 40000, "account_id": bank,
+         "counter_account_id": cash},
+        {"date": "2025-01-07", "type": "expense", "amount_total": 1200, "account_id": cash,
+         "category_id": household.category_ids[0]},
+    ):
+        response = client.post("/api/transactions/", json={**body, "payer_user_id": household.user_ids[0]},
+                               headers=auth_headers)
+        assert response.status_code == 200, response.text
+
+    job = run_job(client, auth_headers, client.post("/api/files/exports/transactions/csv", headers=auth_headers))
+    assert job["status"] == "succeeded", job
+    exported = client.get(f"/api/files/exports/{job['id']}/download", headers=auth_headers).text
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert [(row["type"], row["account"], row["counter_account"]) for row in rows] == [
+        ("income", "銀行", ""), ("transfer", "銀行", "現金"), ("expense", "現金", ""),
+    ]
+
+    job = upload(client, other_household, exported)
+    assert job["status"] == "succeeded", job
+    assert job["result"]["imported"] == 3
+    assert balances_by_name(client, other_household) == balances_by_name(client, auth_headers)
+    assert balances_by_name(client, other_household)["現金"] == 40000 - 1200
+
+
+@pytest.mark.parametrize("row, error", [
+    ("2025-01-06,transfer,100,銀行,,,,0.50,,", "counter_account is required for transfers"),
+    ("2025-01-06,transfer,100,銀行,貯金箱,,,0.50,,", "Unknown counter_account '貯金箱'"),
+    ("2025-01-06,expense,100,銀行,現金,,,0.50,,", "counter_account is only allowed for transfers, not expense"),
+])
+def test_import_validates_counter_accounts(client, auth_headers, row, error):
+    header = "date,type,amount_total,account,counter_account,category,payer,split_ratio,memo,items"
+    job = upload(client, auth_headers, f"{header}\n{row}\n")
+    assert job["status"] == "succeeded", job
+    assert job["result"]["imported"] == 0
+    assert job["result"]["errors"] == [{"row": 2, "error": error}]
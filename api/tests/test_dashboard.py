@@ -0,0 +1,54 @@
+from app import data_version
+from app.database import SessionLocal
+from app.routers import dashboard
+
+
+def version_of(household):
+    with SessionLocal() as db:
+        return data_version.current_version(db, household.id)
+
+
+def create_expense(client, headers, household, day="2025-03-10", amount=1200):
+    body = {"date": day, "type": "expense", "amount_total": amount, "account_id": household.account_ids[0],
+            "category_id": household.category_ids[0], "payer_user_id": household.user_ids[0]}
+    response = client.post("/api/transactions/", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def test_unchanged_dashboard_revalidates_with_304(client, auth_headers, household):
+    create_expense(client, auth_headers, household)
+    response = client.get("/api/dashboard/?month=202503", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["totals"]["expense"] == 1200
+
+    etag = response.headers["ETag"]
+    again = client.get("/api/dashboard/?month=202503", headers={**auth_headers, "If-None-Match": etag})
+    assert again.status_code == 304
+
+    create_expense(client, auth_headers, household, amount=800)
+    changed = client.get("/api/dashboard/?month=202503", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["totals"]["expense"] == 2000
+
+
+def test_lagging_part_is_not_served_under_the_current_etag(client, auth_headers, household, monkeypatch):
+    create_expense(client, auth_headers, household)
+    query = dashboard._query
+
+    def lagging_query(household_id, fn, *args):
+        # 予算の部分だけ、1 バージョン遅れたレプリカから読んだことにする
+        seen, result = query(household_id, fn, *args)
+        return (seen - 1 if fn is dashboard._budget_progress else seen), result
+
+    monkeypatch.setattr(dashboard, "_query", lagging_query)
+    monkeypatch.setattr(dashboard, "DASHBOARD_CACHE", dashboard.PayloadCache(16))
+    response = client.get("/api/dashboard/?month=202504", headers=auth_headers)
+    assert response.status_code == 200
+    stale_etag = response.headers["ETag"]
+    assert response.json()["version"] == version_of(household) - 1
+    assert stale_etag.endswith(f'-{version_of(household) - 1}"')
+
+    monkeypatch.setattr(dashboard, "_query", query)
+    fresh = client.get("/api/dashboard/?month=202504", headers={**auth_headers, "If-None-Match": stale_etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != stale_etag
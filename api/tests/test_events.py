@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+from app.events import BROKER
+from app.routers import events
+from app.settings import settings
+from app.sync import make_token, parse_token
+
+
+class Connected:
+    """The part of a Request the stream uses: a client that never disconnects."""
+
+    async def is_disconnected(self):
+        return False
+
+
+async def next_event(stream):
+    """The next event of the stream as (event, data, id), skipping ``retry:`` and heartbeats."""
+    while True:
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=10)
+        if chunk.startswith(("retry:", ":")):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        return fields["event"], json.loads(fields["data"]), fields.get("id")
+
+
+async def create(client, headers, household, amount=100):
+    body = {"date": "2025-05-01", "type": "expense", "amount_total": amount, "account_id": household.account_ids[0],
+            "payer_user_id": household.user_ids[0]}
+    response = await asyncio.to_thread(client.post, "/api/transactions/", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+async def opening(household):
+    """A fresh stream (no Last-Event-ID) and its ``ready`` event."""
+    stream = events._stream(Connected(), household.id, None)
+    return stream, await next_event(stream)
+
+
+def test_resume_from_last_event_id_replays_missed_changes(client, auth_headers, household):
+    async def scenario():
+        stream, (event, data, token) = await opening(household)
+        assert event == "ready"
+        await stream.aclose()
+
+        # 切断中の書き込みは DB から補完される
+        missed = [await create(client, auth_headers, household, amount) for amount in (100, 200)]
+        stream = events._stream(Connected(), household.id, token)
+        try:
+            replayed = [await next_event(stream) for _ in missed]
+            epoch, version = parse_token(token)
+            assert [(event, data["version"], event_id) for event, data, event_id in replayed] == [
+                ("change", version + 1, make_token(epoch, version + 1)),
+                ("change", version + 2, make_token(epoch, version + 2)),
+            ]
+            assert [data["changes"] for _, data, _ in replayed] == [
+                [{"type": "transaction.updated", "id": transaction_id}] for transaction_id in missed
+            ]
+
+            # その後の書き込みはこのプロセスの通知でそのまま届く
+            live = await create(client, auth_headers, household)
+            event, data, event_id = await next_event(stream)
+            assert (event, data) == ("change", {"version": version + 3,
+                                                "changes": [{"type": "transaction.created", "id": live}]})
+        finally:
+            await stream.aclose()
+
+    asyncio.run(scenario())
+    assert BROKER.subscriber_count(household.id) == 0
+
+
+def test_stale_or_foreign_event_ids_get_resync(client, auth_headers, household, monkeypatch):
+    async def scenario():
+        stream, (_, data, token) = await opening(household)
+        await stream.aclose()
+        epoch, version = parse_token(token)
+        for _ in range(3):
+            await create(client, auth_headers, household)
+
+        monkeypatch.setattr(settings, "SSE_MAX_REPLAY_VERSIONS", 2)
+        for last_event_id in (token, make_token(epoch + 1, version), make_token(epoch, version + 50), "garbage"):
+            stream = events._stream(Connected(), household.id, last_event_id)
+            try:
+                event, data, event_id = await next_event(stream)
+            finally:
+                await stream.aclose()
+            assert (event, data, event_id) == ("resync", {"version": version + 3}, make_token(epoch, version + 3))
+
+        # 再生できる範囲なら resync にならない
+        stream = events._stream(Connected(), household.id, make_token(epoch, version + 1))
+        try:
+            assert [(await next_event(stream))[1]["version"] for _ in range(2)] == [version + 2, version + 3]
+        finally:
+            await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_queue_overflow_is_filled_from_the_database(client, auth_headers, household, monkeypatch):
+    monkeypatch.setattr(BROKER, "queue_size", 1)
+
+    async def scenario():
+        stream, (_, data, _) = await opening(household)
+        version = data["version"]
+        try:
+            # ストリームが読まないうちに3件書く: 1件目だけがキューに入る
+            created = [await create(client, auth_headers, household, amount) for amount in (1, 2, 3)]
+            received = [await next_event(stream) for _ in created]
+        finally:
+            await stream.aclose()
+        assert [data["version"] for _, data, _ in received] == [version + 1, version + 2, version + 3]
+        # キューからあふれた版も DB から1回ずつ順に届く（DB から補った変更は作成・更新を区別しない）
+        assert [[change["id"] for change in data["changes"]] for _, data, _ in received] == [[i] for i in created]
+
+    asyncio.run(scenario())
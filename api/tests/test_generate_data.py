@@ -0,0 +1,13 @@
+from datetime import date
+
+from app.scripts.generate_data import build_household
+
+
+def test_history_is_fixed_by_seed_and_end_month():
+    rows = build_household(3, 1, 20, seed=7, end=date(2025, 6, 15))
+    assert rows == build_household(3, 1, 20, seed=7, end=date(2025, 6, 1))
+    days = [row["date"] for row in rows["transactions"]]
+    assert (min(days), max(days)) == (date(2024, 6, 1), date(2025, 5, 31))
+    assert rows["households"][0]["created_at"].date() == date(2025, 6, 1)
+
+    assert build_household(3, 1, 20, seed=7, end=date(2025, 7, 1)) != rows
@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import snapshots
+from app.models import Transaction
+
+pytest.importorskip("pyarrow")
+
+
+def create(client, headers, household, day, type_, amount):
+    body = {"date": day, "type": type_, "amount_total": amount, "account_id": household.account_ids[0],
+            "payer_user_id": household.user_ids[0]}
+    response = client.post("/api/transactions/", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def brute_force_months(db, household_id, year):
+    db.expire_all()
+    sums = {}
+    for row in db.execute(select(Transaction).where(Transaction.household_id == household_id)).scalars():
+        if row.date.year in (year - 1, year) and row.type.value != "transfer":
+            key = (row.date.year, row.date.month, row.type.value)
+            sums[key] = sums.get(key, 0) + row.amount_total
+    return sums
+
+
+def report(client, headers, year):
+    response = client.get("/api/reports/year-over-year", params={"year": year}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def assert_matches(payload, expected, year):
+    for entry in payload["months"]:
+        month = int(entry["month"][5:])
+        assert entry["income"] == expected.get((year, month, "income"), 0), entry
+        assert entry["expense"] == expected.get((year, month, "expense"), 0), entry
+        assert entry["previous_income"] == expected.get((year - 1, month, "income"), 0), entry
+        assert entry["previous_expense"] == expected.get((year - 1, month, "expense"), 0), entry
+
+
+def test_year_over_year_reads_current_snapshot_months(client, auth_headers, db, household):
+    ids = {}
+    for year in (2024, 2025):
+        for month in (1, 2, 3, 6):
+            ids[(year, month)] = create(client, auth_headers, household, f"{year}-{month:02d}-10",
+                                        "expense", 1000 * month + year % 10)
+            create(client, auth_headers, household, f"{year}-{month:02d}-25", "income", 200000)
+
+    payload = report(client, auth_headers, 2025)
+    assert payload["snapshot_months"] == []
+    assert_matches(payload, brute_force_months(db, household.id, 2025), 2025)
+
+    snapshots.write_snapshot(db, household.id, date(2024, 1, 1), date(2025, 2, 28))
+    payload = report(client, auth_headers, 2025)
+    assert payload["snapshot_months"] == ["2024-01", "2024-02", "2024-03", "2024-06", "2025-01", "2025-02"]
+    assert_matches(payload, brute_force_months(db, household.id, 2025), 2025)
+
+    # スナップショット後の書き込み: 追加（2024-02）・削除（2024-03）・月をまたぐ移動（2025-01 -> 2025-05）
+    create(client, auth_headers, household, "2024-02-15", "expense", 777)
+    assert client.delete(f"/api/transactions/{ids[(2024, 3)]}", headers=auth_headers).status_code == 200
+    response = client.put(f"/api/transactions/{ids[(2025, 1)]}", json={"date": "2025-05-01"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    payload = report(client, auth_headers, 2025)
+    assert payload["snapshot_months"] == ["2024-01", "2024-06", "2025-02"]
+    assert_matches(payload, brute_force_months(db, household.id, 2025), 2025)
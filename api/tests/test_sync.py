@@ -0,0 +1,102 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import update
+
+from app import database
+from app.database import create_db_engine, engine
+from app.models import Household
+from app.routers.auth import create_access_token
+
+
+def create(client, headers, household, amount):
+    body = {"date": "2025-04-01", "type": "expense", "amount_total": amount, "account_id": household.account_ids[0],
+            "payer_user_id": household.user_ids[0]}
+    response = client.post("/api/transactions/", json=body, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def changes(client, headers, since=None):
+    return client.get("/api/sync/changes", params={"since": since} if since else {}, headers=headers)
+
+
+def test_incremental_sync_returns_changes_and_deletes(client, auth_headers, household):
+    kept = create(client, auth_headers, household, 100)
+    removed = create(client, auth_headers, household, 200)
+    full = changes(client, auth_headers).json()
+    assert full["full"] is True
+    assert {row["id"] for row in full["transactions"]} == {kept, removed}
+
+    added = create(client, auth_headers, household, 300)
+    assert client.delete(f"/api/transactions/{removed}", headers=auth_headers).status_code == 200
+    delta = changes(client, auth_headers, full["token"]).json()
+    assert delta["full"] is False
+    assert [row["id"] for row in delta["transactions"]] == [added]
+    assert delta["deleted"]["transactions"] == [removed]
+
+    latest = changes(client, auth_headers, delta["token"]).json()
+    assert latest["token"] == delta["token"]
+    assert latest["transactions"] == [] and latest["deleted"]["transactions"] == []
+
+
+def test_tokens_from_another_epoch_or_the_future_expire(client, auth_headers, db, household):
+    create(client, auth_headers, household, 100)
+    token = changes(client, auth_headers).json()["token"]
+    epoch, version = (int(part) for part in token.split("."))
+
+    assert changes(client, auth_headers, "not-a-token").status_code == 400
+    assert changes(client, auth_headers, f"{epoch}.{version + 5}").status_code == 410
+
+    # 世帯の移動・リストアでエポックが進むと、それまでのトークンは使えない
+    db.execute(update(Household).where(Household.id == household.id).values(sync_epoch=Household.sync_epoch + 1))
+    db.commit()
+    response = changes(client, auth_headers, token)
+    assert response.status_code == 410
+    full = changes(client, auth_headers).json()
+    assert full["token"] == f"{epoch + 1}.{version}"
+    assert changes(client, auth_headers, full["token"]).status_code == 200
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A replica that is a copy of the database taken by ``copy()`` and never catches up."""
+    replica_engine = create_db_engine(f"sqlite:///{tmp_path}/replica.db")
+
+    def copy():
+        source, target = engine.raw_connection(), replica_engine.raw_connection()
+        try:
+            source.driver_connection.backup(target.driver_connection)
+        finally:
+            source.close()
+            target.close()
+
+    def route():
+        database.replica_engines.append(replica_engine)
+        monkeypatch.setattr(database, "_next_replica", itertools.cycle([replica_engine]))
+
+    yield SimpleNamespace(copy=copy, route=route)
+    if replica_engine in database.replica_engines:
+        database.replica_engines.remove(replica_engine)
+    replica_engine.dispose()
+
+
+def test_sync_reads_from_the_primary_behind_a_lagging_replica(client, auth_headers, household, replica):
+    first = create(client, auth_headers, household, 100)
+    replica.copy()
+    create(client, auth_headers, household, 200)
+    token = changes(client, auth_headers).json()["token"]
+
+    replica.route()
+    # 書き込みでピン留めされていない別のトークン（他の端末）で読む
+    reader = {"Authorization": "Bearer " + create_access_token(
+        {"sub": "household", "type": "access", "hid": household.id, "device": "phone"}
+    )}
+    listed = client.get("/api/transactions/", headers=reader).json()
+    assert [row["id"] for row in listed["transactions"]] == [first]
+
+    response = changes(client, reader, token)
+    assert response.status_code == 200, response.text
+    assert response.json()["token"] == token
+    assert response.json()["transactions"] == []
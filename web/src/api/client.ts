@@ -101,18 +101,19 @@ export const api = {
 
   // Files
   files: {
-    uploadReceipt: (file: File) => {
+    uploadReceipt: (transactionId: number, file: File) => {
       const formData = new FormData()
       formData.append('file', file)
       return apiClient.post('/files/receipts', formData, {
+        params: { transaction_id: transactionId },
         headers: { 'Content-Type': 'multipart/form-data' },
       })
     },
+    // ジョブとして実行される（job_id が返る）。完了後に downloadExport で取得
     exportCSV: (params?: Record<string, any>) => 
-      apiClient.get('/files/exports/transactions/csv', { 
-        params,
-        responseType: 'blob',
-      }),
+      apiClient.post('/files/exports/transactions/csv', null, { params }),
+    downloadExport: (jobId: number) => 
+      apiClient.get(`/files/exports/${jobId}/download`, { responseType: 'blob' }),
     importCSV: (file: File, dryRun = true) => {
       const formData = new FormData()
       formData.append('file', file)
@@ -123,6 +124,12 @@ export const api = {
     },
   },
 
+  // Jobs
+  jobs: {
+    get: (id: number) => apiClient.get(`/jobs/${id}`),
+    list: (params?: Record<string, any>) => apiClient.get('/jobs/', { params }),
+  },
+
   // Users
   users: {
     list: () => apiClient.get('/users/'),
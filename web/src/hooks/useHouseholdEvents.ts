@@ -0,0 +1,29 @@
+import { useEffect, useRef } from 'react'
+import { apiClient } from '../api/client'
+
+export interface HouseholdChange {
+  type: 'transaction.created' | 'transaction.updated' | 'transaction.deleted' | 'budget.changed'
+  id: number
+  month?: string
+  category_id?: number
+}
+
+// 世帯の変更をサーバー送信イベントで受け取る（ポーリングの代わり）
+// 再接続時はブラウザが Last-Event-ID を送り、取りこぼした変更から再開される
+export const useHouseholdEvents = (onChange: (changes: HouseholdChange[]) => void) => {
+  const handler = useRef(onChange)
+  handler.current = onChange
+
+  useEffect(() => {
+    const source = new EventSource(`${apiClient.defaults.baseURL}/events/stream`, {
+      withCredentials: true,
+    })
+    source.addEventListener('change', (event) => {
+      const { changes } = JSON.parse((event as MessageEvent).data)
+      handler.current(changes)
+    })
+    // 続きから再開できなかった場合は全体を取り直す
+    source.addEventListener('resync', () => handler.current([]))
+    return () => source.close()
+  }, [])
+}
@@ -32,6 +32,7 @@ import { Edit as EditIcon, Add as AddIcon } from "@mui/icons-material";
 // import { ja } from "date-fns/locale";
 import { formatNumber } from "../utils/formatNumber";
 import { apiClient } from "../api/client";
+import { useHouseholdEvents } from "../hooks/useHouseholdEvents";
 
 interface Budget {
   id: number;
@@ -77,6 +78,13 @@ const Budgets: React.FC = () => {
     fetchCategories();
   }, [selectedMonth]);
 
+  // 予算の変更と、実績に効く取引の変更で取り直す
+  useHouseholdEvents((changes) => {
+    if (changes.length === 0 || changes.some((change) => change.type !== "budget.changed" || !change.month || change.month === monthString)) {
+      fetchBudgets();
+    }
+  });
+
   const fetchBudgets = async () => {
     try {
       const response = await apiClient.get(`/budgets/?month=${monthString}`);
@@ -49,42 +49,44 @@ interface Budget {
   month: string;
 }
 
-interface ApiResponse {
-  transactions: Transaction[];
-  total: number;
-  page: number;
-  size: number;
-  pages: number;
+interface DashboardResponse {
+  month: string;
+  version: number;
+  totals: {
+    income: number;
+    expense: number;
+    balance: number;
+    transaction_count: number;
+  };
+  budgets: Budget[];
+  recent_transactions: Array<
+    Pick<Transaction, "id" | "date" | "type" | "amount_total" | "account" | "category" | "memo">
+  >;
+  category_breakdown: Array<{
+    category_id: number;
+    category_name: string;
+    amount: number;
+    percentage: number;
+  }>;
 }
 
 const Dashboard: React.FC = () => {
-  const [transactions, setTransactions] = useState<Transaction[]>([]);
-  const [budgets, setBudgets] = useState<Budget[]>([]);
+  const [dashboard, setDashboard] = useState<DashboardResponse | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        // 取引データを取得
-        const transactionResponse = await fetch(
-          "http://localhost:8000/api/transactions/"
-        );
-        if (!transactionResponse.ok) {
-          throw new Error(`HTTP error! status: ${transactionResponse.status}`);
-        }
-        const transactionData: ApiResponse = await transactionResponse.json();
-        setTransactions(transactionData.transactions);
-
-        // 予算データを取得
+        // 今月の集計・予算・最近の取引を1回のリクエストで取得
         const currentMonth = new Date()
           .toISOString()
           .substring(0, 7)
           .replace("-", "");
-        const budgetResponse = await apiClient.get(
-          `/budgets/?month=${currentMonth}`
+        const response = await apiClient.get<DashboardResponse>(
+          `/dashboard/?month=${currentMonth}&recent=5`
         );
-        setBudgets(budgetResponse.data.budgets);
+        setDashboard(response.data);
       } catch (err) {
         setError(
           err instanceof Error ? err.message : "データの取得に失敗しました"
@@ -97,38 +99,17 @@ const Dashboard: React.FC = () => {
     fetchData();
   }, []);
 
-  // 実際のデータから統計を計算
-  const calculateStats = () => {
-    const now = new Date();
-    const currentMonth = now.getMonth();
-    const currentYear = now.getFullYear();
-
-    const monthlyTransactions = transactions.filter(
-      (t: Transaction) =>
-        new Date(t.date).getMonth() === currentMonth &&
-        new Date(t.date).getFullYear() === currentYear
-    );
-
-    const monthlyIncome = monthlyTransactions
-      .filter((t: Transaction) => t.type === "income")
-      .reduce((sum: number, t: Transaction) => sum + t.amount_total, 0);
-
-    const monthlyExpense = monthlyTransactions
-      .filter((t: Transaction) => t.type === "expense")
-      .reduce((sum: number, t: Transaction) => sum + t.amount_total, 0);
-
-    const monthlyBalance = monthlyIncome - monthlyExpense;
-
-    return {
-      monthlyIncome,
-      monthlyExpense,
-      monthlyBalance,
-      recentTransactions: transactions.slice(0, 5).map((t: Transaction) => ({
-        ...t,
-        dateFormatted: new Date(t.date).toLocaleDateString("ja-JP"),
-      })),
-    };
-  };
+  // サーバーで集計済みの値を表示用に整形
+  const calculateStats = () => ({
+    monthlyIncome: dashboard?.totals.income ?? 0,
+    monthlyExpense: dashboard?.totals.expense ?? 0,
+    monthlyBalance: dashboard?.totals.balance ?? 0,
+    transactionCount: dashboard?.totals.transaction_count ?? 0,
+    recentTransactions: (dashboard?.recent_transactions ?? []).map((t) => ({
+      ...t,
+      dateFormatted: new Date(t.date).toLocaleDateString("ja-JP"),
+    })),
+  });
 
   if (loading) {
     return (
@@ -148,6 +129,7 @@ const Dashboard: React.FC = () => {
   }
 
   const stats = calculateStats();
+  const budgets = dashboard?.budgets ?? [];
 
   // TODO: 予算データも実際のAPIから取得する
   if (budgets.length === 0) {
@@ -258,7 +240,7 @@ const Dashboard: React.FC = () => {
         <Grid item xs={12} sm={6} md={3}>
           <StatCard
             title="取引数"
-            value={transactions.length}
+            value={stats.transactionCount}
             icon={<Category />}
             color="primary"
           />
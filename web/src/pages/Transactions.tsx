@@ -38,6 +38,7 @@ import {
   GetApp as ExportIcon,
 } from "@mui/icons-material";
 import { api } from "../api/client";
+import { useHouseholdEvents } from "../hooks/useHouseholdEvents";
 
 // Transaction型定義
 interface Transaction {
@@ -196,6 +197,13 @@ const Transactions: React.FC = () => {
     fetchTransactions();
   }, [page, rowsPerPage, filters]);
 
+  // パートナーの入力もすぐに反映する
+  useHouseholdEvents((changes) => {
+    if (changes.length === 0 || changes.some((change) => change.type.startsWith("transaction."))) {
+      fetchTransactions();
+    }
+  });
+
   // フィルター変更ハンドラー
   const handleFilterChange = (field: string, value: string) => {
     setFilters((prev: any) => ({ ...prev, [field]: value }));
@@ -248,7 +256,21 @@ const Transactions: React.FC = () => {
   // CSV エクスポート
   const handleExport = async () => {
     try {
-      const response = await api.files.exportCSV(filters);
+      // エクスポートはジョブとして実行されるので、完了を待ってからダウンロード
+      const { data: started } = await api.files.exportCSV(
+        Object.fromEntries(
+          Object.entries(filters).filter(([_, value]) => value !== "")
+        )
+      );
+      let job = started;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await api.jobs.get(started.job_id)).data;
+      }
+      if (job.status !== "succeeded") {
+        throw new Error(job.error || "Export failed");
+      }
+      const response = await api.files.downloadExport(started.job_id);
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement("a");
       link.href = url;